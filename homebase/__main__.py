@@ -3,20 +3,24 @@ Main module for the smart home.
 Starts the controller, handles requests, and listens to a port for commands.
 """
 
-import threading
-import time
+import signal
+import sys
 from queue import Queue
-from typing import List
 
 import common
+import schedule
 from api.api import Api
 from controller import Controller, Refresher
 from home import decoder
+from journal import Journal
+from scheduler import Scheduler
+from supervisor import SUPERVISOR
+from timer_wheel import TimerWheel
 from web_api import WebAPI
-from worker import Worker
 
 if __name__ == "__main__":
 
+    common.load_config()
     home = decoder.read(common.config["home"]["dir"])
     # from home import encoder
     # encoder.write(home, "/Users/schwenger/Workspace/smart_home/config/home.out.yml")
@@ -24,20 +28,24 @@ if __name__ == "__main__":
     cmd_q = Queue()
     resp_q = Queue()
 
-    ctrl      = Controller(cmd_q, home)
-    refresher = Refresher(cmd_q)
-    web       = WebAPI(cmd_q, resp_q)
-    api       = Api(request_q=cmd_q, response_q=resp_q, home=home, client=ctrl.client)
-
-    workers: List[Worker] = [ctrl, api, refresher, web]
-    threads: List[threading.Thread] = []
-
-    for worker in workers:
-        thread = threading.Thread(target=worker.run, args=())
-        threads.append(thread)
-        thread.start()
-
-    zipped = list(zip(workers, threads))
+    journal   = Journal.from_config()
+    wheel     = TimerWheel()
+    scheduler = Scheduler(wheel)
+    ctrl      = Controller(cmd_q, home, journal=journal)
+    refresher = Refresher(cmd_q, scheduler)
+    api       = Api(
+        request_q=cmd_q,
+        response_q=resp_q,
+        home=home,
+        client=ctrl.client,
+        wheel=wheel,
+        scheduler=scheduler,
+    )
+    web       = WebAPI(cmd_q, journal=journal, snapshots=api.snapshots)
+    schedule.install(home.schedules(), cmd_q, scheduler)
+
+    for worker in [ctrl, api, web, wheel]:
+        SUPERVISOR.add(worker)
 
     # import json
     # time.sleep(2)
@@ -45,9 +53,10 @@ if __name__ == "__main__":
     # ctrl.client.publish('zigbee2mqtt/Device/Light/Living Room/Orb/set', json.dumps(pl))
     # print("Published")
 
-    while True:
-        time.sleep(600)
-        for idx, (worker, thread) in enumerate(zipped):
-            if not thread.is_alive():
-                zipped[idx] = (worker, threading.Thread(target=worker.run, args=()))
-                zipped[idx][1].start()
+    # Terminating unwinds the main thread, so the journal gets closed.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        SUPERVISOR.run()
+    finally:
+        if journal is not None:
+            journal.close()
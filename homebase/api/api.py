@@ -1,30 +1,103 @@
 "Bla"
 
-from queue import Queue
+import time
+import traceback
+from datetime import datetime as Timestamp
+from queue import Empty, Queue
+from typing import Dict, Optional
 
+import common
 from api.command import Exec
+from api.merge import DEFAULT_WINDOW, CommandMerger
 from api.query import Responder
-from comm import QData
-from enums import QDataKind
+from api.snapshot import Snapshots
+from comm import QData, Topic
+from comm.batch import CoalescingClient
+from common import Log
+from enums import ApiCommand, QDataKind
 from home import Home
 from homebaseerror import HomeBaseError
+from lighting.transition import Transitions
 from paho.mqtt import client as mqtt
+from scheduler import Scheduler
+from timer_wheel import TimerWheel
 from worker import Worker
 
 
 class Api(Worker):
     "Contains API logic."
 
-    def __init__(self, request_q: Queue, response_q: Queue, home: Home, client: mqtt.Client):
+    STUCK_AFTER = 30.0
+    HEARTBEAT = 1.0
+    # Longest time a snapshot may lag behind while commands keep arriving.
+    SNAPSHOT_LAG = 0.05
+    SNAPSHOT_SLICE = 8
+
+    def __init__(
+        self,
+        request_q: Queue,
+        response_q: Queue,
+        home: Home,
+        client: mqtt.Client,
+        wheel: TimerWheel,
+        scheduler: Scheduler,
+    ):
         self.request_q  = request_q
         self.response_q = response_q
-        self.exec       = Exec(home, client)
+        self.client     = CoalescingClient(client)
+        window          = float(common.config.get("api", {}).get("merge_window", DEFAULT_WINDOW))
+        self.merger     = CommandMerger(window, wheel, request_q)
+        transitions     = Transitions(self.client, wheel)  # type: ignore
+        self.exec       = Exec(home, self.client, transitions, self.merger)  # type: ignore
         self.responder  = Responder(home, response_q, client)
+        self.snapshots  = Snapshots(home)
+        self.scheduler  = scheduler
+        self.__armed: Optional[Timestamp] = None
+        self.__armed_job: Optional[int] = None
+        self.__touched: Dict[str, Topic] = { }
+        self.__touched_since = 0.0
 
     def _run(self):
         while True:
-            qdata: QData = self.request_q.get(block=True)
-            self.__process(qdata)
+            self.beat()
+            try:
+                qdata: QData = self.request_q.get(block=True, timeout=Api.HEARTBEAT)
+            except Empty:
+                continue
+            try:
+                self.__process(qdata)
+            finally:
+                self.__publish_snapshot()
+            self.__arm_expiry()
+
+    def __publish_snapshot(self):
+        """
+            Brings the snapshot up to date with the executed commands while the queue is empty.
+            The update runs in slices so arriving requests do not wait for it; when busy for too
+            long, it catches up entirely.
+        """
+        touched = self.exec.take_touched()
+        if touched and not self.__touched:
+            self.__touched_since = time.monotonic()
+        for topic in touched:
+            self.__touched[topic.string] = topic
+        overdue = time.monotonic() - self.__touched_since >= Api.SNAPSHOT_LAG
+        while self.__touched and (overdue or self.request_q.empty()):
+            keys = list(self.__touched)[:Api.SNAPSHOT_SLICE]
+            self.snapshots.update([self.__touched.pop(key) for key in keys])
+
+    def __arm_expiry(self):
+        "Makes sure the next expiry of a temporary override is handled exactly on time."
+        deadline = self.exec.expiry.next_deadline()
+        if deadline == self.__armed:
+            return
+        if self.__armed_job is not None:
+            self.scheduler.cancel(self.__armed_job)
+        self.__armed = deadline
+        self.__armed_job = None
+        if deadline is not None:
+            qdata = QData.api_command(Topic.for_home(), ApiCommand.ExpireOverrides, payload={ })
+            self.__armed_job = self.scheduler.at(deadline, lambda: self.request_q.put(qdata))
 
     def __process(self, qdata: QData):
         "Processes data found in the queue"
@@ -34,6 +107,8 @@ class Api(Worker):
             raise ValueError("Status updates not supported, yet.")
         elif qdata.kind == QDataKind.ApiQuery:
             self.__handle_query(qdata)
+        elif qdata.kind == QDataKind.ApiBatch:
+            self.__handle_batch(qdata)
         else:
             raise ValueError("Unknown QDataKind: " + str(qdata.kind))
 
@@ -50,4 +125,23 @@ class Api(Worker):
         is_query = qdata.kind is QDataKind.ApiQuery
         if not is_query or topic is None or query is None:
             raise HomeBaseError.Unreachable
-        self.responder.respond(topic, query)
+        self.responder.respond(topic, query, qdata.reply)
+
+    def __handle_batch(self, qdata: QData):
+        "Executes all commands of the batch, coalescing their publishes per topic at the end."
+        if qdata.batch is None or qdata.reply is None:
+            raise HomeBaseError.Unreachable
+        statuses = []
+        self.client.open_batch()
+        try:
+            for item in qdata.batch:
+                try:
+                    self.__handle_api_action(item)
+                    statuses.append({ "status": "ok" })
+                except Exception as err:  # pylint: disable=broad-except
+                    Log.api.error(traceback.format_exc())
+                    error = err.name if isinstance(err, HomeBaseError) else repr(err)
+                    statuses.append({ "status": "error", "error": error })
+        finally:
+            self.client.close_batch()
+        qdata.reply.put(statuses)
@@ -2,33 +2,76 @@
 The logic for executing API commands
 """
 
-from typing import Callable, Dict
+from typing import Callable, Dict, List, Optional
 from copy import deepcopy
 
+import common
 import lighting
 import lighting.config
+import lighting.dimming
+import lighting.expiry
+import lighting.perception
+import lighting.transition
 from api.api_common import (get_abstract, get_abstract_force,
                             get_configured_state, get_sensor)
-from colormath.color_objects import HSVColor
+from api.merge import MERGEABLE, CommandMerger
+from color_utils import HSVColor
 from comm import Payload, Topic
+from comm.payload import Bright
 from common import Log
+from device import Device
 from enums import ApiCommand, TopicCategory
 from home.home import Home
+from lighting.scene import Scene
+from rule import RuleEngine
 from homebaseerror import HomeBaseError
 from paho.mqtt import client as mqtt
 from sensor import Sensor
 
 
+_MERGED_OPERATIONS: Dict[ApiCommand, Callable[[lighting.Abstract], None]] = {
+    ApiCommand.Toggle:  lighting.Abstract.toggle,
+    ApiCommand.DimUp:   lighting.Abstract.dim_up,
+    ApiCommand.DimDown: lighting.Abstract.dim_down,
+}
+
+
 class Exec:
     "Executes API command."
 
-    def __init__(self, home: Home, client: mqtt.Client):
+    def __init__(
+        self,
+        home: Home,
+        client: mqtt.Client,
+        transitions: lighting.transition.Transitions,
+        merger: Optional[CommandMerger] = None,
+    ):
         self.__home = home
         self.__client = client
+        self.__transitions = transitions
+        self.__merger = merger
+        self.__rules = RuleEngine(home.rules())
+        default = lighting.perception.DEFAULT_THRESHOLD
+        threshold = common.config.get("refresh", { }).get("threshold", default)
+        self.__threshold = float(threshold)
+        self.expiry = lighting.expiry.ExpiryIndex()
+        self.__dimming = lighting.dimming.DimmingSessions()
+        self.__touched: List[Topic] = []
+
+    def take_touched(self) -> List[Topic]:
+        "Returns and forgets the topics commands were executed for since the last call."
+        (res, self.__touched) = (self.__touched, [])
+        return res
 
     def exec(self, topic: Topic, cmd: ApiCommand, payload: Dict[str, str]):
         "Executes an API command."
         Log.api.info("Executing command %s for %s with %s", cmd, topic, payload)
+        # Expiring overrides touches the affected lights only, not the entire home it is sent to.
+        if cmd is not ApiCommand.ExpireOverrides:
+            self.__touched.append(topic)
+        if cmd in MERGEABLE and self.__merger is not None and not self.__merger.offer(topic):
+            self.__light_operation(topic, _MERGED_OPERATIONS[cmd], realize=False)
+            return
         {
             ApiCommand.Toggle:          lambda: self.__toggle(topic),
             ApiCommand.TurnOn:          lambda: self.__turn_on(topic),
@@ -49,12 +92,39 @@ class Exec:
             ApiCommand.Refresh:         lambda: self.__refresh(topic),
             ApiCommand.QueryState:      lambda: self.__query_state(topic),
             ApiCommand.UpdateState:     lambda: self.__update_state(topic, payload),
+            ApiCommand.ExpireOverrides: self.__expire_overrides,
+            ApiCommand.ApplyScene:      lambda: self.__apply_scene(topic, payload),
+            ApiCommand.StoreScene:      lambda: self.__store_scene(topic, payload),
+            ApiCommand.FlushMerged:     lambda: self.__flush_merged(topic),
+            ApiCommand.UpdateAvailability: lambda: self.__update_availability(topic, payload),
         }[cmd]()
 
-    def __light_operation(self, topic: Topic, func: Callable[[lighting.Abstract], None]):
+    def __light_operation(
+        self,
+        topic: Topic,
+        func: Callable[[lighting.Abstract], None],
+        realize: bool = True,
+    ):
         light = get_abstract_force(topic, self.__home)
         func(light)
-        self.__refresh_single(light)
+        self.__track_expiry(light)
+        if realize:
+            self.__refresh_single(light)
+
+    def __flush_merged(self, topic: Topic):
+        if self.__merger is not None and self.__merger.close(topic):
+            self.__refresh_single(get_abstract_force(topic, self.__home))
+
+    def __track_expiry(self, light: lighting.Abstract):
+        config = self.__home.compile_config(light.topic)
+        if config is not None:
+            self.expiry.track(light, config.ttl)
+
+    def __expire_overrides(self):
+        for light in self.expiry.evict_due():
+            Log.api.info("Temporary overrides of %s expired.", light.topic)
+            self.__touched += [conc.topic for conc in light.flatten_lights()]
+            self.__refresh_single(light)
 
     def __toggle(self, topic: Topic):
         self.__light_operation(topic, lighting.Abstract.toggle)
@@ -73,16 +143,43 @@ class Exec:
 
     def __start_dim_up(self, topic: Topic):
         light = get_abstract_force(topic, home=self.__home)
+        self.__start_dimming(light, down=False)
         light.start_dim_up(self.__client)
 
     def __start_dim_down(self, topic: Topic):
         light = get_abstract_force(topic, home=self.__home)
+        self.__start_dimming(light, down=True)
         light.start_dim_down(self.__client)
 
+    def __start_dimming(self, light: lighting.Abstract, down: bool):
+        self.__transitions.forget(light)
+        for conc in light.flatten_lights():
+            if conc.is_dimmable:
+                current = get_configured_state(self.__home, conc)
+                self.__dimming.start(conc, current.color.hsv_v, down=down)
+
     def __stop_dimming(self, topic: Topic):
         light = get_abstract_force(topic, home=self.__home)
         light.stop_dim(self.__client)
-        self.__query_state(topic)
+        dimmed = []
+        for conc in light.flatten_lights():
+            estimate = self.__dimming.stop(conc)
+            if estimate is None:
+                continue
+            Log.api.debug("Estimating brightness of %s at %.2f.", conc.topic, estimate)
+            self.__override_brightness(conc, estimate)
+            dimmed.append(conc)
+        # Groups do not answer queries, so reconcile with the actual brightness of each member.
+        payload = Payload().state(None).brightness(None).finalize()
+        for conc in dimmed:
+            self.__client.publish(conc.get_topic(), payload=payload)
+
+    def __override_brightness(self, light: lighting.Abstract, brightness: float):
+        current = get_configured_state(self.__home, light)
+        desired = deepcopy(current.color)
+        desired.hsv_v = brightness
+        light.update_color(desired=desired)
+        self.__track_expiry(light)
 
     def __set_dynamic(self, topic: Topic, val: bool):
         self.__light_operation(topic, lambda light: light.set_dynamic(val))
@@ -94,11 +191,7 @@ class Exec:
         brightness = float(payload["brightness"])
         Log.api.debug("Setting brightness to %.2f", brightness*100)
         def func(light: lighting.Abstract):
-            Log.api.debug("Retrieving current state.")
-            current = get_configured_state(self.__home, light)
-            desired = deepcopy(current.color)
-            desired.hsv_v = brightness
-            light.update_color(desired=desired)
+            self.__override_brightness(light, brightness)
         self.__light_operation(topic=topic, func=func)
 
     # def __set_white_temp(self, topic: Topic, payload: Dict[str, str]):
@@ -138,27 +231,76 @@ class Exec:
         # target = Topic.for_bridge(["request", "device"], "rename")
         # self.__client.publish(target.string, payload=pay)
 
+    def __find_scene(self, topic: Topic, payload: Dict[str, str]) -> Scene:
+        scene = self.__home.find_scene(topic, payload["scene"])
+        if scene is None:
+            Log.api.error("Cannot find scene %s for %s", payload["scene"], topic)
+            raise HomeBaseError.SceneNotFound
+        return scene
+
+    def __apply_scene(self, topic: Topic, payload: Dict[str, str]):
+        scene = self.__find_scene(topic, payload)
+        scene.apply_config()
+        for (light, state) in scene.states:
+            self.__transitions.assume(light, state)
+        scene.publish(self.__client)
+
+    def __store_scene(self, topic: Topic, payload: Dict[str, str]):
+        scene = self.__find_scene(topic, payload)
+        scene.apply_config()
+        for (light, state) in scene.states:
+            self.__transitions.assume(light, state)
+        scene.store(self.__client)
+
     def __refresh(self, topic: Topic):
         Log.api.debug("Refreshing device with topic %s.", topic)
         if topic.category == TopicCategory.Home:
             return self.__refresh_home()
         target = get_abstract_force(topic, home=self.__home)
         for light in target.flatten_lights():
-            self.__refresh_single(light)
+            self.__refresh_single(
+                light,
+                fade=lighting.transition.REFRESH_FADE,
+                threshold=self.__threshold,
+            )
 
     def __refresh_home(self):
         for room in self.__home.rooms:
             self.__refresh(room.group.topic)
 
-    def __refresh_single(self, light: lighting.Abstract):
+    def __refresh_single(
+        self,
+        light: lighting.Abstract,
+        fade: Optional[float] = None,
+        threshold: float = 0.0,
+    ):
         target = get_configured_state(self.__home, light)
-        light.realize_state(self.__client, target)
+        self.__transitions.realize(light, target, duration=fade, threshold=threshold)
 
     def __query_state(self, topic: Topic):
+        light = self.__home.find_light(topic)
+        if light is not None and not light.available:
+            Log.api.debug("Not querying the state of unavailable %s.", topic)
+            return
         payload = Payload().state(None).finalize()
         Log.api.debug("Querying state of %s, which is %s.", topic, payload)
         self.__client.publish(topic.as_get(), payload=payload)
 
+    def __update_availability(self, topic: Topic, payload: Dict[str, str]):
+        "Tracks whether the device is reachable; lights coming back get their state at once."
+        device: Optional[Device] = self.__home.find_light(topic) or self.__home.find_sensor(topic)
+        if device is None:
+            raise HomeBaseError.DeviceNotFound
+        available = payload.get("state") == "online"
+        if device.available == available:
+            return
+        Log.api.info("Device %s became %s.", topic, "available" if available else "unavailable")
+        device.available = available
+        if available and isinstance(device, lighting.Concrete):
+            # Whatever the light missed, a single publish of the configured state covers it.
+            self.__transitions.forget(device)
+            self.__refresh_single(device)
+
     def __update_state(self, topic: Topic, payload: Dict[str, str]):
         light = get_abstract(topic, home=self.__home)
         if light is not None:
@@ -171,8 +313,15 @@ class Exec:
     def __update_light_state(self, target: lighting.Collection, payload: Dict[str, str]):
         if not isinstance(target, lighting.Concrete):
             raise HomeBaseError.InvalidPhysicalQuery
+        if self.__dimming.take_report(target) and "brightness" in payload:
+            Log.api.debug("Reconciling brightness of %s after dimming.", target.topic)
+            self.__override_brightness(target, Bright.from_device(int(payload["brightness"])))
+            return
         desired = lighting.State.read_light_state(payload)
         target.update_state(desired=desired)
+        self.__track_expiry(target)
+        reported = lighting.State.read_displayed_state(payload)
+        self.__transitions.observe(target, reported, self.__threshold)
 
     def __update_sensor_state(self, target: Sensor, payload: Dict[str, str]):
         for key in payload:
@@ -185,3 +334,9 @@ class Exec:
             except ValueError as exc:
                 Log.api.warning("Invalid quantity for sensor update: Not a float. %s", payload[key])
                 raise HomeBaseError.InvalidPhysicalQuantity from exc
+            for (cmd, topic) in self.__rules.feed(target.topic, quant, val):
+                try:
+                    self.exec(topic, cmd, payload={ })
+                except HomeBaseError as err:
+                    Log.api.error("Command %s of a rule for %s failed: %s",
+                                  cmd.name, topic, err.name)
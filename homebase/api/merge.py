@@ -0,0 +1,48 @@
+"Folds bursts of remote presses for the same target into a single publish."
+
+from queue import Queue
+from typing import Dict
+
+from comm import QData, Topic
+from common import Log
+from enums import ApiCommand
+from timer_wheel import TimerWheel
+
+MERGEABLE = { ApiCommand.Toggle, ApiCommand.DimUp, ApiCommand.DimDown }
+DEFAULT_WINDOW = 0.25
+
+
+class CommandMerger:
+    """
+        Tracks a short window per target after a mergeable command was published for it.
+        The first command of a burst is realized right away; config changes of further commands
+        within the window accumulate and are realized by a single publish when the window closes.
+        Commands are thus delayed by at most one window.  A window of zero disables merging.
+    """
+
+    def __init__(self, window: float, wheel: TimerWheel, request_q: Queue):
+        self.window = window
+        self.__wheel = wheel
+        self.__request_q = request_q
+        self.__open: Dict[str, bool] = { }  # Whether changes are pending by target topic.
+
+    def offer(self, topic: Topic) -> bool:
+        "Registers a mergeable command for the target.  Returns whether to realize it right away."
+        if self.window <= 0:
+            return True
+        key = topic.string
+        if key in self.__open:
+            Log.api.debug("Merging command for %s.", topic)
+            self.__open[key] = True
+            return False
+        self.__open[key] = False
+        qdata = QData.api_command(topic, ApiCommand.FlushMerged, payload={ })
+        self.__wheel.schedule(self.window, lambda: self.__request_q.put(qdata))
+        return True
+
+    def close(self, topic: Topic) -> bool:
+        "Closes the window of the target.  Returns whether merged changes are left to realize."
+        return self.__open.pop(topic.string, False)
+
+    def __len__(self) -> int:
+        return len(self.__open)
@@ -3,11 +3,11 @@ The logic for executing API commands
 """
 
 from queue import Queue
-from typing import Dict
+from typing import Dict, Optional
 
 import lighting
 from api.api_common import get_configured_state
-from comm import Payload, Topic
+from comm import Topic
 from common import Log
 from enums import ApiQuery, SensorQuantity
 from home import Home, Room
@@ -24,15 +24,17 @@ class Responder:
         self.__response = response
 
 
-    def respond(self, topic: Topic, query: ApiQuery):
-        "Executes an API query."
+    def respond(self, topic: Topic, query: ApiQuery, reply: Optional[Queue] = None):
+        """
+            Executes an API query.  Responds over the given queue or the shared one.
+            Responses are plain data; the web api encodes them in the format the client accepts.
+        """
         response = {
             ApiQuery.Structure:   self.__respond_structure,
             ApiQuery.LightState:  lambda: self.__respond_light(topic),
             ApiQuery.SensorState: lambda: self.__respond_sensor(topic),
         }[query]()
-        data = Payload.prep_for_sending(response)
-        self.__response.put(data)
+        (reply or self.__response).put(response)
 
 
     def __respond_structure(self) -> Dict:
@@ -47,6 +49,7 @@ class Responder:
             "lights":   self.__compile_group(room.group),
             "remotes":  list(map(self.__compile_remote, room.remotes)),
             "sensors":  list(map(self.__compile_sensor, room.sensors)),
+            "scenes":   list(map(lambda s: s.name, room.scenes)),
         }
 
     def __compile_remote(self, remote: Remote) -> Dict:
@@ -71,6 +74,7 @@ class Responder:
     def __compile_group(self, group: lighting.Group) -> Dict:
         return {
             "name": group.name,
+            "topic": group.topic.string,
             "singleLights": list(map(self.__compile_concrete, group.single_lights)),
             "groups": list(map(self.__compile_group, group.groups)),
         }
@@ -92,15 +96,7 @@ class Responder:
         if light is None:
             raise HomeBaseError.DeviceNotFound
         state = get_configured_state(self.__home, light)
-        return self.__respond_light_state(state)
-
-    def __respond_light_state(self, state: lighting.State) -> Dict:
-        return {
-            "hue": state.color.hsv_h,
-            "saturation": state.color.hsv_s,
-            "value": state.color.hsv_v,
-            "toggledOn": state.toggled_on,
-        }
+        return light_state_response(state, light.available)
 
     def __respond_sensor(self, topic) -> Dict:
         if topic is None:
@@ -108,10 +104,24 @@ class Responder:
         sensor = self.__home.find_sensor(topic=topic)
         if sensor is None:
             raise HomeBaseError.DeviceNotFound
-        return self.__respond_sensor_state(sensor.state)
-
-    def __respond_sensor_state(self, state: Dict[SensorQuantity, float]) -> Dict[str, float]:
-        res = { }
-        for key in state:
-            res[key.value] = state[key]
-        return res
+        return sensor_state_response(sensor.state, sensor.available)
+
+
+def light_state_response(state: lighting.State, available: bool = True) -> Dict:
+    "Returns the response to a query for the light state."
+    return {
+        "hue": state.color.hsv_h,
+        "saturation": state.color.hsv_s,
+        "value": state.color.hsv_v,
+        "toggledOn": state.toggled_on,
+        "available": available,
+    }
+
+
+def sensor_state_response(state: Dict[SensorQuantity, float], available: bool = True) -> Dict:
+    "Returns the response to a query for the sensor state."
+    res: Dict = { }
+    for key in state:
+        res[key.value] = state[key]
+    res["available"] = available
+    return res
@@ -0,0 +1,111 @@
+"""
+Copy-on-write snapshots of the resolved light states and sensor values of the home.
+The api thread publishes a new snapshot after every mutation; web handler threads answer queries
+from the latest one without waiting for the api thread.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import lighting
+import lighting.config
+from api.query import light_state_response, sensor_state_response
+from comm import Topic
+from enums import ApiQuery, TopicCategory
+from home import Home, Room
+from homebaseerror import HomeBaseError
+from sensor import Sensor
+
+
+class Snapshot(NamedTuple):
+    "Query responses keyed by topic string.  Never mutated once published."
+    lights:  Dict[str, Dict]
+    sensors: Dict[str, Dict]
+
+
+# A light with the groups containing it, outermost first.
+_Placed = Tuple[lighting.Concrete, Tuple[lighting.Group, ...]]
+
+
+class Snapshots:
+    """
+        Holds the current snapshot.  Only the api thread updates it, by building new dictionaries
+        and swapping the reference, so readers always see a complete snapshot.
+    """
+
+    def __init__(self, home: Home):
+        self.__home = home
+        # Maps the topic of every device, group, and room to what needs resolving when it changes.
+        self.__index: Dict[str, Union[Room, _Placed, Sensor]] = { }
+        for room in home.rooms:
+            self.__index_room(room)
+        self.current = Snapshot(lights={ }, sensors={ })
+        self.update([Topic.for_home()])
+
+    def __index_room(self, room: Room):
+        self.__index[room.topic.string] = room
+        groups: List[Tuple[lighting.Group, ...]] = [(room.group,)]
+        while groups:
+            chain = groups.pop()
+            self.__index[chain[-1].topic.string] = room
+            for light in chain[-1].single_lights:
+                self.__index[light.topic.string] = (light, chain)
+            groups += [chain + (group,) for group in chain[-1].groups]
+        for sensor in room.sensors:
+            self.__index[sensor.topic.string] = sensor
+
+    def update(self, topics: Iterable[Topic]):
+        """
+            Publishes a new snapshot with the states affected by the topics resolved anew.
+            A light or sensor only affects itself, a group or room affects the entire room.
+        """
+        changed: Dict[str, Union[Room, _Placed, Sensor]] = { }
+        for topic in topics:
+            if topic.category == TopicCategory.Home:
+                changed = { room.topic.string: room for room in self.__home.rooms }
+                break
+            entry = self.__index.get(topic.string)
+            if isinstance(entry, Room):
+                changed[entry.topic.string] = entry
+            elif entry is not None:
+                changed[topic.string] = entry
+        if not changed:
+            return
+        lights = dict(self.current.lights)
+        sensors = dict(self.current.sensors)
+        for entry in changed.values():
+            if isinstance(entry, Sensor):
+                sensors[entry.topic.string] = sensor_state_response(entry.state, entry.available)
+            elif isinstance(entry, tuple):
+                (light, chain) = entry
+                cfg = chain[0].config
+                for group in chain[1:]:
+                    cfg = group.config.with_parent(cfg)
+                cfg = light.config.with_parent(cfg)
+                lights[light.topic.string] = Snapshots.__resolve(light, cfg)
+            else:
+                for (light, cfg) in entry.group.compile_configs():
+                    lights[light.topic.string] = Snapshots.__resolve(light, cfg)
+                for sensor in entry.sensors:
+                    state = sensor_state_response(sensor.state, sensor.available)
+                    sensors[sensor.topic.string] = state
+        self.current = Snapshot(lights=lights, sensors=sensors)
+
+    @staticmethod
+    def __resolve(light: lighting.Concrete, cfg: lighting.Config) -> Dict:
+        # Resolving alters the dynamic state, so every light needs a fresh one.
+        state = lighting.config.resolve(cfg, lighting.dynamic.recommended())
+        return light_state_response(state, light.available)
+
+    def respond(self, topic: Topic, query: ApiQuery) -> Dict:
+        "Answers a state query from the current snapshot."
+        snapshot = self.current
+        entries: Optional[Dict[str, Dict]] = {
+            ApiQuery.LightState:  snapshot.lights,
+            ApiQuery.SensorState: snapshot.sensors,
+        }.get(query)
+        if entries is None:
+            raise HomeBaseError.Unreachable
+        res = entries.get(topic.string)
+        if res is None:
+            raise HomeBaseError.DeviceNotFound
+        return res
@@ -0,0 +1,47 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from api.command import Exec
+from comm import Topic
+from enums import ApiCommand
+from home.decoder import decode
+from lighting.transition import Transitions
+from simulation import synthetic
+from timer_wheel import TimerWheel
+
+
+class RecordingClient:
+    "Records publishes instead of sending them."
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, payload=None, *_args, **_kwargs):
+        self.published.append((topic, payload))
+
+
+class TestExpiry(unittest.TestCase):
+    "Testing the expiry of temporary overrides through the api."
+
+    def setUp(self):
+        spec = synthetic.home_spec(3)
+        spec["rooms"][0]["lights"]["config"] = { "ttl": 0 }
+        self.home = decode(spec)
+        self.client = RecordingClient()
+        transitions = Transitions(self.client, TimerWheel())
+        self.exec = Exec(self.home, self.client, transitions)  # type: ignore
+        self.light = self.home.rooms[0].group.single_lights[0]
+
+    def test_touches_expired_lights_only(self):
+        "Checks that an expiry only marks the lights whose overrides expired as changed."
+        self.exec.exec(self.light.topic, ApiCommand.DimUp, { })
+        self.exec.take_touched()
+        self.exec.exec(Topic.for_home(), ApiCommand.ExpireOverrides, { })
+        self.assertEqual(self.exec.take_touched(), [self.light.topic])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+from queue import Queue
+
+sys.path.append(os.getcwd())
+
+from api.merge import CommandMerger
+from comm import Topic
+from enums import ApiCommand
+from timer_wheel import TimerWheel
+
+
+class TestCommandMerger(unittest.TestCase):
+    "Testing the merging of bursts of commands per target."
+
+    def setUp(self):
+        self.wheel = TimerWheel()
+        self.queue: Queue = Queue()
+        self.merger = CommandMerger(0.3, self.wheel, self.queue)
+        self.topic = Topic.for_room("Living Room")
+
+    def test_single_command_is_realized_at_once(self):
+        "Checks that the first command of a burst is realized right away."
+        self.assertTrue(self.merger.offer(self.topic))
+        self.assertEqual(len(self.wheel), 1)
+        self.assertFalse(self.merger.close(self.topic))
+
+    def test_burst_is_merged(self):
+        "Checks that later commands within the window are merged into a single flush."
+        self.assertTrue(self.merger.offer(self.topic))
+        self.assertFalse(self.merger.offer(self.topic))
+        self.assertFalse(self.merger.offer(self.topic))
+        self.assertEqual(len(self.wheel), 1)
+        self.assertTrue(self.merger.close(self.topic))
+        self.assertTrue(self.merger.offer(self.topic))
+
+    def test_flush_is_enqueued(self):
+        "Checks that the flush is put on the queue once the window ends."
+        self.merger.offer(self.topic)
+        self.wheel.advance(self.wheel.ticks_for(0.3))
+        qdata = self.queue.get_nowait()
+        self.assertEqual(qdata.command, ApiCommand.FlushMerged)
+        self.assertEqual(qdata.topic, self.topic)
+
+    def test_zero_window_disables_merging(self):
+        "Checks that a window of zero realizes every command."
+        merger = CommandMerger(0, self.wheel, self.queue)
+        self.assertTrue(merger.offer(self.topic))
+        self.assertTrue(merger.offer(self.topic))
+        self.assertEqual(len(self.wheel), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from api.api_common import get_configured_state
+from api.query import light_state_response
+from api.snapshot import Snapshots
+from comm import Topic
+from enums import ApiQuery
+from homebaseerror import HomeBaseError
+from simulation import synthetic
+
+
+class TestSnapshots(unittest.TestCase):
+    "Testing the snapshots state queries are answered from."
+
+    def setUp(self):
+        self.home = synthetic.home(20)
+        self.snapshots = Snapshots(self.home)
+        self.light = self.home.rooms[0].group.single_lights[0]
+
+    def test_matches_configured_state(self):
+        "Checks that the snapshot holds the configured state of every light."
+        for light in self.home.flatten_lights():
+            expected = light_state_response(get_configured_state(self.home, light))
+            self.assertEqual(self.snapshots.respond(light.topic, ApiQuery.LightState), expected)
+
+    def test_update_swaps_snapshot(self):
+        "Checks that an update publishes a new snapshot and leaves the old one untouched."
+        before = self.snapshots.current
+        old = self.snapshots.respond(self.light.topic, ApiQuery.LightState)
+        self.light.toggle()
+        self.snapshots.update([self.light.topic])
+        self.assertIsNot(self.snapshots.current, before)
+        self.assertEqual(before.lights[self.light.topic.string], old)
+        new = self.snapshots.respond(self.light.topic, ApiQuery.LightState)
+        self.assertNotEqual(new["toggledOn"], old["toggledOn"])
+
+    def test_unrelated_topic_keeps_snapshot(self):
+        "Checks that topics outside the home do not replace the snapshot."
+        before = self.snapshots.current
+        self.snapshots.update([Topic.for_room("Nowhere")])
+        self.assertIs(self.snapshots.current, before)
+
+    def test_unknown_device(self):
+        "Checks that querying an unknown device raises an error."
+        with self.assertRaises(HomeBaseError):
+            self.snapshots.respond(Topic.for_room("Nowhere"), ApiQuery.LightState)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1 @@
+"Benchmarks for the hot paths of the home base.  Run from within the homebase directory."
@@ -0,0 +1,47 @@
+"""
+Compares colormath's xyY → HSV conversion against the native conversion module.
+Run with `python -m benchmarks.conversion` from within the homebase directory.
+"""
+
+import random
+import timeit
+from typing import List
+
+from colormath.color_conversions import convert_color
+from colormath.color_objects import HSVColor, xyYColor
+from enums import Vendor
+from lighting import conversion
+
+
+def _reports(count: int) -> List[conversion.XyReport]:
+    rand = random.Random(42)
+    return [(rand.uniform(0.15, 0.6), rand.uniform(0.1, 0.6), rand.random()) for _ in range(count)]
+
+
+def _colormath(reports: List[conversion.XyReport]):
+    for (val_x, val_y, bright) in reports:
+        convert_color(xyYColor(xyy_x=val_x, xyy_y=val_y, xyy_Y=bright), HSVColor)
+
+
+def _native(reports: List[conversion.XyReport]):
+    for (val_x, val_y, bright) in reports:
+        conversion.xy_to_hsv(val_x, val_y, bright)
+
+
+def run(count: int = 1000, repeat: int = 5):
+    "Runs the benchmark and prints the best time per conversion."
+    reports = _reports(count)
+    grid = conversion.grid_for(Vendor.Hue)
+    cases = {
+        "colormath":   lambda: _colormath(reports),
+        "native":      lambda: _native(reports),
+        "native_many": lambda: conversion.xy_to_hsv_many(reports),
+        "grid_many":   lambda: conversion.xy_to_hsv_many(reports, grid=grid),
+    }
+    for name, func in cases.items():
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        print(f"{name:<12} {best / count * 1e6:8.2f} µs/report")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,122 @@
+"""
+Reports the import time of the home base per module, as measured by `python -X importtime`.
+The modules the home base starts with are imported in a fresh interpreter; the run fails if they
+exceed the budget or pull in a dependency that must only load lazily.
+Run with `python -m benchmarks.startup --help` from within the homebase directory.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple, Optional
+
+import common
+
+# The modules __main__ imports.
+MODULES = [
+    "common", "schedule", "api.api", "controller", "home.decoder", "journal", "scheduler",
+    "supervisor", "timer_wheel", "web_api",
+]
+# Dependencies that are slow to import and must not be needed to start.
+HEAVY = ["numpy", "colormath", "colour", "yaml", "strenum"]
+# Allowed total import time, sized for a Pi Zero.
+DEFAULT_BUDGET_MS = 1000.0
+TOP = 15
+
+HOMEBASE = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+class Entry(NamedTuple):
+    "The import of a single module."
+    module:     str
+    self_us:    int
+    cumulative: int  # In µs, including the modules imported by this one.
+    depth:      int  # 0 for modules imported directly, growing for nested imports.
+
+
+class Report(NamedTuple):
+    "The outcome of measuring the imports of a set of modules."
+    entries:   List[Entry]
+    total_ms:  float
+    budget_ms: float
+    heavy:     List[str]
+
+    @property
+    def ok(self) -> bool:
+        "Whether the imports stayed within budget without loading heavy dependencies."
+        return self.total_ms <= self.budget_ms and not self.heavy
+
+    def text(self, top: int = TOP) -> str:
+        "Returns the report in readable form."
+        lines = [f"Imports took {self.total_ms:.1f} ms, budget is {self.budget_ms:.0f} ms.", ""]
+        for (title, field) in [("cumulative", "cumulative"), ("self", "self_us")]:
+            lines.append(f"Slowest modules ({title}):")
+            # A module can be listed more than once; the largest figure counts.
+            slowest: Dict[str, int] = { }
+            for entry in sorted(self.entries, key=lambda entry, field=field: getattr(entry, field)):
+                slowest[entry.module] = getattr(entry, field)
+            ranked = sorted(slowest.items(), key=lambda item: item[1], reverse=True)[:top]
+            lines += [f"{value / 1e3:10.2f} ms  {module}" for (module, value) in ranked]
+            lines.append("")
+        lines.append(f"Heavy dependencies loaded: {', '.join(self.heavy) or 'none'}")
+        return "\n".join(lines)
+
+    def json(self) -> Dict:
+        "Returns the report as JSON-serializable dictionary."
+        return {
+            "total_ms":  self.total_ms,
+            "budget_ms": self.budget_ms,
+            "heavy":     self.heavy,
+            "modules":   {
+                entry.module: { "self_us": entry.self_us, "cumulative_us": entry.cumulative }
+                for entry in self.entries
+            },
+        }
+
+
+def parse(output: str) -> List[Entry]:
+    "Parses the output of `-X importtime`."
+    res = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        (own, cumulative, name) = line[len("import time:"):].split("|")
+        module = name.lstrip(" ")
+        res.append(Entry(module, int(own), int(cumulative), (len(name) - len(module) - 1) // 2))
+    return res
+
+
+def measure(modules: List[str] = MODULES, budget_ms: float = DEFAULT_BUDGET_MS) -> Report:
+    "Imports the modules in a fresh interpreter and reports how long each import took."
+    code = "; ".join(f"import {module}" for module in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=HOMEBASE, capture_output=True, text=True, check=True
+    )
+    entries = parse(proc.stderr)
+    total = sum(entry.cumulative for entry in entries if entry.depth == 0) / 1e3
+    loaded = { entry.module.split(".")[0] for entry in entries }
+    return Report(entries, total, budget_ms, [module for module in HEAVY if module in loaded])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    "Runs the measurement from the command line.  Returns 1 if the budget was exceeded."
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description=__doc__)
+    parser.add_argument("--modules", nargs="+", default=MODULES, help="Modules to import.")
+    parser.add_argument("--budget", type=float, default=None, help="Allowed import time in ms.")
+    parser.add_argument("--top", type=int, default=TOP, help="Number of modules to list.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+    common.load_config()
+    budget = args.budget
+    if budget is None:
+        budget = float(common.config.get("startup", { }).get("budget_ms", DEFAULT_BUDGET_MS))
+    report = measure(args.modules, budget)
+    print(json.dumps(report.json(), indent=2) if args.json else report.text(args.top))
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
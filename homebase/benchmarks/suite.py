@@ -0,0 +1,251 @@
+"""
+Micro-benchmarks for the hot paths of the home base over synthetic homes of growing size.
+Results can be saved as a JSON baseline and later runs compared against it, flagging slowdowns.
+Run with `python -m benchmarks.suite --help` from within the homebase directory.
+"""
+
+import argparse
+import copy
+import json
+import platform
+import sys
+import timeit
+from datetime import datetime
+from queue import Queue
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import common
+from api.query import Responder
+from api.snapshot import Snapshots
+from color_utils import HSVColor
+from comm import Payload, Topic
+from comm.encoding import Encoding
+from enums import ApiQuery, Vendor
+from home import Home
+from lighting import State, config, dynamic
+from simulation import synthetic
+
+SIZES = [10, 100, 1000, 10000]
+DEFAULT_THRESHOLD = 0.2
+
+Setup = Callable[[Home], Callable[[], object]]
+
+
+class Case(NamedTuple):
+    "A benchmarked operation.  Cases that do not scale are measured once for the smallest home."
+    name:   str
+    setup:  Setup
+    scales: bool = True
+
+
+def _last_light(home: Home):
+    return home.flatten_lights()[-1]
+
+
+def _topic_from_str(home: Home) -> Callable[[], object]:
+    string = _last_light(home).topic.string
+    return lambda: Topic.from_str(string)
+
+
+def _find_light(home: Home) -> Callable[[], object]:
+    topic = _last_light(home).topic
+    return lambda: home.find_light(topic)
+
+
+def _remote_action(home: Home) -> Callable[[], object]:
+    topic = home.remotes()[-1].topic.string
+    return lambda: home.remote_action(topic, "brightness_up_click")
+
+
+def _compile_config(home: Home) -> Callable[[], object]:
+    group = home.rooms[-1].group
+    topic = _last_light(home).topic
+    return lambda: group.compile_config(topic)
+
+
+def _resolve(home: Home) -> Callable[[], object]:
+    cfg = home.compile_config(_last_light(home).topic)
+    base = dynamic.recommended()
+    def run():
+        dyn = copy.copy(base)
+        dyn.color = copy.copy(base.color)
+        return config.resolve(cfg, dyn)
+    return run
+
+
+def _recommended(_home: Home) -> Callable[[], object]:
+    return dynamic.recommended
+
+
+def _read_light_state(_home: Home) -> Callable[[], object]:
+    desc = { "state": "ON", "brightness": 127, "color_mode": "xy", "color": { "x": 0.4, "y": 0.3 } }
+    return lambda: State.read_light_state(desc)
+
+
+def _finalize(_home: Home) -> Callable[[], object]:
+    color = dynamic.recommended().color
+    return lambda: Payload().state(True).brightness(0.5).color(color, Vendor.Hue).finalize()
+
+
+def _payload_for(home: Home) -> Callable[[], object]:
+    light = next(l for l in home.flatten_lights() if l.is_color)
+    states = [State(HSVColor(hsv_h=h / 100, hsv_s=1.0, hsv_v=0.5)) for h in range(100)]
+    return lambda: [light.payload_for(state) for state in states]
+
+
+def _structure(home: Home) -> Callable[[], object]:
+    response: Queue = Queue()
+    responder = Responder(home, response, None)
+    topic = Topic.for_home()
+    def run():
+        responder.respond(topic, ApiQuery.Structure)
+        return response.get_nowait()
+    return run
+
+
+def _snapshot_read(home: Home) -> Callable[[], object]:
+    snapshots = Snapshots(home)
+    topic = _last_light(home).topic
+    return lambda: snapshots.respond(topic, ApiQuery.LightState)
+
+
+def _snapshot_update(home: Home) -> Callable[[], object]:
+    snapshots = Snapshots(home)
+    topics = [_last_light(home).topic]
+    def run():
+        snapshots.update(topics)
+        return snapshots.current
+    return run
+
+
+def _encode(encoding: Encoding) -> Setup:
+    def setup(home: Home) -> Callable[[], object]:
+        data = _structure(home)()
+        return lambda: encoding.encode(data)
+    return setup
+
+
+CASES = [
+    Case("Topic.from_str",          _topic_from_str,   scales=False),
+    Case("Home.find_light",         _find_light),
+    Case("Home.remote_action",      _remote_action),
+    Case("Group.compile_config",    _compile_config,   scales=False),
+    Case("config.resolve",          _resolve,          scales=False),
+    Case("dynamic.recommended",     _recommended,      scales=False),
+    Case("State.read_light_state",  _read_light_state, scales=False),
+    Case("Payload.finalize",        _finalize,         scales=False),
+    Case("Concrete.payload_for",    _payload_for,      scales=False),
+    Case("Responder.structure",     _structure),
+    Case("Snapshots.respond",       _snapshot_read),
+    Case("Snapshots.update",        _snapshot_update),
+    Case("encode.json",             _encode(Encoding.Json)),
+    Case("encode.msgpack",          _encode(Encoding.MsgPack)),
+    Case("encode.cbor",             _encode(Encoding.Cbor)),
+]
+
+
+def measure(func: Callable[[], object], repeat: int = 5) -> float:
+    "Returns the best time per call in seconds."
+    timer = timeit.Timer(func)
+    (number, _) = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(sizes: List[int], cases: List[Case], repeat: int = 5) -> Dict[str, float]:
+    "Runs the cases over homes of the given sizes.  Returns the seconds per call by case key."
+    results: Dict[str, float] = {}
+    smallest = min(sizes)
+    for size in sorted(sizes):
+        home = synthetic.home(size)
+        for case in cases:
+            if not case.scales and size != smallest:
+                continue
+            key = f"{case.name}@{size}" if case.scales else case.name
+            results[key] = measure(case.setup(home), repeat)
+            print(f"{key:<32} {results[key] * 1e6:12.2f} µs", flush=True)
+    return results
+
+
+class Regression(NamedTuple):
+    "A case that got slower than allowed compared to the baseline."
+    key:      str
+    baseline: float
+    current:  float
+
+    @property
+    def ratio(self) -> float:
+        "The current time relative to the baseline."
+        return self.current / self.baseline
+
+    def __str__(self):
+        (before, after) = (self.baseline * 1e6, self.current * 1e6)
+        return f"{self.key}: {before:.2f} µs → {after:.2f} µs ({self.ratio:.2f}x)"
+
+
+def compare(
+    baseline: Dict[str, float],
+    current: Dict[str, float],
+    threshold: float,
+) -> List[Regression]:
+    "Returns the cases present in both runs that are slower than the baseline beyond the threshold."
+    return [
+        Regression(key, baseline[key], current[key])
+        for key in sorted(current)
+        if key in baseline and current[key] > baseline[key] * (1 + threshold)
+    ]
+
+
+def save(path: str, results: Dict[str, float]):
+    "Stores the results as a JSON baseline."
+    doc = {
+        "created":  datetime.now().isoformat(timespec="seconds"),
+        "python":   platform.python_version(),
+        "machine":  platform.platform(),
+        "results":  results,
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(doc, file, indent=2, sort_keys=True)
+
+
+def load(path: str) -> Dict[str, float]:
+    "Reads the results of a JSON baseline."
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)["results"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    "Runs the suite from the command line.  Returns 1 if a regression was found."
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=SIZES,
+        help="Numbers of lights per home."
+    )
+    parser.add_argument("--only", nargs="+", default=None, help="Names of the cases to run.")
+    parser.add_argument(
+        "--repeat", type=int, default=5,
+        help="Repetitions per case; the best one counts."
+    )
+    parser.add_argument("--save", metavar="PATH", help="Store the results as baseline.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare the results against a baseline.")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="Relative slowdown that counts as regression."
+    )
+    args = parser.parse_args(argv)
+    common.load_config()  # Logging costs as much as in production.
+    cases = [case for case in CASES if args.only is None or case.name in args.only]
+    results = run(args.sizes, cases, args.repeat)
+    if args.save:
+        save(args.save, results)
+    if args.compare:
+        regressions = compare(load(args.compare), results, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
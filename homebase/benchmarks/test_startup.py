@@ -0,0 +1,37 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from benchmarks import startup
+
+OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _json
+import time:       300 |        420 |   json.decoder
+import time:       250 |        670 | json
+import time:        40 |         40 | common
+"""
+
+
+class TestStartup(unittest.TestCase):
+    "Testing the report of import times."
+
+    def test_parses_importtime(self):
+        "Checks that modules, their nesting, and their times are read from the output."
+        entries = startup.parse(OUTPUT)
+        self.assertEqual(
+            [(entry.module, entry.depth) for entry in entries],
+            [("_json", 2), ("json.decoder", 1), ("json", 0), ("common", 0)]
+        )
+        self.assertEqual(entries[2].cumulative, 670)
+
+    def test_heavy_dependencies_load_lazily(self):
+        "Checks that starting the home base does not import any heavy dependency."
+        report = startup.measure()
+        self.assertEqual(report.heavy, [])
+        self.assertIn("api.api", report.text())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from benchmarks import suite
+
+
+class TestCompare(unittest.TestCase):
+    "Testing the benchmark cases and the comparison against a baseline."
+
+    def test_flags_slowdown_beyond_threshold(self):
+        "Checks that only cases slower than the threshold and present in both runs are flagged."
+        baseline = { "a": 1.0, "b": 1.0, "c": 1.0 }
+        current  = { "a": 1.1, "b": 1.5, "d": 9.0 }
+        regressions = suite.compare(baseline, current, threshold=0.2)
+        self.assertEqual([r.key for r in regressions], ["b"])
+        self.assertAlmostEqual(regressions[0].ratio, 1.5)
+
+    def test_cases_run(self):
+        "Checks that every case runs and returns a result."
+        home = suite.synthetic.home(10)
+        for case in suite.CASES:
+            self.assertIsNotNone(case.setup(home)(), case.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
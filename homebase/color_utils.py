@@ -1,7 +1,29 @@
 "A collection of useful color-related functions."
 
 from math import isclose
-from colormath.color_objects import HSVColor as Color
+
+
+class HSVColor:
+    """
+        A color in hue, saturation, and value.
+        Mirrors the interface of colormath's HSVColor the home base uses, without its import cost.
+    """
+
+    __slots__ = ("hsv_h", "hsv_s", "hsv_v")
+
+    def __init__(self, hsv_h: float, hsv_s: float, hsv_v: float):
+        self.hsv_h = float(hsv_h)
+        self.hsv_s = float(hsv_s)
+        self.hsv_v = float(hsv_v)
+
+    def __str__(self):
+        return f"HSVColor (hsv_h:{self.hsv_h:.4f} hsv_s:{self.hsv_s:.4f} hsv_v:{self.hsv_v:.4f})"
+
+    def __repr__(self):
+        return f"HSVColor(hsv_h={self.hsv_h!r},hsv_s={self.hsv_s!r},hsv_v={self.hsv_v!r})"
+
+
+Color = HSVColor
 
 def equal(this: Color, that: Color) -> bool:
     "Compares two colors."
@@ -0,0 +1,61 @@
+"Coalesces the publishes of a batch of commands into one message per topic."
+
+import json
+import threading
+from typing import Dict, Optional, Union
+
+from common import Log
+from paho.mqtt import client as mqtt
+
+
+Message = Optional[Union[str, bytes]]
+
+
+def merge(first: Message, second: Message) -> Message:
+    "Merges two json objects, the second one taking precedence.  Otherwise returns the second."
+    try:
+        old = json.loads(first) if first else None
+        new = json.loads(second) if second else None
+    except ValueError:
+        return second
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return second
+    return json.dumps({ **old, **new })
+
+
+class CoalescingClient:
+    """
+        Wraps a client; while a batch is open, publishes issued on the thread that opened it are
+        buffered and merged per topic, and sent when the batch closes.
+        Publishes from other threads, e.g. software fades, pass through immediately.
+    """
+
+    def __init__(self, client: mqtt.Client):
+        self.client = client
+        self.__owner: Optional[int] = None
+        self.__buffer: Dict[str, Message] = { }
+
+    def open_batch(self):
+        "Starts buffering publishes of the calling thread."
+        assert self.__owner is None
+        self.__owner = threading.get_ident()
+
+    def close_batch(self) -> int:
+        "Sends the buffered publishes in order of their first occurrence.  Returns their number."
+        (buffer, self.__buffer, self.__owner) = (self.__buffer, { }, None)
+        Log.api.debug("Sending %d coalesced publishes.", len(buffer))
+        for (topic, payload) in buffer.items():
+            self.client.publish(topic, payload)
+        return len(buffer)
+
+    def publish(self, topic, payload=None, *args, **kwargs):
+        "Publishes the payload, or buffers it while the calling thread has a batch open."
+        if self.__owner != threading.get_ident():
+            return self.client.publish(topic, payload, *args, **kwargs)
+        if topic in self.__buffer:
+            payload = merge(self.__buffer[topic], payload)
+        self.__buffer[topic] = payload
+        return None
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
@@ -0,0 +1,119 @@
+"Zigbee bridges and the pool of MQTT connections to reach them."
+
+import threading
+import traceback
+from typing import Callable, Dict, List, Optional
+
+import common
+from comm.topic import Topic
+from common import Log
+from paho.mqtt import client as mqtt
+
+
+class Bridge:
+    "A zigbee coordinator publishing its devices under its own base topic on some broker."
+
+    DEFAULT = "default"
+    HOST = "127.0.0.1"
+    PORT = 1883
+
+    def __init__(self, name: str, base: str, host: str, port: int):
+        self.name = name
+        self.base = base
+        self.host = host
+        self.port = port
+
+    @staticmethod
+    def default() -> 'Bridge':
+        "Returns the bridge on the configured mosquitto server using the default base topic."
+        mosquitto = common.config.get("mosquitto", {})
+        return Bridge(
+            name=Bridge.DEFAULT,
+            base=Topic.BASE,
+            host=mosquitto.get("ip", Bridge.HOST),
+            port=int(mosquitto.get("port", Bridge.PORT)),
+        )
+
+    def __str__(self):
+        return f"{self.name} ({self.base} on {self.host}:{self.port})"
+
+
+class ConnectionPool:
+    """
+        Holds one MQTT connection per bridge and routes publishes and subscriptions by base topic,
+        so no coordinator sees the traffic of another one.
+        Topics with an unknown base go to the first bridge.
+        Mimics the parts of the paho client the home base uses.
+    """
+
+    LOOP_CHECK = 1.0  # Seconds between checks whether the network loops still run.
+
+    def __init__(self, bridges: List[Bridge], connect: Callable[[Bridge], mqtt.Client]):
+        assert len(bridges) > 0
+        self.bridges = bridges
+        self.__clients: Dict[str, mqtt.Client] = { }
+        for bridge in bridges:
+            Log.ctl.info("Connecting to bridge %s.", bridge)
+            self.__clients[bridge.base] = connect(bridge)
+        self.__fallback = self.__clients[bridges[0].base]
+        self.__loops: Dict[str, threading.Thread] = { }
+        self.__ended = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self.__clients)
+
+    def client_for(self, topic: str) -> mqtt.Client:
+        "Returns the connection to the bridge the topic belongs to."
+        base = topic.split(Topic.SEP, 1)[0]
+        return self.__clients.get(base, self.__fallback)
+
+    def publish(self, topic, payload=None, qos=0, retain=False, properties=None):
+        "Publishes on the connection of the topic's bridge."
+        return self.client_for(topic).publish(topic, payload, qos, retain, properties)
+
+    def subscribe(self, topic, qos=0):
+        "Subscribes on the connection of the topic's bridge."
+        return self.client_for(topic).subscribe(topic, qos)
+
+    def unsubscribe(self, topic):
+        "Unsubscribes on the connection of the topic's bridge."
+        return self.client_for(topic).unsubscribe(topic)
+
+    def loop_forever(self):
+        """
+            Runs the network loop of every connection on a thread of its own, restarting those that
+            ended before.  Returns once any of them ends, e.g. by an exception in a callback.
+        """
+        for (base, client) in self.__clients.items():
+            loop = self.__loops.get(base)
+            if loop is None or not loop.is_alive():
+                loop = threading.Thread(
+                    target=self.__loop,
+                    args=(base, client),
+                    name=f"MQTT {base}",
+                    daemon=True,
+                )
+                self.__loops[base] = loop
+                loop.start()
+        while all(loop.is_alive() for loop in self.__loops.values()):
+            self.__ended.wait(ConnectionPool.LOOP_CHECK)
+            self.__ended.clear()
+
+    def __loop(self, base: str, client: mqtt.Client):
+        try:
+            client.loop_forever(retry_first_connection=True)
+            Log.ctl.error("Network loop of bridge %s ended.", base)
+        except Exception:  # pylint: disable=broad-except
+            Log.ctl.error("Network loop of bridge %s failed: %s", base, traceback.format_exc())
+        finally:
+            self.__ended.set()
+
+    @property
+    def on_message(self) -> Optional[Callable]:
+        "The message callback shared by all connections."
+        return self.__fallback.on_message
+
+    @on_message.setter
+    def on_message(self, callback: Optional[Callable]):
+        for client in self.__clients.values():
+            client.on_message = callback
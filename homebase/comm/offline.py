@@ -0,0 +1,54 @@
+"Holds publishes issued while the connection to a broker is down."
+
+from collections import OrderedDict
+from typing import List, NamedTuple
+
+from comm.batch import Message, merge
+from common import Log
+
+
+class Pending(NamedTuple):
+    "A publish waiting for the connection to come back."
+    topic:   str
+    payload: Message
+    qos:     int = 0
+    retain:  bool = False
+
+
+class OfflineBuffer:
+    """
+        Keeps one pending payload per topic, i.e. per device, merging later publishes into it.
+        Bounded by the number of topics; once full, the topic pending the longest is dropped.
+    """
+
+    MAX_TOPICS = 1 << 10
+
+    def __init__(self, max_topics: int = MAX_TOPICS):
+        self.max_topics = max_topics
+        self.__pending: 'OrderedDict[str, Pending]' = OrderedDict()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.__pending)
+
+    def put(self, topic: str, payload: Message, qos: int = 0, retain: bool = False):
+        """
+            Buffers the payload, merging it into one pending for the same topic.
+            A merged publish gets the higher qos and the retain flag of the later one.
+        """
+        known = self.__pending.get(topic)
+        if known is not None:
+            merged = merge(known.payload, payload)
+            self.__pending[topic] = Pending(topic, merged, max(qos, known.qos), retain)
+            return
+        if len(self.__pending) >= self.max_topics:
+            (oldest, _) = self.__pending.popitem(last=False)
+            self.dropped += 1
+            Log.ctl.warning("Offline buffer full, dropping publish to %s.", oldest)
+        self.__pending[topic] = Pending(topic, payload, qos, retain)
+
+    def drain(self) -> List[Pending]:
+        "Removes and returns all pending publishes in the order their topics were first buffered."
+        res = list(self.__pending.values())
+        self.__pending.clear()
+        return res
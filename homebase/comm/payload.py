@@ -3,10 +3,10 @@
 import json
 from typing import Dict, Optional
 
-from colormath.color_objects import HSVColor
+from color_utils import HSVColor
 from enums import SensorQuantity, Vendor
 
-__DEFAULT_TRANS = 2
+DEFAULT_TRANSITION = 2
 DEFAULT_DIMMING_SPEED = 40
 
 
@@ -51,7 +51,7 @@ class Payload:
 
     def with_transition(self, time: Optional[float] = None) -> 'Payload':
         "Adds a transition component to the payload."
-        self.body["transition"] = time or __DEFAULT_TRANS
+        self.body["transition"] = time or DEFAULT_TRANSITION
         return self
 
     def finalize(self) -> str:
@@ -80,6 +80,20 @@ class Payload:
         "Stops gradually changing the brightness."
         return Payload.__brightness_move(0)
 
+    @staticmethod
+    def scene_store(ident: int, name: str) -> str:
+        "Returns a payload letting devices store their current state as scene."
+        res = Payload()
+        res.body["scene_store"] = { "ID": ident, "name": name }
+        return res.finalize()
+
+    @staticmethod
+    def scene_recall(ident: int) -> str:
+        "Returns a payload letting devices recall a stored scene."
+        res = Payload()
+        res.body["scene_recall"] = ident
+        return res.finalize()
+
     @staticmethod
     def rename(old: str, new: str) -> str:
         "Returns a payload to rename a device."
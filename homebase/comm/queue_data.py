@@ -1,6 +1,7 @@
 "Data to be put into the queue."
 
-from typing import Dict, Optional
+from queue import Queue
+from typing import Dict, List, Optional
 
 from comm.topic import Topic
 from enums import ApiCommand, ApiQuery, QDataKind
@@ -14,12 +15,17 @@ class QData:
         topic:    Optional[Topic]      = None,
         command:  Optional[ApiCommand] = None,
         query:    Optional[ApiQuery]   = None,
+        batch:    Optional[List['QData']] = None,
+        reply:    Optional[Queue]      = None,
     ):
         self.kind:     QDataKind            = kind
         self.topic:    Optional[Topic]      = topic
         self.command:  Optional[ApiCommand] = command
         self.query:    Optional[ApiQuery]   = query
         self.payload:  Dict[str, str]       = payload
+        self.batch:    Optional[List[QData]] = batch
+        # Where the response goes, if not to the shared queue.
+        self.reply:    Optional[Queue]      = reply
 
     @staticmethod
     def refresh() -> 'QData':
@@ -37,11 +43,22 @@ class QData:
         )
 
     @staticmethod
-    def api_query(topic: Topic, query: ApiQuery) -> 'QData':
+    def api_query(topic: Topic, query: ApiQuery, reply: Optional[Queue] = None) -> 'QData':
         "Creates an API query."
         return QData(
             kind=QDataKind.ApiQuery,
             topic=topic,
             query=query,
-            payload={}
+            payload={},
+            reply=reply,
+        )
+
+    @staticmethod
+    def api_batch(commands: List['QData'], reply: Queue) -> 'QData':
+        "Creates a batch of API commands, executed at once.  Their statuses are put into reply."
+        return QData(
+            kind=QDataKind.ApiBatch,
+            payload={},
+            batch=commands,
+            reply=reply,
         )
@@ -0,0 +1,66 @@
+"Keeps addressing devices under their configured topics after they were renamed on their bridge."
+
+from typing import Dict
+
+from common import Log
+from paho.mqtt import client as mqtt
+
+
+class RenamingClient:
+    """
+        Wraps a client; publishes and subscriptions to the topic of a renamed device, or one of its
+        command topics, go to the topic the device actually uses on its bridge.
+        Received topics are translated back with `configured`.
+    """
+
+    def __init__(self, client: mqtt.Client):
+        self.client = client
+        self.__physical: Dict[str, str] = { }    # Configured topic to the one used on the bridge.
+        self.__configured: Dict[str, str] = { }  # The reverse.
+
+    def point(self, configured: str, physical: str):
+        "Addresses the device with the configured topic under the physical one from now on."
+        self.unpoint(configured)
+        if configured == physical:
+            return
+        Log.ctl.info("Addressing %s as %s.", configured, physical)
+        self.__physical[configured] = physical
+        self.__configured[physical] = configured
+
+    def unpoint(self, configured: str):
+        "Addresses the device with the configured topic under that topic again."
+        physical = self.__physical.pop(configured, None)
+        if physical is not None:
+            del self.__configured[physical]
+
+    def physical(self, topic: str) -> str:
+        "Returns the topic to use on the bridge for the given configured topic."
+        return RenamingClient.__translate(self.__physical, topic)
+
+    def configured(self, topic: str) -> str:
+        "Returns the configured topic for a topic received from the bridge."
+        return RenamingClient.__translate(self.__configured, topic)
+
+    @staticmethod
+    def __translate(mapping: Dict[str, str], topic: str) -> str:
+        if not mapping:
+            return topic
+        if topic in mapping:
+            return mapping[topic]
+        (device, sep, command) = topic.rpartition("/")
+        return mapping[device] + sep + command if device in mapping else topic
+
+    def publish(self, topic, payload=None, *args, **kwargs):
+        "Publishes to the physical topic."
+        return self.client.publish(self.physical(topic), payload, *args, **kwargs)
+
+    def subscribe(self, topic, *args, **kwargs):
+        "Subscribes to the physical topic."
+        return self.client.subscribe(self.physical(topic), *args, **kwargs)
+
+    def unsubscribe(self, topic, *args, **kwargs):
+        "Unsubscribes from the physical topic."
+        return self.client.unsubscribe(self.physical(topic), *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
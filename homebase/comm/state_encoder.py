@@ -0,0 +1,93 @@
+"Encoders turning light states into set payloads, specialized per device model."
+
+import json
+from typing import Dict, Optional, Tuple
+
+from comm.payload import DEFAULT_TRANSITION, Bright
+from enums import DeviceModel
+
+# On/off, brightness, hue, saturation, and transition as they appear in the payload.
+Key = Tuple[bool, int, int, int, Optional[float]]
+
+
+class StateEncoder:
+    """
+        Encodes states for one device model through a payload template fixed when the model is
+        loaded.  States are quantized to the units the payload carries anyway, so encoded payloads
+        can be cached without changing what is sent.
+        Produces the same payloads as building them through `Payload`.
+    """
+
+    MAX_CACHE = 1 << 12
+
+    __encoders: Dict[DeviceModel, 'StateEncoder'] = { }
+
+    def __init__(self, model: DeviceModel):
+        self.model = model
+        self.dimmable = model.is_dimmable
+        self.color = model.is_color
+        self.transition = model.supports_transition
+        template = '{"state": "%s"'
+        if self.dimmable:
+            template += ', "brightness": %d'
+        if self.color:
+            template += ', "color": {"hue": %d, "saturation": %d}'
+        self.__template = template
+        self.__cache: Dict[Key, bytes] = { }
+
+    @staticmethod
+    def for_model(model: DeviceModel) -> 'StateEncoder':
+        "Returns the encoder of the model, building it on first use."
+        encoder = StateEncoder.__encoders.get(model)
+        if encoder is None:
+            encoder = StateEncoder(model)
+            StateEncoder.__encoders[model] = encoder
+        return encoder
+
+    def key(
+        self,
+        toggled_on: bool,
+        hue: float,
+        saturation: float,
+        value: float,
+        transition: Optional[float],
+    ) -> Key:
+        "Quantizes the state into the values present in its payload."
+        bright = Bright.scaled(value) if self.dimmable and toggled_on else 0
+        if self.color:
+            (hue_deg, sat_pct) = (int(hue * 360), int(saturation * 100))
+        else:
+            (hue_deg, sat_pct) = (0, 0)
+        if transition is not None:
+            transition = (transition or DEFAULT_TRANSITION) if self.transition else None
+        return (toggled_on, bright, hue_deg, sat_pct, transition)
+
+    def encode(
+        self,
+        toggled_on: bool,
+        hue: float,
+        saturation: float,
+        value: float,
+        transition: Optional[float] = None,
+    ) -> bytes:
+        "Returns the payload realizing the state."
+        key = self.key(toggled_on, hue, saturation, value, transition)
+        res = self.__cache.get(key)
+        if res is None:
+            res = self.__render(key)
+            if len(self.__cache) >= StateEncoder.MAX_CACHE:
+                self.__cache.clear()
+            self.__cache[key] = res
+        return res
+
+    def __render(self, key: Key) -> bytes:
+        (toggled_on, bright, hue, sat, transition) = key
+        args: tuple = ("ON" if toggled_on else "OFF",)
+        if self.dimmable:
+            args += (bright,)
+        if self.color:
+            args += (hue, sat)
+        res = self.__template % args
+        if transition is not None:
+            res += f', "transition": {json.dumps(transition)}'
+        return (res + "}").encode("utf-8")
@@ -0,0 +1,57 @@
+import json
+import os
+import sys
+import threading
+import unittest
+
+sys.path.append(os.getcwd())
+
+from comm.batch import CoalescingClient
+
+
+class RecordingClient:
+    "Records publishes instead of sending them."
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, payload=None):
+        self.published.append((topic, payload))
+
+
+class TestCoalescing(unittest.TestCase):
+    "Testing that batches send one merged publish per topic."
+
+    def setUp(self):
+        self.inner = RecordingClient()
+        self.client = CoalescingClient(self.inner)  # type: ignore
+
+    def test_passes_through_without_batch(self):
+        "Checks that publishes are sent at once while no batch is open."
+        self.client.publish("a/set", "{}")
+        self.assertEqual(self.inner.published, [("a/set", "{}")])
+
+    def test_merges_per_topic(self):
+        "Checks that a batch sends one merged publish per topic, in order of first occurrence."
+        self.client.open_batch()
+        self.client.publish("a/set", json.dumps({ "state": "ON", "brightness": 10 }))
+        self.client.publish("b/get", json.dumps({ "state": "" }))
+        self.client.publish("a/set", json.dumps({ "brightness": 200 }))
+        self.assertEqual(self.inner.published, [])
+        self.assertEqual(self.client.close_batch(), 2)
+        self.assertEqual([t for (t, _) in self.inner.published], ["a/set", "b/get"])
+        self.assertEqual(json.loads(self.inner.published[0][1]),
+                         { "state": "ON", "brightness": 200 })
+
+    def test_other_threads_are_not_buffered(self):
+        "Checks that publishes of other threads bypass an open batch."
+        self.client.open_batch()
+        other = threading.Thread(target=lambda: self.client.publish("fade/set", "{}"))
+        other.start()
+        other.join()
+        self.assertEqual(self.inner.published, [("fade/set", "{}")])
+        self.client.close_batch()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from comm import Topic
+from comm.bridge import ConnectionPool
+from home import decoder
+from simulation import synthetic
+
+
+class RecordingClient:
+    "Records publishes and subscriptions instead of sending them."
+
+    def __init__(self):
+        self.published = []
+        self.subscribed = []
+        self.on_message = None
+
+    def publish(self, topic, payload=None, _qos=0, _retain=False, _properties=None):
+        self.published.append((topic, payload))
+
+    def subscribe(self, topic, _qos=0):
+        self.subscribed.append(topic)
+
+
+class TestBridges(unittest.TestCase):
+    "Testing the assignment of devices to bridges and routing publishes."
+
+    def setUp(self):
+        spec = synthetic.home_spec(lights=20)
+        spec["bridges"] = [
+            { "name": "upstairs", "base": "z2m_up" },
+            { "name": "downstairs", "base": "z2m_down", "port": 1884 },
+        ]
+        spec["rooms"][1]["bridge"] = "downstairs"
+        spec["rooms"][0]["lights"]["singles"][0]["bridge"] = "downstairs"
+        self.home = decoder.decode(spec)
+        self.clients = { }
+        def connect(bridge):
+            self.clients[bridge.name] = RecordingClient()
+            return self.clients[bridge.name]
+        self.pool = ConnectionPool(self.home.bridges, connect)
+
+    def test_devices_use_base_of_their_bridge(self):
+        "Checks that devices, groups, and rooms use the base topic of their bridge."
+        (first, second) = self.home.rooms
+        self.assertEqual(first.group.single_lights[0].topic.base, "z2m_down")
+        self.assertEqual(first.group.single_lights[1].topic.base, "z2m_up")
+        self.assertEqual(first.remotes[0].topic.base, "z2m_up")
+        self.assertEqual(second.group.topic.base, "z2m_down")
+        self.assertTrue(all(l.topic.base == "z2m_down" for l in second.flatten_lights()))
+        self.assertEqual(self.home.bridges[1].port, 1884)
+
+    def test_topics_round_trip(self):
+        "Checks that topics with the base of any bridge can be parsed."
+        for light in self.home.flatten_lights():
+            self.assertEqual(Topic.from_str(light.topic.string), light.topic)
+
+    def test_publishes_are_routed_by_base(self):
+        "Checks that publishes go to the bridge of their base, unknown bases to the first one."
+        for light in self.home.flatten_lights():
+            self.pool.publish(light.set_topic(), "{}")
+        self.pool.publish("unknown/Device/Light/Room/Lamp/set", "{}")
+        up = [t for (t, _) in self.clients["upstairs"].published]
+        down = [t for (t, _) in self.clients["downstairs"].published]
+        self.assertEqual(len(up) + len(down), 21)
+        self.assertTrue(all(t.startswith("z2m_down/") for t in down))
+        self.assertEqual(len(down), 11)
+        self.assertIn("unknown/Device/Light/Room/Lamp/set", up)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.append(os.getcwd())
+
+from comm import encoding
+from comm.encoding import Encoding
+
+
+class TestEncoders(unittest.TestCase):
+    "Testing the native encoders against reference encodings."
+
+    def test_cbor(self):
+        "Checks the CBOR encoder against reference encodings."
+        cases = [
+            (0, "00"), (23, "17"), (24, "1818"), (1000, "1903e8"), (-1, "20"), (-1000, "3903e7"),
+            (1.1, "fb3ff199999999999a"), (True, "f5"), (None, "f6"), ("a", "6161"),
+            ([1, 2, 3], "83010203"), ({ "a": 1, "b": [2, 3] }, "a26161016162820203"),
+        ]
+        for (val, expected) in cases:
+            out = bytearray()
+            encoding._cbor(val, out)  # pylint: disable=protected-access
+            self.assertEqual(out.hex(), expected, val)
+
+    def test_msgpack(self):
+        "Checks the MessagePack encoder against reference encodings."
+        cases = [
+            (1, "01"), (-1, "ff"), (200, "ccc8"), (-33, "d0df"), (70000, "ce00011170"),
+            (1.5, "cb3ff8000000000000"), (False, "c2"), (None, "c0"), ("a", "a161"),
+            ("x" * 40, "d928" + "78" * 40), ([1, 2], "920102"), ({ "a": 1 }, "81a16101"),
+        ]
+        for (val, expected) in cases:
+            out = bytearray()
+            encoding._msgpack(val, out)  # pylint: disable=protected-access
+            self.assertEqual(out.hex(), expected, val)
+
+
+class TestNegotiation(unittest.TestCase):
+    "Testing the choice of encoding based on the Accept header."
+
+    def test_defaults_to_json(self):
+        "Checks that JSON is used unless another encoding is accepted."
+        self.assertEqual(Encoding.negotiate(None), Encoding.Json)
+        self.assertEqual(Encoding.negotiate("*/*"), Encoding.Json)
+        self.assertEqual(Encoding.negotiate("text/html"), Encoding.Json)
+
+    def test_binary_needs_package(self):
+        "Checks that binary encodings are only offered with their package installed."
+        accept = "application/cbor, application/msgpack"
+        with mock.patch.object(encoding, "msgpack", None):
+            with mock.patch.object(encoding, "cbor2", None):
+                self.assertEqual(Encoding.negotiate(accept), Encoding.Json)
+
+    @mock.patch.object(encoding, "msgpack", mock.Mock())
+    @mock.patch.object(encoding, "cbor2", mock.Mock())
+    def test_prefers_quality_then_order(self):
+        "Checks that the accepted encoding with the highest quality, then the first one, wins."
+        self.assertEqual(Encoding.negotiate("application/cbor, application/msgpack"), Encoding.Cbor)
+        self.assertEqual(
+            Encoding.negotiate("application/json;q=0.5, application/x-msgpack;q=0.9"),
+            Encoding.MsgPack
+        )
+        accept = "application/cbor;q=0, application/json"
+        self.assertEqual(Encoding.negotiate(accept), Encoding.Json)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from comm.offline import OfflineBuffer
+
+
+class TestOfflineBuffer(unittest.TestCase):
+    "Testing buffering publishes while offline."
+
+    def test_collapses_per_topic(self):
+        "Checks that publishes to the same topic are merged, keeping the order of first occurrence."
+        buffer = OfflineBuffer()
+        buffer.put("a/set", '{"state": "ON", "brightness": 10}')
+        buffer.put("b/set", '{"state": "OFF"}')
+        buffer.put("a/set", '{"brightness": 200}')
+        pending = buffer.drain()
+        self.assertEqual([entry.topic for entry in pending], ["a/set", "b/set"])
+        self.assertEqual(json.loads(pending[0].payload), { "state": "ON", "brightness": 200 })
+        self.assertEqual(len(buffer), 0)
+
+    def test_drops_oldest_when_full(self):
+        "Checks that the topic pending the longest is dropped once the buffer is full."
+        buffer = OfflineBuffer(max_topics=2)
+        for topic in ["a", "b", "c"]:
+            buffer.put(topic, "{}")
+        self.assertEqual([entry.topic for entry in buffer.drain()], ["b", "c"])
+        self.assertEqual(buffer.dropped, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
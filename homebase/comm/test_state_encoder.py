@@ -0,0 +1,52 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from colormath.color_objects import HSVColor
+from comm import Payload
+from comm.state_encoder import StateEncoder
+from enums import DeviceModel
+
+
+def _reference(model: DeviceModel, toggled_on: bool, color: HSVColor, transition) -> str:
+    "Builds the payload step by step, like lights used to."
+    payload = Payload().state(toggled_on)
+    if model.is_dimmable:
+        payload = payload.brightness(int(toggled_on) * color.hsv_v)
+    if model.is_color:
+        payload = payload.color(color, model.vendor)
+    if transition is not None and model.supports_transition:
+        payload = payload.with_transition(transition)
+    return payload.finalize()
+
+
+class TestStateEncoder(unittest.TestCase):
+    "Testing the per-model payload templates."
+
+    def test_matches_payload_builder(self):
+        "Checks that the templates produce the payloads the builder produces."
+        rand = random.Random(7)
+        for model in [DeviceModel.HueColor, DeviceModel.IkeaDimmable, DeviceModel.IkeaOutlet]:
+            encoder = StateEncoder.for_model(model)
+            for _ in range(200):
+                color = HSVColor(rand.random(), rand.random(), rand.random())
+                toggled_on = rand.random() < 0.8
+                transition = rand.choice([None, 0, 0.5, 30.0])
+                expected = _reference(model, toggled_on, color, transition)
+                (hue, sat, val) = (color.hsv_h, color.hsv_s, color.hsv_v)
+                actual = encoder.encode(toggled_on, hue, sat, val, transition)
+                self.assertEqual(actual.decode("utf-8"), expected, model)
+
+    def test_caches_quantized_states(self):
+        "Checks that states within one quantization step share their payload."
+        encoder = StateEncoder.for_model(DeviceModel.IkeaDimmable)
+        first = encoder.encode(True, 0.1, 0.2, 0.5)
+        self.assertIs(encoder.encode(True, 0.7, 0.9, 0.5001), first)
+        self.assertIs(StateEncoder.for_model(DeviceModel.IkeaDimmable), encoder)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 "Anything related to zigbee topics."
 
-from typing import List, Optional
+from typing import List, Optional, Set
 
 from enums import DeviceKind, TopicCommand, TopicCategory
 from homebaseerror import HomeBaseError
@@ -12,6 +12,7 @@ class Topic:
     Represents topics in the zigbee protocol.
     """
     BASE = "zigbee2mqtt"
+    BASES: Set[str] = { BASE }  # Base topics of all known bridges.
     SEP = "/"
 
     KEEP_IT_INTERNAL = object()
@@ -23,7 +24,8 @@ class Topic:
         room: Optional[str],
         groups: Optional[List[str]],
         name: Optional[str],
-        key
+        key,
+        base: str = BASE,
     ):
         """
             Base/Category/'home'
@@ -40,22 +42,23 @@ class Topic:
         assert key == Topic.KEEP_IT_INTERNAL
         if category == TopicCategory.Home:
             assert device_kind is None and room is None and groups is None and name is None
-            self._comps = [Topic.BASE, category, 'home']
+            self._comps = [base, category, 'home']
         if category == TopicCategory.Bridge:
             assert device_kind is None and room is None and groups is None and name is None
-            self._comps = [Topic.BASE, category, 'bridge']
+            self._comps = [base, category, 'bridge']
         if category == TopicCategory.Room:
             assert device_kind is None and name is None and groups is None
             assert room is not None
-            self._comps = [Topic.BASE, category, room]
+            self._comps = [base, category, room]
         if category == TopicCategory.Group:
             assert device_kind is None
             assert room is not None and groups is not None and name is not None
-            self._comps = [Topic.BASE, category, room] + groups + [name]
+            self._comps = [base, category, room] + groups + [name]
         if category == TopicCategory.Device:
             assert room is not None and groups is not None
             assert name is not None and device_kind is not None
-            self._comps = [Topic.BASE, category, device_kind, room] + groups + [name]
+            self._comps = [base, category, device_kind, room] + groups + [name]
+        self.base = base
         self.category = category
         self.device_kind = device_kind
         self.room = room
@@ -80,8 +83,12 @@ class Topic:
         "Returns this topic as a get-command."
         return self._join(self._comps + [TopicCommand.GET.value])
 
+    def as_availability(self) -> str:
+        "Returns the topic the bridge reports the availability of this device on."
+        return self._join(self._comps + [TopicCommand.AVAILABILITY.value])
+
     @staticmethod
-    def for_home() -> 'Topic':
+    def for_home(base: str = BASE) -> 'Topic':
         'Creates a topic for refering to the home.'
         return Topic(
             category=TopicCategory.Home,
@@ -90,10 +97,11 @@ class Topic:
             groups=None,
             name=None,
             key=Topic.KEEP_IT_INTERNAL,
+            base=base,
         )
 
     @staticmethod
-    def for_bridge() -> 'Topic':
+    def for_bridge(base: str = BASE) -> 'Topic':
         'Creates a topic for bridge events.'
         return Topic(
             category=TopicCategory.Bridge,
@@ -102,10 +110,11 @@ class Topic:
             groups=None,
             name=None,
             key=Topic.KEEP_IT_INTERNAL,
+            base=base,
         )
 
     @staticmethod
-    def for_room(name: str) -> 'Topic':
+    def for_room(name: str, base: str = BASE) -> 'Topic':
         'Creates a topic for refering to a room.'
         return Topic(
             category=TopicCategory.Room,
@@ -114,10 +123,11 @@ class Topic:
             groups=None,
             name=None,
             key=Topic.KEEP_IT_INTERNAL,
+            base=base,
         )
 
     @staticmethod
-    def for_group(room: str, hierarchie: List[str], name: str) -> 'Topic':
+    def for_group(room: str, hierarchie: List[str], name: str, base: str = BASE) -> 'Topic':
         'Creates a topic for refering to a group.'
         return Topic(
             category=TopicCategory.Group,
@@ -126,6 +136,7 @@ class Topic:
             groups=hierarchie,
             name=name,
             key=Topic.KEEP_IT_INTERNAL,
+            base=base,
         )
 
     @staticmethod
@@ -133,7 +144,8 @@ class Topic:
         name: str,
         kind: DeviceKind,
         room: str,
-        groups: List[str]
+        groups: List[str],
+        base: str = BASE,
     ) -> 'Topic':
         'Creates a topic for refering to a device.'
         return Topic(
@@ -142,9 +154,15 @@ class Topic:
             room=room,
             groups=groups,
             name=name,
-            key=Topic.KEEP_IT_INTERNAL
+            key=Topic.KEEP_IT_INTERNAL,
+            base=base,
         )
 
+    @staticmethod
+    def register_base(base: str):
+        "Registers the base topic of a bridge, so topics with this base can be parsed."
+        Topic.BASES.add(base)
+
     @staticmethod
     def _join(parts: List[str]) -> str:
         return "/".join(parts)
@@ -162,7 +180,7 @@ class Topic:
     def from_str(string: str) -> 'Topic':
         "Creates a topic from a string.  Asserts proper format. May not be a command."
         split = string.split(Topic.SEP)
-        if len(split) < 3 or split[0] != Topic.BASE:
+        if len(split) < 3 or split[0] not in Topic.BASES:
             Log.tpc.error("Topic %s misses base or has less than 3 components.", string)
             raise HomeBaseError.TopicParseError
         cat = TopicCategory.from_str(split[1])
@@ -173,18 +191,18 @@ class Topic:
             if split[2] != 'home' or len(split) != 3:
                 Log.tpc.error("Topic with Category Home targets invalid name %s", split[2:])
                 raise HomeBaseError.TopicParseError
-            return Topic.for_home()
+            return Topic.for_home(base=split[0])
         if cat is TopicCategory.Bridge:
             if split[2] != 'bridge' or len(split) != 3:
                 Log.tpc.error("Topic with Category Bridge targets invalid name %s", split[2:])
                 raise HomeBaseError.TopicParseError
-            return Topic.for_bridge()
+            return Topic.for_bridge(base=split[0])
         if cat is TopicCategory.Room:
             if len(split) != 3:
                 Log.tpc.error("Topic with Category Room has superfluous components %s", split[3:])
                 raise HomeBaseError.TopicParseError
             name = split[2]
-            return Topic.for_room(split[2])
+            return Topic.for_room(split[2], base=split[0])
         if cat is TopicCategory.Group:
             if len(split) < 4:
                 Log.tpc.error("Topic with Category Group has to few components %s", split)
@@ -192,7 +210,7 @@ class Topic:
             room = split[2]
             groups = split[3:-1]
             name = split[-1]
-            return Topic.for_group(room, groups, name)
+            return Topic.for_group(room, groups, name, base=split[0])
         if cat is TopicCategory.Device:
             if len(split) < 5:
                 Log.tpc.error("Topic with Category Device has to few components %s", split)
@@ -204,6 +222,6 @@ class Topic:
             room = split[3]
             groups = split[4:-1]
             name = split[-1]
-            return Topic.for_device(name, kind, room, groups)
+            return Topic.for_device(name, kind, room, groups, base=split[0])
         Log.tpc.error("Invalid Topic %s", split)
         raise HomeBaseError.TopicParseError
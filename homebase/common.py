@@ -3,8 +3,7 @@
 import os
 import platform
 import logging
-
-import yaml
+from typing import Dict
 
 
 def bounded(value: float, bounds: range = range(-1, +1)) -> float:
@@ -53,13 +52,8 @@ else:
 
 base_path = os.path.dirname(os.path.realpath(__file__))
 cfg_path = os.path.join(base_path, '..', 'config', 'config.yml')
-config = {}
-with open(cfg_path, "r", encoding="utf-8") as stream:
-    try:
-        config = yaml.safe_load(stream)
-    except yaml.YAMLError as exc:
-        print("Failed to load config file config.yml.")
-        raise exc
+# Filled by load_config; empty until then, so importing modules has no side effects.
+config: Dict = {}
 
 class Log:
     "Collection of viable logs"
@@ -77,24 +71,32 @@ Log.ctl.setLevel(logging.INFO)
 Log.utl.setLevel(logging.DEBUG)
 logging.getLogger().setLevel(logging.ERROR)  # color uses this logger :roll_eyes:
 
-log_dir = config["log"]["dir"]
-
-if not os.path.exists(log_dir):
-    os.mkdir(log_dir)
-
-log_fmt = config["log"]["format"]
-
-logging.basicConfig(
-    filename=os.path.join(log_dir, 'mylogs.log'),
-    format=log_fmt,
-    datefmt='%d/%H:%M:%S'
-)
+def load_config(path: str = cfg_path) -> Dict:
+    """
+        Reads the configuration into config and sets up logging accordingly.
+        Call once at startup, before reading config.
+    """
+    config.clear()
+    config.update(_read_yaml(path))
+    log_dir = config["log"]["dir"]
+    if not os.path.exists(log_dir):
+        os.mkdir(log_dir)
+    logging.basicConfig(
+        filename=os.path.join(log_dir, 'mylogs.log'),
+        format=config["log"]["format"],
+        datefmt='%d/%H:%M:%S'
+    )
+    return config
 
 def read_home(home_path: str):
     "Reads the home configuration from the given path. Does not cache results."
-    with open(home_path, "r", encoding="utf-8") as home_stream:
+    return _read_yaml(home_path)
+
+def _read_yaml(path: str):
+    import yaml  # pylint: disable=import-outside-toplevel
+    with open(path, "r", encoding="utf-8") as stream:
         try:
-            return yaml.safe_load(home_stream)
-        except yaml.YAMLError as yml_exc:
-            print("Failed to load config file config.yml.")
-            raise yml_exc
+            return yaml.safe_load(stream)
+        except yaml.YAMLError as exc:
+            print(f"Failed to load config file {os.path.basename(path)}.")
+            raise exc
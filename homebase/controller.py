@@ -1,75 +1,163 @@
 "Example for contorling tradfri devices over python."
 
 import json
-import time
+import threading
+import traceback
+from datetime import datetime, timedelta
 from queue import Queue
+from typing import Dict, Optional, Set, Tuple
 
 import common
-from enums import QoS, TopicCategory, ApiCommand, DeviceKind
+from enums import QoS, TopicCommand, ApiCommand, Capability, DeviceKind
 from comm import QData, Topic
+from comm.bridge import Bridge, ConnectionPool
+from comm.offline import OfflineBuffer
+from comm.renames import RenamingClient
+from device import Device
+from discovery import DEVICES, BridgeDevice, Registry
 from home import Home
-from homebaseerror import HomeBaseError
+from journal import Journal
+from lighting import dynamic, perception
 from paho.mqtt import client as mqtt
+from scheduler import Scheduler
 from worker import Worker
 
-config = common.config
-IP   = common.config['mosquitto']['ip']
-PORT = common.config['mosquitto']['port']
+RECONNECT_MIN = 1
+RECONNECT_MAX = 120
 
 
 class PatchedClient(mqtt.Client):
-    "Patches the publish command to also log the request."
-    def publish(self: mqtt.Client, topic, payload=None, qos=0, retain=False, properties=None):
+    """
+        Patches the publish command to also log the request, and to buffer it while offline.
+        Uses a persistent session, so the broker keeps subscriptions and QoS 1 messages for it.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name, clean_session=False)
+        self.offline = OfflineBuffer()
+        self.__lock = threading.Lock()
+        self.__online = False
+
+    def publish(self, topic, payload=None, qos=0, retain=False, properties=None):
+        with self.__lock:
+            if not self.__online:
+                common.Log.ctl.debug("MQTT: Offline, buffering %s to %s.", payload, topic)
+                self.offline.put(topic, payload, qos, retain)
+                return None
         common.Log.ctl.info("MQTT: Sending %s to %s.", payload, topic)
-        super().publish(topic, payload, qos, retain, properties)
+        res = super().publish(topic, payload, qos, retain, properties)
+        if res.rc == mqtt.MQTT_ERR_NO_CONN:
+            with self.__lock:
+                self.offline.put(topic, payload, qos, retain)
+        return res
+
+    def went_online(self):
+        "Sends everything buffered while offline."
+        with self.__lock:
+            self.__online = True
+            pending = self.offline.drain()
+            if pending:
+                common.Log.ctl.info("MQTT: Sending %d publishes buffered while offline.",
+                                    len(pending))
+            for entry in pending:
+                super().publish(entry.topic, entry.payload, entry.qos, entry.retain)
+
+    def went_offline(self):
+        "Starts buffering publishes."
+        with self.__lock:
+            self.__online = False
 
 
 class Controller(Worker):
     "Controls a home"
 
+    AVAILABILITY_SUFFIX = Topic.SEP + TopicCommand.AVAILABILITY.value
+
     # pylint: disable=invalid-name
-    def __init__(self, queue: Queue, home: Home):
-        ip = common.config["mosquitto"]["ip"]
-        port = int(common.config["mosquitto"]["port"])
-        self.client = self.__init_client(ip, port)
-        self.queue  = queue
-        self.home   = home
-        self.client.on_disconnect = Controller.__on_disconnect_wrapper(ip, port)
-        self.client.on_message    = self.__handle_message
+    def __init__(
+        self,
+        queue: Queue,
+        home: Home,
+        client: Optional[mqtt.Client] = None,
+        journal: Optional[Journal] = None,
+    ):
+        """
+            Connects to the brokers of all bridges of the home unless a client is given.
+            Others publish through `client`, so renamed devices are addressed correctly.
+        """
+        if client is None:
+            client = ConnectionPool(home.bridges, self.__connect)
+        client.on_message = self.__handle_message
+        self.client  = RenamingClient(client)
+        self.queue   = queue
+        self.home    = home
+        self.journal = journal
+        self.registries = { bridge.base: Registry(bridge.base) for bridge in home.bridges }
+        devices = home.flatten_lights() + home.sensors() + home.remotes()
+        self.__configured: Dict[str, Device] = { device.topic.string: device for device in devices }
+        # Devices by base and IEEE address, which survive renames on the bridge.
+        self.__by_ieee: Dict[Tuple[str, str], Device] = {
+            (device.base, device.ident): device for device in devices
+        }
+        self.__lost_devices: Set[str] = set()
         self.__subscribe_to_all()
         self.__query_states()
 
-    @staticmethod
-    def __on_disconnect_wrapper(ip, port):
-        return lambda client, user, rc: Controller.__on_disconnect(ip, port, client, user, rc)
+    def __on_connect(self, bridge: Bridge, client: PatchedClient, flags: dict, rc: int):
+        if rc != mqtt.MQTT_ERR_SUCCESS:
+            common.Log.ctl.error("Connecting to bridge %s failed: %s",
+                                 bridge, mqtt.connack_string(rc))
+            return
+        common.Log.ctl.info("Connected to bridge %s.", bridge)
+        # Subscribes before flushing the buffer, so replies to buffered queries are not missed.
+        if not flags.get("session present"):
+            self.__subscribe_to_all()
+        client.went_online()
 
     @staticmethod
-    def __on_disconnect(ip, port, client: mqtt.Client, _userdata,  _rc):
-        common.Log.ctl.error("Client disconnected.")
-        client.connect(host=ip, port=port, keepalive=360)
+    def __on_disconnect(bridge: Bridge, client: PatchedClient, rc: int):
+        common.Log.ctl.error("Disconnected from bridge %s (%d); reconnecting in the background.",
+                             bridge, rc)
+        client.went_offline()
 
     def _run(self):
-        "Retrieves message from the queue and processes it."
-        self.client.loop_start()
+        """
+            Runs the network loops, which deliver messages on threads of their own.  Returns once
+            one of them ended, so the worker is restarted.
+        """
+        self.client.loop_forever()
 
     def __handle_message(self, _client, _userdata, message: mqtt.MQTTMessage):
         "Handles the reception of a message"
         common.Log.ctl.info("MQTT: Message received from %s.", message.topic)
-        sender = Topic.from_str(message.topic)
+        self.beat()
+        # An exception escaping the callback would end the network loop of the bridge.
+        try:
+            self.__process(message)
+        except Exception:  # pylint: disable=broad-except
+            common.Log.ctl.error(traceback.format_exc())
+
+    def __process(self, message: mqtt.MQTTMessage):
+        if self.journal is not None:
+            self.journal.mqtt(message.topic, message.payload)
         if len(message.payload) == 0:
             return
+        registry = self.registries.get(message.topic.split(Topic.SEP, 1)[0])
+        if registry is not None and message.topic in registry.topics():
+            return self.__handle_bridge(registry, message)
+        topic = self.client.configured(message.topic)
+        if topic.endswith(Controller.AVAILABILITY_SUFFIX):
+            return self.__handle_availability(topic, message.payload)
+        sender = Topic.from_str(topic)
         common.Log.ctl.debug("Topic parsed as %s.", sender)
         data = json.loads(message.payload.decode("utf-8"))
         common.Log.ctl.debug("Payload: %s.", data)
-        if sender.category is TopicCategory.Bridge:
-            common.Log.ctl.info("Message is a bridge event.")
-            common.Log.ctl.debug(str(sender))
-            common.Log.ctl.debug(str(data))
         if "action" in data:
             common.Log.ctl.info("Message is a remote action.")
-            remote_target = self.home.remote_action(sender, data["action"])
+            remote_target = self.home.remote_action(topic, data["action"])
             if remote_target is None:
-                raise HomeBaseError.RemoteNotFound
+                common.Log.ctl.info("Ignoring unknown action %s.", data["action"])
+                return
             (cmd, target_topic) = remote_target
             qdata = QData.api_command(target_topic, cmd, payload={ })
             self.queue.put(qdata)
@@ -80,11 +168,118 @@ class Controller(Worker):
         else:
             common.Log.ctl.warning("Could not identify purpose of message.")
 
-    # pylint: disable=invalid-name
-    def __init_client(self, ip: str, port: int) -> mqtt.Client:
-        "Initializes a client."
-        res = PatchedClient(common.CLIENT_NAME)
-        res.connect(host=ip, port=port, keepalive=360)
+    def __handle_availability(self, topic: str, payload: bytes):
+        "Passes the availability on; the bridge sends either a plain state or one wrapped in json."
+        device = Topic.from_str(topic[:-len(Controller.AVAILABILITY_SUFFIX)])
+        text = payload.decode("utf-8")
+        state = json.loads(text).get("state") if text.startswith("{") else text
+        common.Log.ctl.info("Availability of %s is %s.", device, state)
+        payload = { "state": state }
+        self.queue.put(QData.api_command(device, ApiCommand.UpdateAvailability, payload=payload))
+
+    def __handle_bridge(self, registry: Registry, message: mqtt.MQTTMessage):
+        """
+            Learns about devices joining, leaving, or being renamed.  Configured devices are
+            recognized by their IEEE address; subscriptions and publishes follow them to their name
+            on the bridge.  They become unavailable when they leave or are missing from the list.
+        """
+        common.Log.ctl.info("Message is a bridge event.")
+        changes = registry.handle(message.topic, message.payload)
+        for device in changes.left:
+            self.__lost(registry, device)
+        for (old, device) in changes.renamed:
+            self.__renamed(registry, old, device)
+        for device in changes.joined:
+            self.__found(registry, device)
+        if message.topic == f"{registry.base}/{DEVICES}":
+            self.__missing(registry)
+
+    def __device_for(
+        self,
+        registry: Registry,
+        found: BridgeDevice,
+        name: Optional[str] = None,
+    ) -> Optional[Device]:
+        "Returns the configured device, by IEEE address or else by its (former) friendly name."
+        device = self.__by_ieee.get((registry.base, found.ieee))
+        if device is None:
+            device = self.__configured.get(f"{registry.base}/{name or found.friendly_name}")
+        return device
+
+    def __found(self, registry: Registry, found: BridgeDevice):
+        device = self.__device_for(registry, found)
+        if device is None:
+            common.Log.ctl.info("Device %s is not configured in the home.", found.friendly_name)
+            return
+        relevant = Capability.Dimmable | Capability.Color
+        missing = device.model.capabilities & ~found.capabilities & relevant
+        if found.interviewed and missing:
+            common.Log.ctl.warning("Device %s does not expose %s, unlike its model.",
+                                   found.friendly_name, missing)
+        self.client.point(device.topic.string, registry.topic(found))
+        self.__subscribe(device)
+        # Devices listed at startup report their availability themselves.
+        if device.topic.string in self.__lost_devices:
+            self.__lost_devices.discard(device.topic.string)
+            if device.kind is not DeviceKind.Remote:
+                self.__set_availability(device, "online")
+
+    def __renamed(self, registry: Registry, old: str, found: BridgeDevice):
+        device = self.__device_for(registry, found, name=old)
+        if device is None:
+            return self.__found(registry, found)
+        common.Log.ctl.info("Following %s to its new name %s.", device.topic, found.friendly_name)
+        self.__unsubscribe(device)
+        self.client.point(device.topic.string, registry.topic(found))
+        self.__subscribe(device)
+
+    def __lost(self, registry: Registry, found: BridgeDevice):
+        device = self.__device_for(registry, found)
+        if device is None or device.topic.string in self.__lost_devices:
+            return
+        self.__unsubscribe(device)
+        self.client.unpoint(device.topic.string)
+        self.__lost_devices.add(device.topic.string)
+        if device.kind is not DeviceKind.Remote:
+            self.__set_availability(device, "offline")
+
+    def __missing(self, registry: Registry):
+        "Marks configured devices the bridge does not list as lost."
+        for device in self.__configured.values():
+            if device.base != registry.base:
+                continue
+            listed = registry.get(device.ident) or registry.find(device.topic.without_base)
+            if listed is None:
+                self.__lost(registry, BridgeDevice(device.ident, device.topic.without_base))
+
+    def __subscribe(self, device: Device):
+        self.client.subscribe(device.topic.string, QoS.AT_LEAST_ONCE.value)
+        if device.kind is not DeviceKind.Remote:
+            self.client.subscribe(device.availability_topic(), QoS.AT_LEAST_ONCE.value)
+
+    def __unsubscribe(self, device: Device):
+        self.client.unsubscribe(device.topic.string)
+        if device.kind is not DeviceKind.Remote:
+            self.client.unsubscribe(device.availability_topic())
+
+    def __set_availability(self, device: Device, state: str):
+        payload = { "state": state }
+        data = QData.api_command(device.topic, ApiCommand.UpdateAvailability, payload=payload)
+        self.queue.put(data)
+
+    def __connect(self, bridge: Bridge) -> mqtt.Client:
+        "Initializes a client connected to the broker of the bridge."
+        name = common.CLIENT_NAME
+        if bridge.name != Bridge.DEFAULT:
+            name = f"{name}-{bridge.name}"
+        res = PatchedClient(name)
+        res.on_connect = (
+            lambda client, _user, flags, rc: self.__on_connect(bridge, client, flags, rc)
+        )
+        res.on_disconnect = lambda client, _user, rc: Controller.__on_disconnect(bridge, client, rc)
+        # The network loop connects, and reconnects with exponential backoff, in the background.
+        res.reconnect_delay_set(RECONNECT_MIN, RECONNECT_MAX)
+        res.connect_async(host=bridge.host, port=bridge.port, keepalive=360)
         return res
 
     def __subscribe_to_all(self):
@@ -92,11 +287,14 @@ class Controller(Worker):
         self.__subscribe_to_lights()
         self.__subscribe_to_remotes()
         self.__subscribe_to_sensors()
+        self.__subscribe_to_availability()
         self.__subscribe_to_bridge()
 
     def __subscribe_to_bridge(self):
-        common.Log.ctl.debug("Subscribing to bridge.")
-        self.client.subscribe(Topic.for_bridge().string, QoS.AT_LEAST_ONCE.value)
+        for registry in self.registries.values():
+            common.Log.ctl.debug("Subscribing to bridge %s.", registry.base)
+            for topic in registry.topics():
+                self.client.subscribe(topic, QoS.AT_LEAST_ONCE.value)
 
     def __subscribe_to_remotes(self):
         "Subscribes to messages from all remotes"
@@ -116,6 +314,11 @@ class Controller(Worker):
             self.client.subscribe(light.topic.string, QoS.AT_LEAST_ONCE.value)
             common.Log.ctl.debug("Subscribing to %s", light.topic)
 
+    def __subscribe_to_availability(self):
+        "Subscribes to the availability of all lights and sensors; the bridge retains it."
+        for device in self.home.flatten_lights() + self.home.sensors():
+            self.client.subscribe(device.availability_topic(), QoS.AT_LEAST_ONCE.value)
+
     def __query_states(self):
         "Queries the physical states of all relevant devices supporting a query, i.e. lights."
         for light in self.home.flatten_lights():
@@ -123,13 +326,40 @@ class Controller(Worker):
             self.queue.put(data)
 
 
-class Refresher(Worker):
-    "Periodically issues a refresh command on the queue."
-    def __init__(self, queue: Queue):
+class Refresher:
+    """
+        Issues refresh commands on the queue, sampling the dynamic curve ahead to refresh once it
+        moved by STEP in ΔE; more often when it changes fast, at least every PERIOD seconds.
+        Refreshes fade, so a step well above the threshold of noticeable differences stays
+        invisible.
+    """
+
+    PERIOD = 30 * 60
+    MIN_PERIOD = 2 * 60
+    SAMPLE = 60
+    STEP = 3 * perception.DEFAULT_THRESHOLD
+
+    def __init__(self, queue: Queue, scheduler: Scheduler, step: float = STEP):
         self.queue = queue
+        self.scheduler = scheduler
+        self.step = step
+        self.job = scheduler.after(0, self.__run)
 
-    def _run(self):
-        "Periodically issues a refresh command through the queue."
-        while True:
-            self.queue.put(QData.refresh())
-            time.sleep(15 * 60)
+    def __run(self):
+        self.refresh()
+        delay = self.next_delay(datetime.now())
+        common.Log.rfs.debug("Next refresh in %ds.", delay)
+        self.job = self.scheduler.after(delay, self.__run)
+
+    def next_delay(self, now: datetime) -> float:
+        "Returns the seconds until the dynamic curve differs noticeably from its current state."
+        current = dynamic.recommended_at(now)
+        for delay in range(Refresher.MIN_PERIOD, Refresher.PERIOD, Refresher.SAMPLE):
+            ahead = dynamic.recommended_at(now + timedelta(seconds=delay))
+            if perception.delta_e(current, ahead) >= self.step:
+                return delay
+        return Refresher.PERIOD
+
+    def refresh(self):
+        "Issues a refresh command through the queue."
+        self.queue.put(QData.refresh())
@@ -36,6 +36,7 @@ class Device(Addressable, ABC):
         self.model = model
         self.ident = ident
         self.icon = icon
+        self.available = True  # Assumed until the bridge reports otherwise.
         self._topic = Topic.for_device(
             name=self.name,
             kind=self.model.kind,
@@ -57,6 +58,22 @@ class Device(Addressable, ABC):
     def topic(self) -> Topic:
         return self._topic
 
+    @property
+    def base(self) -> str:
+        "The base topic of the bridge the device is paired with."
+        return self._topic.base
+
+    @base.setter
+    def base(self, base: str):
+        "Pairs the device with the bridge using the given base topic."
+        self._topic = Topic.for_device(
+            name=self.name,
+            kind=self.model.kind,
+            room=self.room,
+            groups=[],
+            base=base,
+        )
+
     def set_topic(self) -> str:
         "Creates a set-topic for the device"
         return self.topic.as_set()
@@ -64,3 +81,7 @@ class Device(Addressable, ABC):
     def get_topic(self) -> str:
         "Creates a set-topic for the device"
         return self.topic.as_get()
+
+    def availability_topic(self) -> str:
+        "Creates the topic the bridge reports the availability of the device on."
+        return self.topic.as_availability()
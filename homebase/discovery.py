@@ -0,0 +1,164 @@
+"""
+Learns the devices of a Zigbee2MQTT bridge from its device list, its events, and the responses to
+renames.  The bridge republishes the entire list after every change; only the entries that changed
+are reported, so subscriptions can be adapted incrementally.
+"""
+
+import json
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from common import Log
+from enums import Capability
+
+DEVICES = "bridge/devices"
+EVENT   = "bridge/event"
+RENAMED = "bridge/response/device/rename"
+
+# Features a light exposes and the capabilities they imply.
+_FEATURES = {
+    "brightness": Capability.Dimmable,
+    "color_temp": Capability.WhiteSpec,
+    "color_xy":   Capability.Color,
+    "color_hs":   Capability.Color,
+}
+
+
+class BridgeDevice(NamedTuple):
+    "A device as the bridge knows it."
+    ieee:          str
+    friendly_name: str
+    model:         Optional[str] = None
+    vendor:        Optional[str] = None
+    capabilities:  Capability = Capability.Nothing
+    interviewed:   bool = False
+    supported:     bool = False
+
+
+class Changes(NamedTuple):
+    "The entries of a registry that changed with a message of the bridge."
+    joined:  List[BridgeDevice]
+    left:    List[BridgeDevice]
+    renamed: List[Tuple[str, BridgeDevice]]  # The former friendly name and the device.
+
+    def __bool__(self) -> bool:
+        return bool(self.joined or self.left or self.renamed)
+
+
+def capabilities(exposes: Iterable[Dict]) -> Capability:
+    "Derives the capabilities of a light from the features it exposes."
+    res = Capability.Nothing
+    for expose in exposes:
+        for feature in expose.get("features", []):
+            res |= _FEATURES.get(feature.get("name"), Capability.Nothing)
+    return res
+
+
+def _from_json(data: Dict) -> BridgeDevice:
+    definition = data.get("definition") or { }
+    return BridgeDevice(
+        ieee=data["ieee_address"],
+        friendly_name=data["friendly_name"],
+        model=definition.get("model"),
+        vendor=definition.get("vendor"),
+        capabilities=capabilities(definition.get("exposes", [])),
+        interviewed=bool(data.get("interview_completed", definition != { })),
+        supported=bool(data.get("supported", definition != { })),
+    )
+
+
+class Registry:
+    "The devices paired with a bridge, by IEEE address and by friendly name."
+
+    def __init__(self, base: str):
+        self.base = base
+        self.__devices: Dict[str, BridgeDevice] = { }
+        self.__names: Dict[str, str] = { }
+
+    def __len__(self) -> int:
+        return len(self.__devices)
+
+    def topics(self) -> List[str]:
+        "Returns the topics of the bridge the registry learns from."
+        return [f"{self.base}/{suffix}" for suffix in [DEVICES, EVENT, RENAMED]]
+
+    def topic(self, device: BridgeDevice) -> str:
+        "Returns the topic the device publishes its state on."
+        return f"{self.base}/{device.friendly_name}"
+
+    def get(self, ieee: str) -> Optional[BridgeDevice]:
+        "Returns the device with the given IEEE address, if known."
+        return self.__devices.get(ieee)
+
+    def find(self, friendly_name: str) -> Optional[BridgeDevice]:
+        "Returns the device with the given friendly name, if known."
+        ieee = self.__names.get(friendly_name)
+        return self.__devices.get(ieee) if ieee is not None else None
+
+    def handle(self, topic: str, payload: bytes) -> Changes:
+        "Learns from a message on one of the topics of the bridge."
+        data = json.loads(payload.decode("utf-8"))
+        suffix = topic[len(self.base) + 1:]
+        if suffix == DEVICES:
+            return self.__devices_listed(data)
+        if suffix == EVENT:
+            return self.__event(data)
+        if suffix == RENAMED and data.get("status") == "ok":
+            return self.__renamed(data["data"]["from"], data["data"]["to"])
+        return Changes([], [], [])
+
+    def __devices_listed(self, data: List[Dict]) -> Changes:
+        listed = [_from_json(entry) for entry in data if entry.get("type") != "Coordinator"]
+        res = Changes([], [], [])
+        for device in listed:
+            self.__learn(device, res)
+        gone = set(self.__devices) - { device.ieee for device in listed }
+        for ieee in gone:
+            res.left.append(self.__forget(ieee))
+        return res
+
+    def __event(self, event: Dict) -> Changes:
+        kind = event.get("type")
+        data = event.get("data", { })
+        res = Changes([], [], [])
+        if kind == "device_joined":
+            known = self.__devices.get(data["ieee_address"])
+            self.__learn(known or BridgeDevice(data["ieee_address"], data["friendly_name"]), res)
+        elif kind == "device_interview" and data.get("status") == "successful":
+            self.__learn(_from_json({ **data, "interview_completed": True }), res)
+        elif kind == "device_interview" and data.get("status") == "failed":
+            Log.ctl.warning("Interview of %s failed.", data.get("friendly_name"))
+        elif kind == "device_leave" and data.get("ieee_address") in self.__devices:
+            res.left.append(self.__forget(data["ieee_address"]))
+        return res
+
+    def __renamed(self, old: str, new: str) -> Changes:
+        res = Changes([], [], [])
+        device = self.find(old)
+        if device is not None:
+            self.__learn(device._replace(friendly_name=new), res)
+        return res
+
+    def __learn(self, device: BridgeDevice, changes: Changes):
+        "Records the device, noting whether it joined, was renamed, or did not change at all."
+        known = self.__devices.get(device.ieee)
+        if known == device:
+            return
+        self.__devices[device.ieee] = device
+        self.__names[device.friendly_name] = device.ieee
+        if known is None:
+            Log.ctl.info("Device %s (%s) joined.", device.friendly_name, device.ieee)
+            changes.joined.append(device)
+        elif known.friendly_name != device.friendly_name:
+            Log.ctl.info("Device %s was renamed to %s.", known.friendly_name, device.friendly_name)
+            self.__names.pop(known.friendly_name, None)
+            changes.renamed.append((known.friendly_name, device))
+        elif device.interviewed and not known.interviewed:
+            Log.ctl.info("Interviewed %s: %s by %s.",
+                         device.friendly_name, device.model, device.vendor)
+            changes.joined.append(device)
+
+    def __forget(self, ieee: str) -> BridgeDevice:
+        device = self.__devices.pop(ieee)
+        self.__names.pop(device.friendly_name, None)
+        Log.ctl.info("Device %s (%s) left.", device.friendly_name, device.ieee)
+        return device
@@ -1,6 +1,6 @@
 "Collecting enums."
 
-from enum import Enum, auto
+from enum import Enum, Flag, auto
 from typing import Optional
 
 
@@ -8,6 +8,7 @@ class TopicCommand(Enum):
     "Different Commands"
     GET = "get"
     SET = "set"
+    AVAILABILITY = "availability"
 
     @staticmethod
     def from_str(val: str) -> Optional['TopicCommand']:
@@ -46,6 +47,11 @@ class ApiCommand(Enum):
     Refresh         = auto()
     QueryState      = auto()
     UpdateState     = auto()
+    ExpireOverrides = auto()
+    ApplyScene      = auto()
+    StoreScene      = auto()
+    FlushMerged     = auto()
+    UpdateAvailability = auto()
 
     @staticmethod
     def from_str(val: str) -> Optional['ApiCommand']:
@@ -54,6 +60,36 @@ class ApiCommand(Enum):
             return None
         return ApiCommand[val]
 
+    @property
+    def internal(self) -> bool:
+        "Whether only the home base itself issues the command; clients must not."
+        return self in _INTERNAL_COMMANDS
+
+    @property
+    def needs_payload(self) -> bool:
+        "Whether the command cannot be executed without a payload."
+        return self in _PAYLOAD_COMMANDS
+
+
+# Commands mirroring the bridge or driving timers of the home base.
+_INTERNAL_COMMANDS = frozenset([
+    ApiCommand.UpdateState,
+    ApiCommand.UpdateAvailability,
+    ApiCommand.ExpireOverrides,
+    ApiCommand.FlushMerged,
+])
+
+_PAYLOAD_COMMANDS = frozenset([
+    ApiCommand.SetBrightness,
+    ApiCommand.SetWhiteTemp,
+    ApiCommand.SetColor,
+    ApiCommand.Rename,
+    ApiCommand.ApplyScene,
+    ApiCommand.StoreScene,
+    ApiCommand.UpdateState,
+    ApiCommand.UpdateAvailability,
+])
+
 
 # pylint: disable=invalid-name
 class ApiQuery(Enum):
@@ -76,6 +112,7 @@ class QDataKind(Enum):
     Status = 2
     ApiAction = 3
     ApiQuery = 4
+    ApiBatch = 5
 
 
 # pylint: disable=invalid-name
@@ -93,3 +130,13 @@ class TopicCategory(str, Enum):
         if val not in set(item.value for item in TopicCategory):
             return None
         return TopicCategory(val)
+
+
+# pylint: disable=invalid-name
+class Capability(Flag):
+    "Capabilities of a light source; combined for groups."
+    Nothing    = 0
+    Dimmable   = auto()
+    WhiteSpec  = auto()
+    Color      = auto()
+    Transition = auto()
@@ -1,14 +1,24 @@
 "All enums that cannot be modified without reflecting the change in swift."
 
 from enum import Enum, auto
-from typing import Optional, Type, TypeVar
+from typing import Dict, Optional, Tuple, Type, TypeVar
 
-from strenum import PascalCaseStrEnum
+from enums.other import Capability
 
 FfiEnumT = TypeVar('FfiEnumT', bound=Enum)
 
-class FfiEnum(PascalCaseStrEnum):
-    "An enum that can be sent to and fro Swift."
+class FfiEnum(str, Enum):
+    "An enum that can be sent to and fro Swift.  Members are PascalCase and their own value."
+
+    # pylint: disable=no-self-argument
+    def _generate_next_value_(name, _start, _count, _last_values):
+        return name
+
+    def __str__(self) -> str:
+        return self.value
+
+    def __format__(self, spec: str) -> str:
+        return self.value.__format__(spec)
 
     @classmethod
     def from_str(cls: Type[FfiEnumT], value: str) -> Optional[FfiEnumT]:
@@ -46,62 +56,51 @@ class DeviceModel(FfiEnum):
     @property
     def vendor(self) -> Vendor:
         "Specifies the vendor of the device, Ikea or Hue."
-        return {
-            DeviceModel.IkeaDimmer:      Vendor.Ikea,
-            DeviceModel.IkeaOutlet:      Vendor.Ikea,
-            DeviceModel.IkeaMultiButton: Vendor.Ikea,
-            DeviceModel.IkeaDimmable:    Vendor.Ikea,
-            DeviceModel.HueColor:        Vendor.Hue,
-            DeviceModel.TuyaHumidity:    Vendor.Tuya,
-        }[self]
+        return _MODEL_INFO[self][0]
 
     @property
     def kind(self) -> DeviceKind:
         "Specifies the physical kind of the device."
-        return {
-            DeviceModel.IkeaDimmer:      DeviceKind.Remote,
-            DeviceModel.IkeaOutlet:      DeviceKind.Outlet,
-            DeviceModel.IkeaMultiButton: DeviceKind.Remote,
-            DeviceModel.IkeaDimmable:    DeviceKind.Light,
-            DeviceModel.HueColor:        DeviceKind.Light,
-            DeviceModel.TuyaHumidity:    DeviceKind.Sensor,
-        }[self]
+        return _MODEL_INFO[self][1]
+
+    @property
+    def capabilities(self) -> Capability:
+        "Specifies everything the device is capable of."
+        return _MODEL_INFO[self][2]
 
     @property
     def is_dimmable(self) -> bool:
         "Indicates if the device is capable of being dimmed."
-        return {
-            DeviceModel.IkeaDimmer:      False,
-            DeviceModel.IkeaOutlet:      False,
-            DeviceModel.IkeaMultiButton: False,
-            DeviceModel.IkeaDimmable:    True,
-            DeviceModel.HueColor:        True,
-            DeviceModel.TuyaHumidity:    False,
-        }[self]
+        return Capability.Dimmable in _MODEL_INFO[self][2]
 
     @property
     def is_white_spec(self) -> bool:
         "Indicates if the device is capable of displaying white spectrum light."
-        return {
-            DeviceModel.IkeaDimmer:      False,
-            DeviceModel.IkeaOutlet:      False,
-            DeviceModel.IkeaMultiButton: False,
-            DeviceModel.IkeaDimmable:    False,
-            DeviceModel.HueColor:        True,
-            DeviceModel.TuyaHumidity:    False,
-        }[self]
+        return Capability.WhiteSpec in _MODEL_INFO[self][2]
 
     @property
     def is_color(self) -> bool:
         "Indicates if the device is capable of emitting colored light."
-        return {
-            DeviceModel.IkeaDimmer:      False,
-            DeviceModel.IkeaOutlet:      False,
-            DeviceModel.IkeaMultiButton: False,
-            DeviceModel.IkeaDimmable:    False,
-            DeviceModel.HueColor:        True,
-            DeviceModel.TuyaHumidity:    False,
-        }[self]
+        return Capability.Color in _MODEL_INFO[self][2]
+
+    @property
+    def supports_transition(self) -> bool:
+        "Indicates if the device fades between states on its own when given a transition time."
+        return Capability.Transition in _MODEL_INFO[self][2]
+
+
+_DIMMABLE = Capability.Dimmable | Capability.Transition
+_COLORFUL = _DIMMABLE | Capability.WhiteSpec | Capability.Color
+
+# Vendor, kind, and capabilities of every model, looked up instead of rebuilt per access.
+_MODEL_INFO: Dict[DeviceModel, Tuple[Vendor, DeviceKind, Capability]] = {
+    DeviceModel.IkeaDimmer:      (Vendor.Ikea, DeviceKind.Remote, Capability.Nothing),
+    DeviceModel.IkeaOutlet:      (Vendor.Ikea, DeviceKind.Outlet, Capability.Nothing),
+    DeviceModel.IkeaMultiButton: (Vendor.Ikea, DeviceKind.Remote, Capability.Nothing),
+    DeviceModel.IkeaDimmable:    (Vendor.Ikea, DeviceKind.Light,  _DIMMABLE),
+    DeviceModel.HueColor:        (Vendor.Hue,  DeviceKind.Light,  _COLORFUL),
+    DeviceModel.TuyaHumidity:    (Vendor.Tuya, DeviceKind.Sensor, Capability.Nothing),
+}
 
 # pylint: disable="invalid-name"
 class SensorQuantity(FfiEnum):
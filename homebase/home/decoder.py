@@ -1,40 +1,96 @@
 "Decodes a home specification."
 
-from typing import Dict, List, Optional
+from datetime import time, timedelta
+from typing import Dict, List, Optional, Union
 
+import common
 import lighting
 import lighting.config
-import yaml
+from color_utils import HSVColor
 from comm import Topic
-from enums import DeviceModel
+from comm.bridge import Bridge
+from enums import ApiCommand, DeviceModel, SensorQuantity
 from home.home import Home
 from home.room import Room
+from lighting.scene import Scene
 from remote import Remote
+from rule import Rule
+from schedule import Schedule
 from sensor import Sensor
 
 
 def read(path: str) -> Home:
     "Decodes a specification behind the given path into a Home or raises an error."
-    home = __read(path)
-    rooms = list(map(__decode_room, home["rooms"]))
-    return Home(rooms)
+    return decode(__read(path))
 
-def __decode_room(room: dict) -> Room:
+def decode(home: dict) -> Home:
+    "Decodes an already parsed specification into a Home or raises an error."
+    bridges = __decode_bridges(home.get("bridges"))
+    rooms = list(map(lambda r: __decode_room(r, bridges), home["rooms"]))
+    return Home(rooms, bridges=list(bridges.values()))
+
+def __decode_bridges(bridges: Optional[List[dict]]) -> Dict[str, Bridge]:
+    "Decodes the bridges; the first one is the default for devices not naming one."
+    default = Bridge.default()
+    res = { }
+    for bridge in (bridges or []):
+        decoded = Bridge(
+            name=bridge["name"],
+            base=bridge.get("base", default.base),
+            host=bridge.get("host", default.host),
+            port=int(bridge.get("port", default.port)),
+        )
+        Topic.register_base(decoded.base)
+        res[decoded.name] = decoded
+    return res or { default.name: default }
+
+def __base_of(spec: dict, default: str, bridges: Dict[str, Bridge]) -> str:
+    return bridges[spec["bridge"]].base if "bridge" in spec else default
+
+def __decode_room(room: dict, bridges: Dict[str, Bridge]) -> Room:
     name = room["name"]
     icon = room["icon"]
-    main_group = __decode_light_group(room["lights"], name, [])
+    base = __base_of(room, next(iter(bridges.values())).base, bridges)
+    main_group = __decode_light_group(room["lights"], name, [], base, bridges)
     targets = __collect_viable_targets(main_group)
     targets[name] = Topic.for_room(name)
     remotes = __decode_remotes(room=room, room_name=name, targets=targets)
     sensors = __decode_sensors(room=room, room_name=name)
-    return Room(name, group=main_group, icon=icon, remotes=remotes, sensors=sensors)
+    specs = (room.get("remotes") or []) + (room.get("sensors") or [])
+    for (spec, device) in zip(specs, remotes + sensors):
+        device.base = __base_of(spec, base, bridges)
+    schedules = __decode_schedules(room=room, targets=targets)
+    scenes = __decode_scenes(room=room, group=main_group, targets=targets)
+    # Rules may also switch single lights, e.g. an outlet powering a fan.
+    lights = { light.name: light.topic for light in main_group.flatten_lights() }
+    rules = __decode_rules(room=room, sensors=sensors, targets={ **lights, **targets })
+    return Room(
+        name,
+        group=main_group,
+        icon=icon,
+        remotes=remotes,
+        sensors=sensors,
+        schedules=schedules,
+        scenes=scenes,
+        rules=rules,
+    )
 
-def __decode_light_group(group: dict, room: str, hierarchie: List[str]) -> lighting.Group:
+def __decode_light_group(
+    group: dict,
+    room: str,
+    hierarchie: List[str],
+    base: str,
+    bridges: Dict[str, Bridge],
+) -> lighting.Group:
     name = group["name"]
-    singles = list(map(lambda l: __decode_light(l, room), group["singles"]))
+    singles = []
+    for single in group["singles"]:
+        light = __decode_light(single, room)
+        light.base = __base_of(single, base, bridges)
+        singles.append(light)
     subs = []
     for sub in (group.get("subgroups") or []):
-        sub = __decode_light_group(sub, room, hierarchie + [name])
+        sub = __decode_light_group(sub, room, hierarchie + [name], base, bridges)
         subs.append(sub)
     return lighting.Group(
         single_lights=singles,
@@ -42,7 +98,8 @@ def __decode_light_group(group: dict, room: str, hierarchie: List[str]) -> light
         room=room,
         groups=subs,
         hierarchie=hierarchie,
-        config=__decode_config(group["config"])
+        config=__decode_config(group["config"]),
+        base=base,
     )
 
 def __decode_config(config: Optional[dict]) -> lighting.Config:
@@ -52,6 +109,7 @@ def __decode_config(config: Optional[dict]) -> lighting.Config:
     hue = Override.none()
     saturation = Override.none()
     lumin = Override.none()
+    ttl = None
     if config is not None:
         if "colorful" in config:
             colorful   = Override.perm(bool(config["colorful"]))
@@ -63,6 +121,8 @@ def __decode_config(config: Optional[dict]) -> lighting.Config:
             saturation = Override.perm(float(config["saturation"]))
         if "lumin" in config:
             lumin      = Override.perm(float(config["lumin"]))
+        if "ttl" in config:
+            ttl        = timedelta(seconds=float(config["ttl"]))
     return lighting.Config(
         toggled_on=Override.perm(False),
         colorful=colorful,
@@ -70,6 +130,7 @@ def __decode_config(config: Optional[dict]) -> lighting.Config:
         hue=hue,
         saturation=saturation,
         lumin_mod=lumin,
+        ttl=ttl,
     )
 
 def __decode_light(light: dict, room: str) -> lighting.Concrete:
@@ -138,6 +199,92 @@ def __decode_sensor(sensor: dict, room: str) -> Sensor:
     assert model is not None
     return Sensor(name=name, room=room, icon=icon, model=model, ident=ident)
 
+def __decode_schedules(room: dict, targets: Dict[str, Topic]) -> List[Schedule]:
+    schedules = []
+    for schedule in (room.get("schedules") or []):
+        sched = __decode_schedule(schedule, targets=targets)
+        schedules.append(sched)
+    return schedules
+
+def __decode_schedule(schedule: dict, targets: Dict[str, Topic]) -> Schedule:
+    name = schedule["name"]
+    command = ApiCommand.from_str(schedule["command"])
+    assert command is not None
+    target = targets[schedule["controls"]]
+    return Schedule(name=name, at=__decode_time(schedule["at"]), command=command, target=target)
+
+def __decode_rules(room: dict, sensors: List[Sensor], targets: Dict[str, Topic]) -> List[Rule]:
+    by_name = { sensor.name: sensor for sensor in sensors }
+    rules = []
+    for rule in (room.get("rules") or []):
+        rules.append(__decode_rule(rule, sensors=by_name, targets=targets))
+    return rules
+
+def __decode_rule(rule: dict, sensors: Dict[str, Sensor], targets: Dict[str, Topic]) -> Rule:
+    name = rule["name"]
+    quantity = SensorQuantity.from_str(rule["quantity"])
+    command = ApiCommand.from_str(rule["command"])
+    otherwise = ApiCommand.from_str(rule["otherwise"]) if "otherwise" in rule else None
+    assert quantity is not None and command is not None
+    assert ("above" in rule) != ("below" in rule)
+    # Rules execute their commands without a payload, and only commands clients may issue.
+    for cmd in [command, otherwise]:
+        forbidden = cmd is not None and (cmd.needs_payload or cmd.internal)
+        assert not forbidden, f"Rule {name} cannot issue {cmd.name}."  # type: ignore
+    return Rule(
+        name=name,
+        sensor=sensors[rule["sensor"]].topic,
+        quantity=quantity,
+        threshold=float(rule["above"] if "above" in rule else rule["below"]),
+        above="above" in rule,
+        command=command,
+        target=targets[rule["controls"]],
+        otherwise=otherwise,
+        hysteresis=float(rule.get("hysteresis", 0.0)),
+    )
+
+def __decode_scenes(room: dict, group: lighting.Group, targets: Dict[str, Topic]) -> List[Scene]:
+    lights = { light.name: light for light in group.flatten_lights() }
+    scenes = []
+    for scene in (room.get("scenes") or []):
+        scn = __decode_scene(scene, group=group, lights=lights, targets=targets)
+        scenes.append(scn)
+    return scenes
+
+def __decode_scene(
+    scene: dict,
+    group: lighting.Group,
+    lights: Dict[str, lighting.Concrete],
+    targets: Dict[str, Topic]
+) -> Scene:
+    name = scene["name"]
+    ident = int(scene["id"])
+    target = targets[scene["controls"]] if "controls" in scene else group.topic
+    states = []
+    for entry in scene["lights"]:
+        light = lights[entry["light"]]
+        value = float(entry.get("brightness", 1.0)) if entry.get("toggled_on", True) else 0.0
+        color = HSVColor(
+            hsv_h=float(entry.get("hue", 0.0)),
+            hsv_s=float(entry.get("saturation", 0.0)),
+            hsv_v=value,
+        )
+        states.append((light, lighting.State(color)))
+    return Scene(
+        name=name,
+        ident=ident,
+        target=target,
+        states=states,
+        stored=bool(scene.get("stored")),
+    )
+
+def __decode_time(val: Union[str, int]) -> time:
+    # Yaml reads an unquoted 23:00 as a sexagesimal number, i.e. as minutes since midnight.
+    if isinstance(val, int):
+        (hour, minute) = divmod(val, 60)
+        return time(hour=hour, minute=minute)
+    return time.fromisoformat(val)
+
 def __collect_viable_targets(grp: lighting.Group) -> Dict[str, Topic]:
     res = { grp.name: grp.topic }
     for sub in grp.groups:
@@ -146,9 +293,4 @@ def __collect_viable_targets(grp: lighting.Group) -> Dict[str, Topic]:
     return res
 
 def __read(path) -> dict:
-    with open(path, "r", encoding="utf-8") as stream:
-        try:
-            return yaml.safe_load(stream)
-        except yaml.YAMLError as yml_exc:
-            print("Failed to load config file config.yml.")
-            raise yml_exc
+    return common.read_home(path)
@@ -3,36 +3,56 @@
 from typing import Dict
 
 import lighting
-import yaml
+from comm.bridge import Bridge
 from enums import DeviceModel
 from home.home import Home
 from home.room import Room
 from lighting import Config
+from lighting.scene import Scene
 from remote import Remote
+from rule import Rule
+from schedule import Schedule
 from sensor import Sensor
 
 
 def write(home: Home, path: str):
     "Encodes the home in yml format."
-    rooms = list(map(__encode_room, home.rooms))
-    __write(path, { "rooms" : rooms })
+    names = { bridge.base: bridge.name for bridge in home.bridges }
+    rooms = list(map(lambda r: __encode_room(r, names), home.rooms))
+    bridges = list(map(__encode_bridge, home.bridges))
+    __write(path, { "bridges": bridges, "rooms" : rooms })
 
-def __encode_room(room: Room) -> dict:
-    remotes = list(map(__encode_remote, room.remotes))
-    sensors = list(map(__encode_sensor, room.sensors))
+def __encode_bridge(bridge: Bridge) -> dict:
+    return {
+        "name": bridge.name,
+        "base": bridge.base,
+        "host": bridge.host,
+        "port": bridge.port,
+    }
+
+def __encode_room(room: Room, names: Dict[str, str]) -> dict:
+    remotes = [{ **__encode_remote(r), "bridge": names[r.base] } for r in room.remotes]
+    sensors = [{ **__encode_sensor(s), "bridge": names[s.base] } for s in room.sensors]
+    schedules = list(map(__encode_schedule, room.schedules))
+    scenes = list(map(__encode_scene, room.scenes))
+    rules = list(map(__encode_rule, room.rules))
     return {
         "name": room.name,
         "icon": room.icon,
-        "lights": __encode_light_group(room.group),
+        "bridge": names[room.group.base],
+        "lights": __encode_light_group(room.group, names),
         "remotes": remotes,
-        "sensors": sensors
+        "sensors": sensors,
+        "schedules": schedules,
+        "scenes": scenes,
+        "rules": rules,
     }
 
-def __encode_light_group(group: lighting.Group) -> dict:
+def __encode_light_group(group: lighting.Group, names: Dict[str, str]) -> dict:
     return {
         "name": group.name,
-        "singles": list(map(__encode_light, group.single_lights)),
-        "subgroups": list(map(__encode_light_group, group.groups)),
+        "singles": [{ **__encode_light(l), "bridge": names[l.base] } for l in group.single_lights],
+        "subgroups": [__encode_light_group(g, names) for g in group.groups],
         "config": __encode_config(group.config)
     }
 
@@ -53,29 +73,22 @@ def __encode_light(light: lighting.Concrete) -> dict:
     }
 
 def __encode_config(cfg: Config) -> dict:
+    "Encodes the permanent parts of the configuration the decoder reads."
     res = { }
     if cfg.colorful.permanent is not None:
         res["colorful"] = cfg.colorful.permanent
     if cfg.dynamic.permanent is not None:
         res["dynamic"] = cfg.dynamic.permanent
-    if cfg.brightness_mod.permanent is not None:
-        res["brightness_mod"] = cfg.brightness_mod.permanent
-    if cfg.white_temp_mod.permanent is not None:
-        res["white_temp_mod"] = cfg.white_temp_mod.permanent
-    if cfg.color_offset.permanent is not None:
-        res["color_offset"] = cfg.color_offset.permanent
-    if cfg.static.permanent is not None:
-        res["static"] = __encode_light_state(cfg.static.permanent)
+    if cfg.hue.permanent is not None:
+        res["hue"] = cfg.hue.permanent
+    if cfg.saturation.permanent is not None:
+        res["saturation"] = cfg.saturation.permanent
+    if cfg.lumin_mod.permanent is not None:
+        res["lumin"] = cfg.lumin_mod.permanent
+    if cfg.ttl is not None:
+        res["ttl"] = cfg.ttl.total_seconds()
     return res
 
-def __encode_light_state(state: lighting.State) -> dict:
-    return {
-        "toggled_on": state.toggled_on,
-        "brightness": state.brightness,
-        "white_temp": state.white_temp,
-        "color":      state.color,
-    }
-
 def __encode_remote(remote: Remote) -> Dict[str, str]:
     if remote.model == DeviceModel.IkeaMultiButton:
         kind = "IkeaMulti"
@@ -95,11 +108,52 @@ def __encode_sensor(sensor: Sensor) -> Dict[str, str]:
     return {
         "name": sensor.name,
         "icon": sensor.icon,
-        "kind": sensor.model.value,
+        "model": sensor.model.value,
         "id": sensor.ident
     }
 
+def __encode_schedule(schedule: Schedule) -> Dict[str, str]:
+    return {
+        "name": schedule.name,
+        "at": schedule.at.strftime("%H:%M"),
+        "command": schedule.command.name,
+        "controls": schedule.target.name or schedule.target.room or "",
+    }
+
+def __encode_rule(rule: Rule) -> dict:
+    res = {
+        "name": rule.name,
+        "sensor": rule.sensor.name,
+        "quantity": rule.quantity.name,
+        "above" if rule.above else "below": rule.threshold,
+        "hysteresis": rule.hysteresis,
+        "command": rule.command.name,
+        "controls": rule.target.name or rule.target.room or "",
+    }
+    if rule.otherwise is not None:
+        res["otherwise"] = rule.otherwise.name
+    return res
+
+def __encode_scene(scene: Scene) -> dict:
+    lights = []
+    for (light, state) in scene.states:
+        lights.append({
+            "light":      light.name,
+            "toggled_on": state.toggled_on,
+            "hue":        state.color.hsv_h,
+            "saturation": state.color.hsv_s,
+            "brightness": state.color.hsv_v,
+        })
+    return {
+        "name":     scene.name,
+        "id":       scene.ident,
+        "stored":   scene.stored,
+        "controls": scene.target.name or scene.target.room,
+        "lights":   lights,
+    }
+
 def __write(path: str, data: dict):
+    import yaml  # pylint: disable=import-outside-toplevel
     with open(path, "w", encoding="utf-8") as stream:
         try:
             yaml.safe_dump(data, stream=stream)
@@ -1,36 +1,47 @@
 "Represents a home."
 
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import lighting
 from comm import Topic
+from comm.bridge import Bridge
 from device import Addressable
-from enums import ApiCommand
+from enums import ApiCommand, TopicCategory
 from home.room import Room
-from homebaseerror import HomeBaseError
+from lighting.scene import Scene
 from remote import Remote
+from rule import Rule
+from schedule import Schedule
 from sensor import Sensor
 
 
 class Home(Addressable, lighting.Collection):
     "Collection of rooms"
 
-    def __init__(self, rooms: List[Room]):
+    def __init__(self, rooms: List[Room], bridges: Optional[List[Bridge]] = None):
         self.rooms = rooms
+        self.bridges = bridges or [Bridge.default()]
+        self.__dispatch: Dict[Tuple[str, str], Tuple[ApiCommand, Topic]] = { }
+        self.rebuild_dispatch()
 
     @property
     def topic(self) -> Topic:
         return Topic.for_home()
 
-    def remote_action(self, remote: Topic, action: str) -> Optional[Tuple[ApiCommand, Topic]]:
-        "Attempts to determine the api command represented by the action of the given remote."
-        device = self.find_remote(remote)
-        if device is None:
-            raise HomeBaseError.RemoteNotFound
-        cmd = device.cmd_for_action(action)
-        if cmd is None:
-            return None
-        return (cmd, device.controls_topic)
+    def remote_action(self, remote: str, action: str) -> Optional[Tuple[ApiCommand, Topic]]:
+        """
+            Returns the api command and target of the action of the remote with the given topic.
+            Returns None for unknown remotes and actions.
+        """
+        return self.__dispatch.get((remote, action))
+
+    def rebuild_dispatch(self):
+        "Maps every action of every remote to its command and target.  Call after changing remotes."
+        self.__dispatch = {
+            (remote.topic.string, action): (cmd, remote.controls_topic)
+            for remote in self.remotes()
+            for (action, cmd) in remote.dispatch().items()
+        }
 
     def room_by_name(self, name: str) -> Optional[Room]:
         "Finds the room with the given name in the home."
@@ -44,6 +55,14 @@ class Home(Addressable, lighting.Collection):
         "Returns all sensors in the home"
         return sum(map(lambda r: r.sensors, self.rooms), [])
 
+    def schedules(self) -> List[Schedule]:
+        "Returns all schedules in the home"
+        return sum(map(lambda r: r.schedules, self.rooms), [])
+
+    def rules(self) -> List[Rule]:
+        "Returns all rules in the home"
+        return sum(map(lambda r: r.rules, self.rooms), [])
+
     def find_remote(self, topic: Topic) -> Optional[Remote]:
         "Find the remote with the given topic."
         for room in self.rooms:
@@ -68,6 +87,15 @@ class Home(Addressable, lighting.Collection):
                     return sensor
         return None
 
+    def find_scene(self, topic: Topic, name: str) -> Optional[Scene]:
+        "Find the scene with the given name in the room with the given topic, or anywhere."
+        for room in self.rooms:
+            if topic.category == TopicCategory.Home or topic in [room.topic, room.group.topic]:
+                scene = room.scene_by_name(name)
+                if scene is not None:
+                    return scene
+        return None
+
     def find_abstract_light(self, topic: Topic) -> Optional[lighting.Abstract]:
         "Find the abstract light, so a light or a group for the topic."
         raise NotImplementedError
@@ -5,7 +5,10 @@ from typing import List, Optional
 import lighting
 from comm import Topic
 from device import Addressable
+from lighting.scene import Scene
 from remote import Remote
+from rule import Rule
+from schedule import Schedule
 from sensor import Sensor
 
 
@@ -19,12 +22,18 @@ class Room(Addressable, lighting.Collection):
         group: lighting.Group,
         remotes: List[Remote],
         sensors: List[Sensor],
+        schedules: Optional[List[Schedule]] = None,
+        scenes: Optional[List[Scene]] = None,
+        rules: Optional[List[Rule]] = None,
     ):
         self.name: str = name
         self.icon: str = icon
         self.group: lighting.Group = group
         self.remotes: List[Remote] = remotes
         self.sensors: List[Sensor] = sensors
+        self.schedules: List[Schedule] = schedules or []
+        self.scenes: List[Scene] = scenes or []
+        self.rules: List[Rule] = rules or []
 
     @property
     def topic(self) -> Topic:
@@ -34,6 +43,10 @@ class Room(Addressable, lighting.Collection):
         "Find the device with the given topic."
         return next((item for item in self.remotes if item.name == topic.name), None)
 
+    def scene_by_name(self, name: str) -> Optional[Scene]:
+        "Finds the scene with the given name in the room."
+        return next((scene for scene in self.scenes if scene.name == name), None)
+
     def _remote_by_name(self, name: str) -> Optional[Remote]:
         "Finds the light with the given name in the room."
         return next((remote for remote in self.remotes if remote.name == name), None)
@@ -0,0 +1,34 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from enums import ApiCommand
+from simulation import synthetic
+
+
+class TestRemoteAction(unittest.TestCase):
+    "Testing the dispatch of remote actions."
+
+    def setUp(self):
+        self.home = synthetic.home(30)
+        self.remote = self.home.remotes()[-1]
+
+    def test_known_action(self):
+        "Checks that a known action yields its command for the controlled target."
+        res = self.home.remote_action(self.remote.topic.string, "brightness_up_click")
+        self.assertEqual(res, (ApiCommand.DimUp, self.remote.controls_topic))
+
+    def test_unknown_action(self):
+        "Checks that an unknown action is ignored."
+        self.assertIsNone(self.home.remote_action(self.remote.topic.string, "unknown"))
+        self.assertIsNone(self.remote.cmd_for_action("unknown"))
+
+    def test_unknown_remote(self):
+        "Checks that actions of an unknown remote are ignored."
+        self.assertIsNone(self.home.remote_action("zigbee2mqtt/nobody", "toggle"))
+
+
+if __name__ == '__main__':
+    unittest.main()
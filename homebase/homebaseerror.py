@@ -16,3 +16,7 @@ class HomeBaseError(Exception, Enum):
     QueryNoResponse = "Did not receive a response for a query in time."
     InvalidPhysicalQuery = "Query target is not a valid physical device."
     InvalidPhysicalQuantity = "Cannot transform the given quantity into a float."
+    SceneNotFound = "Could not find scene."
+    Unauthorized = "The request lacks valid credentials."
+    ProfilerBusy = "Another profiling session is running."
+    ProfilerUnavailable = "The profiling mode is not available in this format or Python version."
@@ -0,0 +1,145 @@
+"An optional, compressed, append-only journal of all inbound MQTT messages and web requests."
+
+import base64
+import gzip
+import json
+import threading
+import time
+import zlib
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+import common
+from common import Log
+
+FLUSH_INTERVAL = 1.0
+GZIP_MAGIC = b"\x1f\x8b\x08"
+SALVAGE_CHUNK = 4096
+
+
+class Entry(NamedTuple):
+    "A journaled message: the MQTT topic or the web method and path, and the raw payload or body."
+    time:   float
+    source: str
+    target: str
+    data:   bytes
+
+    MQTT = "mqtt"
+    WEB  = "web"
+
+    def encode(self) -> bytes:
+        "Encodes the entry as a line of json."
+        line = {
+            "t": self.time,
+            "s": self.source,
+            "k": self.target,
+            "d": base64.b64encode(self.data).decode("ascii"),
+        }
+        return (json.dumps(line, separators=(",", ":")) + "\n").encode("utf-8")
+
+    @staticmethod
+    def decode(line: bytes) -> 'Entry':
+        "Decodes a line written by `encode`."
+        raw = json.loads(line)
+        return Entry(raw["t"], raw["s"], raw["k"], base64.b64decode(raw["d"]))
+
+
+class Journal:
+    """
+        Appends entries to a gzip file; every start of the home base adds a new gzip member.
+        Entries are flushed FLUSH_INTERVAL seconds after the first unflushed one was written, so a
+        crash loses at most that much.  The member cut off by a crash is read up to its last flush.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__file = gzip.open(path, "ab")
+        self.__lock = threading.Lock()
+        self.__timer: Optional[threading.Timer] = None
+
+    @staticmethod
+    def from_config() -> Optional['Journal']:
+        "Opens the journal configured in config.yml, if any."
+        path = (common.config.get("journal") or { }).get("path")
+        if not path:
+            return None
+        Log.ctl.info("Journaling inbound traffic to %s.", path)
+        return Journal(path)
+
+    def mqtt(self, topic: str, payload: bytes):
+        "Records an inbound MQTT message."
+        self.__append(Entry(time.time(), Entry.MQTT, topic, payload))
+
+    def web(self, method: str, path: str, body: bytes = b""):
+        "Records a web request."
+        self.__append(Entry(time.time(), Entry.WEB, f"{method} {path}", body))
+
+    def __append(self, entry: Entry):
+        line = entry.encode()
+        with self.__lock:
+            if self.__file.closed:
+                return
+            self.__file.write(line)
+            if self.__timer is None:
+                self.__timer = threading.Timer(FLUSH_INTERVAL, self.__flush)
+                self.__timer.daemon = True
+                self.__timer.start()
+
+    def __flush(self):
+        with self.__lock:
+            self.__timer = None
+            if not self.__file.closed:
+                self.__file.flush()
+
+    def close(self):
+        "Flushes and closes the journal."
+        with self.__lock:
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+            self.__file.close()
+
+    @staticmethod
+    def read(path: str) -> Iterator[Entry]:
+        "Yields all entries of the journal in order, skipping what a crash left unfinished."
+        with open(path, "rb") as file:
+            data = file.read()
+        for member in _members(data, path):
+            for line in member.splitlines(keepends=True):
+                if line.endswith(b"\n"):
+                    yield Entry.decode(line)
+
+
+def _members(data: bytes, path: str) -> Iterator[bytes]:
+    """
+        Yields the decompressed content of every gzip member.  A member cut off by a crash is
+        followed by the member of the next start; it is decompressed up to that one instead.
+    """
+    pos = 0
+    while pos < len(data):
+        decomp = zlib.decompressobj(wbits=31)
+        try:
+            content = decomp.decompress(data[pos:])
+        except zlib.error:
+            (content, pos) = _truncated(data, pos, path)
+            yield content
+            continue
+        yield content
+        if not decomp.eof:
+            Log.ctl.warning("Journal %s ends in a truncated entry.", path)
+            return
+        pos = len(data) - len(decomp.unused_data)
+
+
+def _truncated(data: bytes, pos: int, path: str) -> Tuple[bytes, int]:
+    "Salvages a member that cannot be read to its end.  Returns its content and the next offset."
+    nxt = data.find(GZIP_MAGIC, pos + 1)
+    end = nxt if nxt != -1 else len(data)
+    Log.ctl.warning("Journal %s contains entries cut off by a crash before byte %d.", path, end)
+    decomp = zlib.decompressobj(wbits=31)
+    content = b""
+    try:
+        for start in range(pos, end, SALVAGE_CHUNK):
+            content += decomp.decompress(data[start:min(start + SALVAGE_CHUNK, end)])
+    except zlib.error:
+        pass
+    return (content, end)
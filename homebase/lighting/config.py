@@ -2,9 +2,10 @@
 
 import math
 from datetime import datetime as Timestamp
-from typing import Callable, Generic, Optional, Tuple, TypeVar
+from datetime import timedelta
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
 
-from colormath.color_objects import HSVColor
+from color_utils import HSVColor
 from lighting.state import State
 from common import scale_relative, Log, bounded
 
@@ -16,21 +17,23 @@ class Override(Generic[T]):
         self,
         permanent: Optional[T],
         temporary: Optional[Tuple[T, Timestamp]],
+        expires:   Optional[Timestamp] = None,
     ):
         self.permanent = permanent
         self.temporary = temporary
+        self.expires   = expires
 
     @property
     def value(self) -> Optional[T]:
         "Provides the permanent or overriden value if any"
-        self.__evict()
+        self.evict()
         if self.temporary is not None:
             return self.temporary[0]
         return self.permanent
 
     def value_or(self, alt: T) -> T:
         "Provides the permanent or overriden value if any"
-        self.__evict()
+        self.evict()
         if self.temporary is not None:
             return self.temporary[0]
         if self.permanent is not None:
@@ -53,12 +56,20 @@ class Override(Generic[T]):
         return Override(permanent=None, temporary=(tval, Timestamp.now()))
 
     def set_temp(self, tval: T):
-        "Sets the temporary override value."
+        "Sets the temporary override value.  It does not expire until an expiry is stamped."
         self.temporary = (tval, Timestamp.now())
+        self.expires = None
+
+    def stamp_expiry(self, ttl: timedelta) -> Optional[Timestamp]:
+        "Lets a fresh temporary value expire ttl after it was set.  Returns the expiry if stamped."
+        if self.temporary is None or self.expires is not None:
+            return None
+        self.expires = self.temporary[1] + ttl
+        return self.expires
 
     def modify_temp(self, dft: T, func: Callable[[T], T]):
         "Sets the temporary override value."
-        self.__evict()
+        self.evict()
         if self.temporary is None:
             self.set_temp(func(dft))
             return
@@ -73,15 +84,23 @@ class Override(Generic[T]):
         return Override(
             permanent=self.permanent or parent.permanent,
             temporary=self.temporary or parent.temporary,
+            expires=self.expires if self.temporary else parent.expires,
         )
 
-    def __evict(self):
-        # Todo: Evict temporary configs after a while.
-        pass
+    def evict(self, now: Optional[Timestamp] = None) -> bool:
+        "Drops the temporary value if it expired.  Returns whether it did."
+        if self.temporary is None or self.expires is None:
+            return False
+        if (now or Timestamp.now()) < self.expires:
+            return False
+        self.temporary = None
+        self.expires = None
+        return True
 
     def __str__(self) -> str:
         return (
-            f"Override(permanent={self.permanent}, temporary={self.temporary})"
+            f"Override(permanent={self.permanent}, temporary={self.temporary}, "
+            f"expires={self.expires})"
         )
 
 
@@ -97,6 +116,7 @@ class Config:
         saturation: Optional[Override[float]] = None,
         lumin_mod:  Optional[Override[float]] = None,
         static:     Optional[Override[State]] = None,
+        ttl:        Optional[timedelta]       = None,
     ):
         self._toggled_on:   Override[bool]  = toggled_on
         self._colorful:     Override[bool]  = colorful    or Override.none()
@@ -105,6 +125,7 @@ class Config:
         self._saturation:   Override[float] = saturation  or Override.none()
         self._lumin_mod:    Override[float] = lumin_mod   or Override.none()
         self._static:       Override[State] = static      or Override.none()
+        self._ttl:          Optional[timedelta] = ttl
 
     @property
     def colorful(self) -> Override[bool]:
@@ -141,6 +162,16 @@ class Config:
         "Returns the respective override object."
         return self._static
 
+    @property
+    def ttl(self) -> Optional[timedelta]:
+        "Returns how long temporary color overrides last, if they expire at all."
+        return self._ttl
+
+    @property
+    def expirable(self) -> List[Override]:
+        "Returns the overrides whose temporary values expire after the ttl."
+        return [self.hue, self.saturation, self.lumin_mod]
+
     def with_parent(self, parent: 'Config') -> 'Config':
         "Creates a configuration with self's overrides if present, otherwise parent's."
         return Config(
@@ -151,6 +182,7 @@ class Config:
             colorful   = self.colorful.with_parent(   parent.colorful   ),
             toggled_on = self.toggled_on.with_parent( parent.toggled_on ),
             saturation = self.saturation.with_parent( parent.saturation ),
+            ttl        = self.ttl or parent.ttl,
         )
 
     def __str__(self):
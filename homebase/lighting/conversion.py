@@ -0,0 +1,207 @@
+"""
+Native conversion from the xy chromaticity reported by zigbee lights into HSV.
+Replaces colormath's generic xyY → XYZ → sRGB → HSV pipeline with a single precomputed matrix.
+Results match colormath's output (d50 xyY, bradford adaptation to sRGB/d65) up to float rounding.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from color_utils import HSVColor
+from enums import Vendor
+
+Hsv = Tuple[float, float, float]
+XyReport = Tuple[float, float, float]  # x, y, brightness ∈ [0,1]
+
+# Devices report brightness as an integer in [0, 254].
+BRIGHTNESS_STEPS = 254
+
+# sRGB xyz_to_rgb matrix multiplied by the bradford adaptation matrix from d50 to d65.
+_M = (
+    ( 3.134103568108, -1.616994443162, -0.490653685134),
+    (-0.978760121954,  1.916120257501,  0.033453628604),
+    ( 0.071934671995, -0.228957840211,  1.405036423970),
+)
+
+
+def _compand(lin: float) -> float:
+    "Applies the sRGB gamma curve to a linear channel, cutting off negative values like colormath."
+    if lin <= 0.0:
+        return 0.0
+    if lin <= 0.0031308:
+        return lin * 12.92
+    return 1.055 * math.pow(lin, 1 / 2.4) - 0.055
+
+
+def _rgb_to_hsv(red: float, green: float, blue: float) -> Hsv:
+    "Converts sRGB into HSV with the hue in degrees, like colormath does."
+    high = max(red, green, blue)
+    low = min(red, green, blue)
+    if high == low:
+        hue = 0.0
+    elif high == red:
+        hue = (60.0 * ((green - blue) / (high - low)) + 360) % 360.0
+    elif high == green:
+        hue = 60.0 * ((blue - red) / (high - low)) + 120
+    else:
+        hue = 60.0 * ((red - green) / (high - low)) + 240.0
+    sat = 0.0 if high == 0 else 1.0 - (low / high)
+    return (hue, sat, high)
+
+
+def _chroma(val_x: float, val_y: float) -> Tuple[float, float, float]:
+    "Returns the linear rgb channels for a luminance of 1."
+    if val_y == 0.0:
+        return (0.0, 0.0, 0.0)
+    xyz_x = val_x / val_y
+    xyz_z = (1.0 - val_x - val_y) / val_y
+    return (
+        _M[0][0] * xyz_x + _M[0][1] + _M[0][2] * xyz_z,
+        _M[1][0] * xyz_x + _M[1][1] + _M[1][2] * xyz_z,
+        _M[2][0] * xyz_x + _M[2][1] + _M[2][2] * xyz_z,
+    )
+
+
+def _from_chroma(chroma: Tuple[float, float, float], bright: float) -> Hsv:
+    return _rgb_to_hsv(
+        _compand(chroma[0] * bright),
+        _compand(chroma[1] * bright),
+        _compand(chroma[2] * bright),
+    )
+
+
+def xy_to_hsv(val_x: float, val_y: float, bright: float) -> Hsv:
+    "Converts an xy chromaticity with the given brightness into hsv."
+    return _from_chroma(_chroma(val_x, val_y), bright)
+
+
+def xy_to_hsv_color(val_x: float, val_y: float, bright: float) -> HSVColor:
+    "Converts an xy chromaticity with the given brightness into an HSV color."
+    (hue, sat, val) = xy_to_hsv(val_x, val_y, bright)
+    return HSVColor(hsv_h=hue, hsv_s=sat, hsv_v=val)
+
+
+def xy_to_hsv_many(reports: Iterable[XyReport], grid: Optional['GamutGrid'] = None) -> List[Hsv]:
+    "Converts many reports at once, optionally through a precomputed grid."
+    if grid is not None:
+        lookup = grid.lookup
+        return [lookup(x, y, bright) for (x, y, bright) in reports]
+    return [_from_chroma(_chroma(x, y), bright) for (x, y, bright) in reports]
+
+
+################################################
+# GAMUTS
+################################################
+
+class Gamut:
+    "The triangle of xy chromaticities a light can reproduce."
+
+    def __init__(
+        self,
+        red:   Tuple[float, float],
+        green: Tuple[float, float],
+        blue:  Tuple[float, float],
+    ):
+        self.red   = red
+        self.green = green
+        self.blue  = blue
+
+    @property
+    def corners(self) -> List[Tuple[float, float]]:
+        "Returns the corners of the gamut triangle."
+        return [self.red, self.green, self.blue]
+
+    def contains(self, val_x: float, val_y: float) -> bool:
+        "Checks whether the chromaticity lies within the gamut."
+        def side(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+            return (val_x - b[0]) * (a[1] - b[1]) - (a[0] - b[0]) * (val_y - b[1])
+        sides = [side(self.red, self.green), side(self.green, self.blue), side(self.blue, self.red)]
+        return all(s >= 0 for s in sides) or all(s <= 0 for s in sides)
+
+    def clamp(self, val_x: float, val_y: float) -> Tuple[float, float]:
+        "Returns the closest chromaticity within the gamut."
+        if self.contains(val_x, val_y):
+            return (val_x, val_y)
+        edges = zip(self.corners, self.corners[1:] + self.corners[:1])
+        return min(
+            (Gamut.__closest_on_edge(val_x, val_y, a, b) for (a, b) in edges),
+            key=lambda p: (p[0] - val_x) ** 2 + (p[1] - val_y) ** 2
+        )
+
+    @staticmethod
+    def __closest_on_edge(
+        val_x: float,
+        val_y: float,
+        start: Tuple[float, float],
+        end:   Tuple[float, float],
+    ) -> Tuple[float, float]:
+        (dx, dy) = (end[0] - start[0], end[1] - start[1])
+        proj = ((val_x - start[0]) * dx + (val_y - start[1]) * dy) / (dx * dx + dy * dy)
+        proj = min(1.0, max(0.0, proj))
+        return (start[0] + proj * dx, start[1] + proj * dy)
+
+
+# Philips Hue gamut C.
+HUE_GAMUT = Gamut(red=(0.6915, 0.3083), green=(0.1700, 0.7000), blue=(0.1532, 0.0475))
+# Ikea Tradfri color bulbs.
+IKEA_GAMUT = Gamut(red=(0.6800, 0.3100), green=(0.1100, 0.8200), blue=(0.1300, 0.0400))
+
+
+class GamutGrid:
+    """
+        A precomputed lookup grid of linear rgb channels for every xy cell of a gamut.
+        Chromaticities outside of the gamut are clamped onto its border, like the bulbs do.
+        Converted results are memoized per cell and device brightness step, so repeated reports
+        of the same color cost a single dict access.
+        Trades an error of at most half a cell for skipping the math per report.
+    """
+
+    MAX_MEMO = 1 << 16
+
+    def __init__(self, gamut: Gamut, resolution: float = 0.005):
+        self.gamut = gamut
+        self.resolution = resolution
+        self._cells: Dict[Tuple[int, int], Tuple[float, float, float]] = {}
+        self._memo: Dict[Tuple[int, int, int], Hsv] = {}
+        for (ix, iy) in self.__cells_of(gamut):
+            (val_x, val_y) = gamut.clamp(ix * resolution, iy * resolution)
+            self._cells[(ix, iy)] = _chroma(val_x, val_y)
+
+    def __cells_of(self, gamut: Gamut) -> Iterable[Tuple[int, int]]:
+        xs = [c[0] for c in gamut.corners]
+        ys = [c[1] for c in gamut.corners]
+        for ix in range(round(min(xs) / self.resolution), round(max(xs) / self.resolution) + 1):
+            for iy in range(round(min(ys) / self.resolution), round(max(ys) / self.resolution) + 1):
+                yield (ix, iy)
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def lookup(self, val_x: float, val_y: float, bright: float) -> Hsv:
+        "Converts an xy chromaticity with the given brightness into hsv using the grid."
+        cell = (round(val_x / self.resolution), round(val_y / self.resolution))
+        key = (cell[0], cell[1], round(bright * BRIGHTNESS_STEPS))
+        res = self._memo.get(key)
+        if res is not None:
+            return res
+        chroma = self._cells.get(cell)
+        if chroma is None:
+            (val_x, val_y) = self.gamut.clamp(val_x, val_y)
+            chroma = _chroma(val_x, val_y)
+        res = _from_chroma(chroma, key[2] / BRIGHTNESS_STEPS)
+        if len(self._memo) >= GamutGrid.MAX_MEMO:
+            self._memo.clear()
+        self._memo[key] = res
+        return res
+
+
+_grids: Dict[Vendor, GamutGrid] = {}
+
+def grid_for(vendor: Vendor) -> Optional[GamutGrid]:
+    "Returns the lazily built lookup grid for the vendor's gamut, if the gamut is known."
+    gamut = { Vendor.Hue: HUE_GAMUT, Vendor.Ikea: IKEA_GAMUT }.get(vendor)
+    if gamut is None:
+        return None
+    if vendor not in _grids:
+        _grids[vendor] = GamutGrid(gamut)
+    return _grids[vendor]
@@ -0,0 +1,67 @@
+"""
+Keeps track of lights that dim on their own after a brightness_move.
+Estimates where the dimming stopped and remembers which lights still owe a report of their
+actual brightness, so the configuration can follow the physical state.
+"""
+
+import time
+from typing import Dict, Optional, Set
+
+from comm.payload import DEFAULT_DIMMING_SPEED, Bright
+from common import bounded
+from lighting.source import Concrete
+
+
+class _Session:
+    "A light dimming on its own."
+
+    def __init__(self, brightness: float, down: bool, begin: float, speed: int):
+        self.brightness = brightness
+        self.direction  = -1 if down else 1
+        self.begin      = begin
+        self.speed      = speed
+
+    def estimate(self, now: float) -> float:
+        "Estimates the brightness ∈ [0,1] reached at the given time."
+        moved = self.direction * self.speed * (now - self.begin) / Bright.max
+        return bounded(self.brightness + moved, range(0, 1))
+
+
+class DimmingSessions:
+    "Tracks dimming sessions of concrete lights."
+
+    def __init__(self):
+        self.__sessions: Dict[str, _Session] = {}
+        self.__awaiting: Set[str] = set()
+
+    def start(
+        self,
+        light: Concrete,
+        brightness: float,
+        down: bool,
+        now: Optional[float] = None,
+        speed: int = DEFAULT_DIMMING_SPEED,
+    ):
+        "Starts a session for a light currently at the given brightness."
+        begin = now if now is not None else time.monotonic()
+        self.__sessions[light.topic.string] = _Session(brightness, down, begin, speed)
+        self.__awaiting.discard(light.topic.string)
+
+    def stop(self, light: Concrete, now: Optional[float] = None) -> Optional[float]:
+        "Ends the session of the light and returns its estimated brightness, if it was dimming."
+        session = self.__sessions.pop(light.topic.string, None)
+        if session is None:
+            return None
+        self.__awaiting.add(light.topic.string)
+        return session.estimate(now if now is not None else time.monotonic())
+
+    def is_dimming(self, light: Concrete) -> bool:
+        "Indicates whether the light is currently dimming."
+        return light.topic.string in self.__sessions
+
+    def take_report(self, light: Concrete) -> bool:
+        "Indicates whether a report of the light reconciles a finished session; consumes it."
+        if light.topic.string not in self.__awaiting:
+            return False
+        self.__awaiting.discard(light.topic.string)
+        return True
@@ -2,9 +2,9 @@
 
 import math
 from datetime import datetime
-from typing import Tuple
+from typing import List, Tuple
 
-from colormath.color_objects import HSVColor
+from color_utils import HSVColor
 from lighting.state import State
 
 colors = {
@@ -30,9 +30,12 @@ zones = [
 
 def recommended() -> State:
     "Returns the recommended light state for the current time of day."
-    current_time = datetime.now()
-    time = _time_as_float(current_time)
-    return _recommended(time)
+    return recommended_at(datetime.now())
+
+
+def recommended_at(moment: datetime) -> State:
+    "Returns the recommended light state for the time of day of the moment."
+    return _recommended(_time_as_float(moment))
 
 
 def _time_as_float(time: datetime) -> float:
@@ -40,35 +43,40 @@ def _time_as_float(time: datetime) -> float:
 
 
 def _recommended(time: float) -> State:
-    color = _recommended_color(time)
-    brightness = _recommended_brightness(time)
-    color.hsv_v = brightness
-    return State(color)
+    (hue, sat, _) = _HALF_HOURS[_half_hour(time)]
+    return State(HSVColor(hsv_h=hue, hsv_s=sat, hsv_v=_recommended_brightness(time)))
+
+def _half_hour(time: float) -> int:
+    return math.floor(time) * 2 + (1 if time % 1 > 0.5 else 0)
 
 def _recommended_brightness(time: float) -> float:
     return 1 - (abs(12 - time) / 12)
 
-def _recommended_color(time: float) -> HSVColor:
+def _computed_color(time: float) -> HSVColor:
+    "Computes the color of the zone at the time; _HALF_HOURS holds the results."
     for start, end in zip(zones, zones[1:]):
         if start[0] <= time < end[0]:
             return _color_in_zone(time, start, end)
     end_color = zones[0][1]
     return _color_in_zone(time, zones[-1], (24, end_color, "irrelevant"))
 
-
 def _color_in_zone(
     time: float,
     current_zone: Tuple[int, HSVColor, str],
     next_zone: Tuple[int, HSVColor, str]
 ) -> HSVColor:
+    # pylint: disable=import-outside-toplevel
     from colour import Color
-    from colormath.color_objects import sRGBColor
     from colormath.color_conversions import convert_color
+    from colormath.color_objects import HSVColor as ColormathHSV
+    from colormath.color_objects import sRGBColor
     (start, start_color, _) = current_zone
     (end, end_color, _) = next_zone
     resolution = (end - start) * 2  # 30 min steps
-    start_rgb: sRGBColor = convert_color(start_color, sRGBColor)
-    end_rgb: sRGBColor = convert_color(end_color, sRGBColor)
+    start_hsv = ColormathHSV(start_color.hsv_h, start_color.hsv_s, start_color.hsv_v)
+    end_hsv = ColormathHSV(end_color.hsv_h, end_color.hsv_s, end_color.hsv_v)
+    start_rgb = convert_color(start_hsv, sRGBColor)
+    end_rgb = convert_color(end_hsv, sRGBColor)
     range_start = Color(start_rgb.get_rgb_hex())
     range_end = Color(end_rgb.get_rgb_hex())
     color_list = list(range_start.range_to(range_end, resolution))
@@ -77,4 +85,60 @@ def _color_in_zone(
         steps_in_zone += 1
     target = color_list[steps_in_zone]
     target_rgb = sRGBColor(rgb_b=target.blue, rgb_g=target.green, rgb_r=target.red)
-    return convert_color(target_rgb, HSVColor)
+    res = convert_color(target_rgb, ColormathHSV)
+    return HSVColor(hsv_h=res.hsv_h, hsv_s=res.hsv_s, hsv_v=res.hsv_v)
+
+
+# The color of every half hour of the day as _computed_color returns it, so neither colour nor
+# colormath have to be imported, let alone run, outside of tests.  test_dynamic checks that both
+# agree.
+_HALF_HOURS: List[Tuple[float, float, float]] = [
+    (0.0, 1.0, 0.2),  # 00:00
+    (0.0, 1.0, 0.2),  # 00:30
+    (0.0, 1.0, 0.2),  # 01:00
+    (0.0, 1.0, 0.2),  # 01:30
+    (0.0, 1.0, 0.2),  # 02:00
+    (0.13071895424837976, 1.0, 0.33333333333333337),  # 02:30
+    (0.2614379084967027, 1.0, 0.4666666666666667),  # 03:00
+    (0.39215686274508244, 1.0, 0.6000000000000001),  # 03:30
+    (0.39215686274508244, 1.0, 0.6),  # 04:00
+    (0.3607843137255031, 1.0, 0.6799999999999999),  # 04:30
+    (0.32941176470586697, 1.0, 0.76),  # 05:00
+    (0.29803921568628766, 1.0, 0.84),  # 05:30
+    (0.2666666666666515, 1.0, 0.9199999999999999),  # 06:00
+    (0.2352941176470722, 1.0, 1.0),  # 06:30
+    (0.2352941176470722, 1.0, 1.0),  # 07:00
+    (0.20168067226887842, 0.7826086956521741, 0.9387755102040817),  # 07:30
+    (0.1680672268907415, 0.5681818181818186, 0.8979591836734695),  # 08:00
+    (0.13445378151260456, 0.3720930232558136, 0.8775510204081631),  # 08:30
+    (0.10084033613446763, 0.2093023255813956, 0.8775510204081634),  # 09:00
+    (0.0672268907563307, 0.09090909090909083, 0.8979591836734693),  # 09:30
+    (0.03361344537813693, 0.021739130434782816, 0.9387755102040818),  # 10:00
+    (0.0, 0.0, 1.0),  # 10:30
+    (0.0, 0.0, 1.0),  # 11:00
+    (0.03361344537813693, 0.021739130434782372, 0.9387755102040816),  # 11:30
+    (0.0672268907563307, 0.0909090909090905, 0.8979591836734693),  # 12:00
+    (0.10084033613446763, 0.20930232558139505, 0.8775510204081631),  # 12:30
+    (0.13445378151260456, 0.3720930232558136, 0.8775510204081631),  # 13:00
+    (0.1680672268907415, 0.5681818181818182, 0.8979591836734695),  # 13:30
+    (0.20168067226887842, 0.7826086956521738, 0.9387755102040816),  # 14:00
+    (0.2352941176470722, 1.0, 1.0),  # 14:30
+    (0.2352941176470722, 1.0, 1.0),  # 15:00
+    (0.2666666666666515, 1.0, 0.92),  # 15:30
+    (0.29803921568628766, 1.0, 0.84),  # 16:00
+    (0.32941176470586697, 1.0, 0.76),  # 16:30
+    (0.3607843137255031, 1.0, 0.6799999999999999),  # 17:00
+    (0.39215686274508244, 1.0, 0.6),  # 17:30
+    (0.39215686274508244, 1.0, 0.6),  # 18:00
+    (0.336134453781483, 1.0, 0.5428571428571428),  # 18:30
+    (0.2801120448179404, 1.0, 0.4857142857142857),  # 19:00
+    (0.22408963585434094, 1.0, 0.42857142857142855),  # 19:30
+    (0.1680672268907415, 1.0, 0.37142857142857144),  # 20:00
+    (0.11204481792714205, 1.0, 0.3142857142857143),  # 20:30
+    (0.056022408963599446, 1.0, 0.2571428571428571),  # 21:00
+    (0.0, 1.0, 0.2),  # 21:30
+    (0.0, 1.0, 0.2),  # 22:00
+    (0.0, 1.0, 0.2),  # 22:30
+    (0.0, 1.0, 0.2),  # 23:00
+    (0.0, 1.0, 0.2),  # 23:30
+]
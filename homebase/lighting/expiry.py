@@ -0,0 +1,59 @@
+"Keeps track of when temporary overrides expire."
+
+import heapq
+import itertools
+from datetime import datetime as Timestamp
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from common import Log
+from lighting.config import Override
+from lighting.source import Abstract
+
+Entry = Tuple[Timestamp, int, Abstract, Override]
+
+
+class ExpiryIndex:
+    """
+        Indexes temporary overrides by their expiry.
+        Collecting the k overrides that are due only touches those k entries.
+        Entries of overrides that were set again in the meantime are stale and skipped.
+    """
+
+    def __init__(self):
+        self.__heap: List[Entry] = []
+        self.__seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.__heap)
+
+    def track(self, light: Abstract, ttl: Optional[timedelta]):
+        "Stamps fresh temporary overrides of the light with an expiry and indexes them."
+        if ttl is None:
+            return
+        for override in light.config.expirable:
+            expires = override.stamp_expiry(ttl)
+            if expires is not None:
+                heapq.heappush(self.__heap, (expires, next(self.__seq), light, override))
+
+    def next_deadline(self) -> Optional[Timestamp]:
+        "Returns the time at which the next override expires, if any."
+        self.__drop_stale()
+        if not self.__heap:
+            return None
+        return self.__heap[0][0]
+
+    def evict_due(self, now: Optional[Timestamp] = None) -> List[Abstract]:
+        "Evicts all overrides that are due.  Returns the lights affected, each one once."
+        now = now or Timestamp.now()
+        affected: Dict[str, Abstract] = {}
+        while self.__heap and self.__heap[0][0] <= now:
+            (expires, _, light, override) = heapq.heappop(self.__heap)
+            if override.expires == expires and override.evict(now):
+                affected[light.topic.string] = light
+        Log.utl.debug("Evicted overrides of %s.", list(affected))
+        return list(affected.values())
+
+    def __drop_stale(self):
+        while self.__heap and self.__heap[0][3].expires != self.__heap[0][0]:
+            heapq.heappop(self.__heap)
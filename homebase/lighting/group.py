@@ -1,8 +1,9 @@
 "Represents a collection of light sources."
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from comm import Topic
+from enums import Capability
 from lighting.config import Config
 from lighting.source import Abstract, Collection, Concrete
 from lighting.state import State
@@ -23,6 +24,7 @@ class Group(Abstract, Collection):
         groups:        List['Group'],
         hierarchie:    List[str],
         config:        Config,
+        base:          str = Topic.BASE,
     ):
         super().__init__(config=config)
         self.name:          str               = name
@@ -30,6 +32,11 @@ class Group(Abstract, Collection):
         self.groups:        List[Group]       = groups
         self.hierarchie:    List[str]         = hierarchie
         self.single_lights: List[Concrete]    = single_lights
+        self.base:          str               = base
+        self.parent:        Optional[Group]   = None
+        self.__capabilities: Optional[Capability] = None  # Cached until the membership changes.
+        for group in groups:
+            group.parent = self
 
     @property
     def topic(self) -> Topic:
@@ -37,6 +44,7 @@ class Group(Abstract, Collection):
             room = self.room,
             hierarchie = self.hierarchie,
             name = self.name,
+            base = self.base,
         )
 
     @property
@@ -44,6 +52,12 @@ class Group(Abstract, Collection):
         "Returns a list of all abstract lights"
         return self.single_lights + self.groups  # type: ignore
 
+    @property
+    def reachable_lights(self) -> List[Abstract]:
+        "Returns all abstract lights except single lights known to be unavailable."
+        available = [light for light in self.single_lights if light.available]
+        return available + self.groups  # type: ignore
+
     def compile_config(self, topic: Topic) -> Optional[Config]:
         """
             Compiles the light configuration for a light with the given topic.
@@ -61,20 +75,59 @@ class Group(Abstract, Collection):
                 return res.with_parent(cfg)
         return None
 
+    def compile_configs(self, parent: Optional[Config] = None) -> List[Tuple[Concrete, Config]]:
+        "Compiles the configurations of all lights of the group in a single pass."
+        cfg = self.config if parent is None else self.config.with_parent(parent)
+        res = [(light, light.config.with_parent(cfg)) for light in self.single_lights]
+        for group in self.groups:
+            res += group.compile_configs(cfg)
+        return res
+
     ################################################
-    # INFORMATIONAL API
+    # MEMBERSHIP
     ################################################
-    @property
-    def is_dimmable(self) -> bool:
-        return any(map(lambda l: l.is_dimmable, self.all_lights))
 
-    @property
-    def is_white_spec(self) -> bool:
-        return any(map(lambda l: l.is_white_spec, self.all_lights))
+    def add_light(self, light: Concrete):
+        "Adds a single light to the group."
+        self.single_lights.append(light)
+        self._membership_changed()
+
+    def remove_light(self, light: Concrete):
+        "Removes a single light from the group."
+        self.single_lights.remove(light)
+        self._membership_changed()
+
+    def add_group(self, group: 'Group'):
+        "Adds a subgroup to the group."
+        group.parent = self
+        self.groups.append(group)
+        self._membership_changed()
+
+    def remove_group(self, group: 'Group'):
+        "Removes a subgroup from the group."
+        self.groups.remove(group)
+        group.parent = None
+        self._membership_changed()
+
+    def _membership_changed(self):
+        "Drops the cached capabilities of the group and all groups containing it."
+        group: Optional[Group] = self
+        while group is not None:
+            group.__capabilities = None
+            group = group.parent
 
+    ################################################
+    # INFORMATIONAL API
+    ################################################
     @property
-    def is_color(self) -> bool:
-        return any(map(lambda l: l.is_color, self.all_lights))
+    def capabilities(self) -> Capability:
+        "Everything any of the group's lights can do."
+        if self.__capabilities is None:
+            res = Capability.Nothing
+            for light in self.all_lights:
+                res |= light.capabilities
+            self.__capabilities = res
+        return self.__capabilities
 
     ################################################
     # COLLECTION API
@@ -87,18 +140,18 @@ class Group(Abstract, Collection):
     # FUNCTIONAL API
     ################################################
 
-    def realize_state(self, client: mqtt.Client, state: State):
-        for light in self.all_lights:
-            light.realize_state(client, state)
+    def realize_state(self, client: mqtt.Client, state: State, transition: Optional[float] = None):
+        for light in self.reachable_lights:
+            light.realize_state(client, state, transition)
 
     def start_dim_down(self, client: mqtt.Client):
-        for light in self.all_lights:
+        for light in self.reachable_lights:
             light.start_dim_down(client)
 
     def start_dim_up(self, client: mqtt.Client):
-        for light in self.all_lights:
+        for light in self.reachable_lights:
             light.start_dim_up(client)
 
     def stop_dim(self, client: mqtt.Client):
-        for light in self.all_lights:
+        for light in self.reachable_lights:
             light.stop_dim(client)
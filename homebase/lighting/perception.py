@@ -0,0 +1,95 @@
+"""
+Approximates how different two light states look, so changes nobody would notice can be skipped.
+Colors are compared by their CIE76 ΔE in L*a*b*.  States are quantized to the units the payload
+carries, and the L*a*b* value of every quantized color is computed once and then looked up.
+"""
+
+import colorsys
+import math
+from typing import Dict, Tuple
+
+from comm.payload import Bright
+from comm.state_encoder import StateEncoder
+from lighting.source import Concrete
+from lighting.state import State
+
+# A ΔE of about 2.3 is commonly taken as just noticeable.
+DEFAULT_THRESHOLD = 2.0
+# ΔE between an off and an on state; always exceeds any threshold.
+SWITCH = math.inf
+
+Lab = Tuple[float, float, float]
+# Hue in degrees, saturation in percent, brightness in [0, Bright.max].
+Units = Tuple[int, int, int]
+
+# sRGB to XYZ for the d65 white point.
+_M = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041),
+)
+_WHITE = (0.95047, 1.0, 1.08883)
+
+_LAB: Dict[Units, Lab] = { }
+
+
+def _linear(channel: float) -> float:
+    if channel <= 0.04045:
+        return channel / 12.92
+    return math.pow((channel + 0.055) / 1.055, 2.4)
+
+
+def _f(val: float) -> float:
+    if val > 216 / 24389:
+        return math.pow(val, 1 / 3)
+    return (24389 / 27 * val + 16) / 116
+
+
+def lab(units: Units) -> Lab:
+    "Returns the L*a*b* value of the quantized color."
+    res = _LAB.get(units)
+    if res is None:
+        (hue, sat, bright) = units
+        rgb = [_linear(c) for c in colorsys.hsv_to_rgb(hue / 360, sat / 100, bright / Bright.max)]
+        (f_x, f_y, f_z) = (
+            _f(sum(m * c for (m, c) in zip(row, rgb)) / white) for (row, white) in zip(_M, _WHITE)
+        )
+        res = (116 * f_y - 16, 500 * (f_x - f_y), 200 * (f_y - f_z))
+        _LAB[units] = res
+    return res
+
+
+def _units(state: State) -> Units:
+    col = state.color
+    return (int(col.hsv_h * 360) % 360, int(col.hsv_s * 100), Bright.scaled(col.hsv_v))
+
+
+def _distance(first: Units, second: Units) -> float:
+    if first == second:
+        return 0.0
+    return math.dist(lab(first), lab(second))
+
+
+def delta_e(old: State, new: State) -> float:
+    "Approximates the perceptual difference of two states in full color."
+    if old.toggled_on != new.toggled_on:
+        return SWITCH
+    if not new.toggled_on:
+        return 0.0
+    return _distance(_units(old), _units(new))
+
+
+def delta_e_for(light: Concrete, old: State, new: State) -> float:
+    "Approximates the perceptual difference of two states as far as the light can display them."
+    encoder = StateEncoder.for_model(light.model)
+    def units(state: State) -> Tuple[bool, Units]:
+        col = state.color
+        key = encoder.key(state.toggled_on, col.hsv_h, col.hsv_s, col.hsv_v, None)
+        (toggled_on, bright, hue, sat, _) = key
+        return (toggled_on, (hue, sat, bright if encoder.dimmable else Bright.max))
+    ((old_on, old_units), (new_on, new_units)) = (units(old), units(new))
+    if old_on != new_on:
+        return SWITCH
+    if not new_on:
+        return 0.0
+    return _distance(old_units, new_units)
@@ -0,0 +1,57 @@
+"""
+Named scenes, i.e. presets of states for the lights of a room.
+Scenes are compiled into ready-to-send payloads once, when the home is read.
+Stored scenes live on the devices themselves and are recalled with a single publish to their
+target, which requires a zigbee2mqtt group with the same name as the target group.
+"""
+
+from typing import List, Tuple
+
+from comm import Payload, Topic
+from lighting.source import Concrete
+from lighting.state import State
+from paho.mqtt import client as mqtt
+
+
+class Scene:
+    "A named preset of light states."
+
+    def __init__(
+        self,
+        name:   str,
+        ident:  int,
+        target: Topic,
+        states: List[Tuple[Concrete, State]],
+        stored: bool = False,
+    ):
+        self.name   = name
+        self.ident  = ident
+        self.target = target
+        self.states = states
+        self.stored = stored
+        self.bundle: List[Tuple[str, bytes]] = []
+        for (light, state) in states:
+            payload = light.payload_for(state)
+            if payload is not None:
+                self.bundle.append((light.set_topic(), payload))
+
+    def apply_config(self):
+        "Overrides the configuration of all lights so refreshes keep the scene alive."
+        for (light, state) in self.states:
+            light.config.dynamic.set_temp(False)
+            light.config.static.set_temp(state.copy())
+            light.config.toggled_on.set_temp(state.toggled_on)
+
+    def publish(self, client: mqtt.Client):
+        "Realizes the scene, recalling it from the devices if it is stored there."
+        if self.stored:
+            client.publish(self.target.as_set(), Payload.scene_recall(self.ident))
+            return
+        for (topic, payload) in self.bundle:
+            client.publish(topic, payload)
+
+    def store(self, client: mqtt.Client):
+        "Realizes the scene and lets the devices of the target store it."
+        for (topic, payload) in self.bundle:
+            client.publish(topic, payload)
+        client.publish(self.target.as_set(), Payload.scene_store(self.ident, self.name))
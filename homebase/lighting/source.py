@@ -4,10 +4,11 @@ from abc import ABC, abstractmethod
 from typing import List, Optional
 
 import common
-from colormath.color_objects import HSVColor
+from color_utils import HSVColor
 from comm import Payload
+from comm.state_encoder import StateEncoder
 from device import Addressable, Device
-from enums import DeviceModel
+from enums import Capability, DeviceModel
 from lighting.config import Config
 from lighting.state import State
 from paho.mqtt import client as mqtt
@@ -42,18 +43,23 @@ class Abstract(Addressable, ABC, Collection):
 
     @property
     @abstractmethod
+    def capabilities(self) -> Capability:
+        "Everything the light can do."
+
+    @property
     def is_dimmable(self) -> bool:
         "Can the light be dimmed in any way?"
+        return Capability.Dimmable in self.capabilities
 
     @property
-    @abstractmethod
     def is_white_spec(self) -> bool:
         "Can the light display white color?"
+        return Capability.WhiteSpec in self.capabilities
 
     @property
-    @abstractmethod
     def is_color(self) -> bool:
         "Determines if the light can display different colors"
+        return Capability.Color in self.capabilities
 
     ################################################
     # CONFIGURATIVE API
@@ -71,8 +77,8 @@ class Abstract(Addressable, ABC, Collection):
     ################################################
 
     @abstractmethod
-    def realize_state(self, client: mqtt.Client, state: State):
-        "Realizes the given state."
+    def realize_state(self, client: mqtt.Client, state: State, transition: Optional[float] = None):
+        "Realizes the given state, fading into it within transition seconds if supported."
 
     @abstractmethod
     def start_dim_down(self, client: mqtt.Client):
@@ -171,27 +177,33 @@ class Concrete(Abstract, Device):
     ):
         Abstract.__init__(self, config=config)
         Device.__init__(self, name=name, room=room, icon=icon, model=model, ident=ident)
+        self._encoder = StateEncoder.for_model(model)
+        self._capabilities = model.capabilities
 
     @property
-    def is_dimmable(self) -> bool:
-        return self.model.is_dimmable
-
-    @property
-    def is_white_spec(self) -> bool:
-        return self.model.is_white_spec
+    def capabilities(self) -> Capability:
+        return self._capabilities
 
     @property
-    def is_color(self) -> bool:
-        return self.model.is_color
+    def supports_transition(self) -> bool:
+        "Can the light fade into a new state on its own?"
+        return Capability.Transition in self._capabilities
 
     ################################################
     # FUNCTIONAL API
     ################################################
 
-    def realize_state(self, client: mqtt.Client, state: State):
-        payload = self._state_realization_payload(state=state)
+    def realize_state(self, client: mqtt.Client, state: State, transition: Optional[float] = None):
+        payload = self.payload_for(state, transition)
         if payload is not None:
-            client.publish(self.set_topic(), payload.finalize())
+            client.publish(self.set_topic(), payload)
+
+    def payload_for(self, state: State, transition: Optional[float] = None) -> Optional[bytes]:
+        "Returns the finalized payload realizing the given state, if any."
+        color = state.color
+        return self._encoder.encode(
+            state.toggled_on, color.hsv_h, color.hsv_s, color.hsv_v, transition
+        )
 
     def start_dim_down(self, client: mqtt.Client):
         client.publish(self.set_topic(), Payload.start_dim(down=True))
@@ -208,20 +220,3 @@ class Concrete(Abstract, Device):
 
     def flatten_lights(self) -> List['Concrete']:
         return [self]
-
-    ################################################
-    # Internal Functions
-    ################################################
-
-    def _state_realization_payload(self, state: State) -> Optional[Payload]:
-        "Creates a payload to realize the given state."
-        payload = Payload().state(state.toggled_on)
-        if self.is_dimmable:
-            new_brightness = int(state.toggled_on) * state.color.hsv_v
-            payload = payload.brightness(new_brightness)
-        if self.is_white_spec and not self.is_color:
-            # ToDo
-            pass
-        if self.is_color:
-            payload = payload.color(state.color, self.vendor)
-        return payload
@@ -1,8 +1,8 @@
 "A module containing the state of a light."
 
-from colormath.color_conversions import convert_color
-from colormath.color_objects import xyYColor, HSVColor
+from color_utils import HSVColor
 from comm import payload
+from lighting import conversion
 
 
 class State:
@@ -36,6 +36,11 @@ class State:
         "Sets the color of the state."
         self._color = new
 
+    def copy(self) -> 'State':
+        "Returns a state with a copy of the color, unaffected by later changes to this one."
+        col = self._color
+        return State(HSVColor(hsv_h=col.hsv_h, hsv_s=col.hsv_s, hsv_v=col.hsv_v))
+
     def __str__(self) -> str:
         onoff = "On" if self.toggled_on else "Off"
         return f"<{onoff} with color {self._color}>"
@@ -58,14 +63,22 @@ class State:
             if desc["color_mode"] == "xy":
                 val_x = desc["color"]["x"]
                 val_y = desc["color"]["y"]
-                xyy = xyYColor(xyy_x=val_x, xyy_y=val_y, xyy_Y=bright)
-                state.color = convert_color(xyy, HSVColor)
+                state.color = conversion.xy_to_hsv_color(val_x, val_y, bright)
         if State.__read_state(desc["state"]):
             bright = max(0.05, bright)
         else:
             bright = 0
         return state
 
+    @staticmethod
+    def read_displayed_state(desc: dict) -> 'State':
+        "Returns the state the light displays according to its report, dark if it is off."
+        state = State.read_light_state(desc).copy()
+        if "brightness" in desc and desc.get("color_mode") != "xy":
+            state.color.hsv_v = State.__read_brightness(desc["brightness"])
+        state.toggled_on = State.__read_state(desc["state"])
+        return state
+
     @staticmethod
     def __read_brightness(val: str) -> float:
         "Returns the white temperature as scale based on the value retrieved from the device."
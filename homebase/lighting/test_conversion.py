@@ -0,0 +1,61 @@
+import os
+import random
+import sys
+import unittest
+
+from colormath.color_conversions import convert_color
+from colormath.color_objects import HSVColor, xyYColor
+
+sys.path.append(os.getcwd())
+
+from enums import Vendor
+from lighting import conversion
+
+
+class TestXyConversion(unittest.TestCase):
+    "Testing the native xy to hsv conversion against colormath."
+
+    def setUp(self):
+        rand = random.Random(7)
+        self.reports = [
+            (rand.uniform(0.15, 0.6), rand.uniform(0.1, 0.6), rand.random()) for _ in range(200)
+        ]
+
+    def _assert_close(self, actual, expected, tol):
+        # Hue is given in degrees and wraps around.
+        hue_diff = abs(actual[0] - expected.hsv_h) % 360
+        self.assertLess(min(hue_diff, 360 - hue_diff), 360 * tol)
+        self.assertAlmostEqual(actual[1], expected.hsv_s, delta=tol)
+        self.assertAlmostEqual(actual[2], expected.hsv_v, delta=tol)
+
+    def test_matches_colormath(self):
+        "Checks that the native conversion reproduces colormath's results."
+        for (val_x, val_y, bright) in self.reports:
+            expected = convert_color(xyYColor(xyy_x=val_x, xyy_y=val_y, xyy_Y=bright), HSVColor)
+            self._assert_close(conversion.xy_to_hsv(val_x, val_y, bright), expected, 1e-6)
+
+    def test_many(self):
+        "Checks that converting many reports equals converting them one by one."
+        singles = [conversion.xy_to_hsv(*report) for report in self.reports]
+        self.assertEqual(conversion.xy_to_hsv_many(self.reports), singles)
+
+    def test_grid_within_gamut(self):
+        "Checks that the lookup grid stays close to the exact conversion within the gamut."
+        grid = conversion.grid_for(Vendor.Hue)
+        assert grid is not None
+        inside = [r for r in self.reports if conversion.HUE_GAMUT.contains(r[0], r[1])]
+        self.assertTrue(len(inside) > 0)
+        for (val_x, val_y, bright) in inside:
+            if bright < 0.1:
+                continue
+            expected = HSVColor(*conversion.xy_to_hsv(val_x, val_y, bright))
+            # Saturation changes quickly close to the border of the gamut.
+            self._assert_close(grid.lookup(val_x, val_y, bright), expected, 0.1)
+            self.assertEqual(grid.lookup(val_x, val_y, bright), grid.lookup(val_x, val_y, bright))
+
+    def test_unknown_gamut(self):
+        "Checks that vendors without known gamut have no grid."
+        self.assertIsNone(conversion.grid_for(Vendor.Tuya))
+
+if __name__ == '__main__':
+    unittest.main()
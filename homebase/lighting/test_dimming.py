@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from comm.payload import Bright
+from enums import DeviceModel
+from lighting import Config, config, types
+from lighting.dimming import DimmingSessions
+
+
+class TestDimmingSessions(unittest.TestCase):
+    "Testing the brightness estimates of lights dimming on their own."
+
+    def setUp(self):
+        self.sessions = DimmingSessions()
+        cfg = Config(toggled_on=config.Override.perm(True))
+        self.light = types.regular("Light", "Room", "icon", "1", DeviceModel.IkeaDimmable, cfg)
+        self.speed = 10
+        # Seconds needed to dim through the whole range.
+        self.full = Bright.max / self.speed
+
+    def test_estimate_moves_with_time(self):
+        "Checks that the estimate follows the elapsed time and the direction."
+        self.sessions.start(self.light, 0.5, down=False, now=0.0, speed=self.speed)
+        self.assertTrue(self.sessions.is_dimming(self.light))
+        self.assertAlmostEqual(self.sessions.stop(self.light, now=self.full / 4), 0.75)
+        self.assertFalse(self.sessions.is_dimming(self.light))
+        self.sessions.start(self.light, 0.5, down=True, now=0.0, speed=self.speed)
+        self.assertAlmostEqual(self.sessions.stop(self.light, now=self.full / 4), 0.25)
+
+    def test_estimate_is_bounded(self):
+        "Checks that dimming long enough ends at the bounds of the range."
+        self.sessions.start(self.light, 0.9, down=False, now=0.0, speed=self.speed)
+        self.assertEqual(self.sessions.stop(self.light, now=self.full), 1.0)
+        self.sessions.start(self.light, 0.1, down=True, now=0.0, speed=self.speed)
+        self.assertEqual(self.sessions.stop(self.light, now=self.full), 0.0)
+
+    def test_report_reconciles_once(self):
+        "Checks that only the first report after a session ended reconciles it."
+        self.assertFalse(self.sessions.take_report(self.light))
+        self.sessions.start(self.light, 0.5, down=False, now=0.0)
+        self.assertFalse(self.sessions.take_report(self.light))
+        self.sessions.stop(self.light, now=1.0)
+        self.assertTrue(self.sessions.take_report(self.light))
+        self.assertFalse(self.sessions.take_report(self.light))
+
+    def test_restart_drops_pending_report(self):
+        "Checks that a new session supersedes the report owed by the previous one."
+        self.sessions.start(self.light, 0.5, down=False, now=0.0)
+        self.sessions.stop(self.light, now=1.0)
+        self.sessions.start(self.light, 0.6, down=True, now=2.0)
+        self.assertFalse(self.sessions.take_report(self.light))
+
+    def test_stop_without_start(self):
+        "Checks that stopping a light that is not dimming yields no estimate and owes no report."
+        self.assertIsNone(self.sessions.stop(self.light, now=1.0))
+        self.assertFalse(self.sessions.take_report(self.light))
+
+
+if __name__ == '__main__':
+    unittest.main()
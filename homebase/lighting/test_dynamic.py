@@ -0,0 +1,24 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from lighting import dynamic
+
+
+class TestDynamic(unittest.TestCase):
+    "Testing the colors of the dynamic curve."
+
+    def test_table_matches_zones(self):
+        "Checks that the precomputed color of every half hour is the one computed from the zones."
+        for slot in range(48):
+            time = slot / 2 + 0.25
+            self.assertEqual(dynamic._half_hour(time), slot)  # pylint: disable=protected-access
+            color = dynamic._computed_color(time)  # pylint: disable=protected-access
+            expected = dynamic._HALF_HOURS[slot]  # pylint: disable=protected-access
+            self.assertEqual((color.hsv_h, color.hsv_s, color.hsv_v), expected, f"slot {slot}")
+
+
+if __name__ == '__main__':
+    unittest.main()
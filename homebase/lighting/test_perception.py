@@ -0,0 +1,60 @@
+import os
+import sys
+import unittest
+from datetime import datetime
+from queue import Queue
+
+sys.path.append(os.getcwd())
+
+from colormath.color_objects import HSVColor
+from controller import Refresher
+from lighting import State, perception
+from scheduler import Scheduler
+from simulation import synthetic
+from timer_wheel import TimerWheel
+
+
+def _state(hue: float, sat: float, val: float) -> State:
+    return State(HSVColor(hsv_h=hue, hsv_s=sat, hsv_v=val))
+
+
+class TestPerception(unittest.TestCase):
+    "Testing the perceptual difference between states."
+
+    def setUp(self):
+        lights = synthetic.home(3).flatten_lights()
+        (self.color, self.dimmable, self.outlet) = lights
+
+    def test_small_changes_are_imperceptible(self):
+        "Checks that a slight change stays below the threshold."
+        delta = perception.delta_e_for(self.color, _state(0.1, 0.8, 0.6), _state(0.101, 0.8, 0.602))
+        self.assertLess(delta, perception.DEFAULT_THRESHOLD)
+
+    def test_large_changes_are_perceptible(self):
+        "Checks that a change of hue exceeds the threshold."
+        delta = perception.delta_e_for(self.color, _state(0.1, 0.8, 0.6), _state(0.3, 0.8, 0.6))
+        self.assertGreater(delta, perception.DEFAULT_THRESHOLD)
+
+    def test_only_displayable_differences_count(self):
+        "Checks that only differences the light can display count."
+        (old, new) = (_state(0.1, 0.8, 0.6), _state(0.6, 0.2, 0.6))
+        self.assertEqual(perception.delta_e_for(self.dimmable, old, new), 0.0)
+        self.assertEqual(perception.delta_e_for(self.outlet, old, _state(0.1, 0.8, 0.9)), 0.0)
+        off = _state(0.1, 0.8, 0.0)
+        self.assertEqual(perception.delta_e_for(self.outlet, old, off), perception.SWITCH)
+
+
+class TestRefresher(unittest.TestCase):
+    "Testing the scheduling of refreshes along the dynamic curve."
+
+    def test_delay_is_bounded(self):
+        "Checks that the delay between refreshes stays within its bounds."
+        refresher = Refresher(Queue(), Scheduler(TimerWheel()))
+        for hour in range(24):
+            delay = refresher.next_delay(datetime(2026, 1, 1, hour, 50))
+            self.assertGreaterEqual(delay, Refresher.MIN_PERIOD)
+            self.assertLessEqual(delay, Refresher.PERIOD)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from api.command import Exec
+from enums import ApiCommand
+from home.decoder import decode
+from lighting.transition import Transitions
+from simulation import synthetic
+from timer_wheel import TimerWheel
+
+
+class RecordingClient:
+    "Records publishes instead of sending them."
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, payload=None, *_args, **_kwargs):
+        self.published.append((topic, payload))
+
+
+class TestScene(unittest.TestCase):
+    "Testing decoding, applying, and storing scenes."
+
+    def setUp(self):
+        spec = synthetic.home_spec(3)
+        spec["rooms"][0]["scenes"] = [
+            {
+                "name": "Movie",
+                "id": 1,
+                "lights": [
+                    { "light": "Light 0", "hue": 0.6, "saturation": 0.8, "brightness": 0.3 },
+                    { "light": "Light 2", "toggled_on": False },
+                ],
+            },
+            {
+                "name": "Night",
+                "id": 2,
+                "controls": "Corner",
+                "stored": True,
+                "lights": [{ "light": "Light 2" }],
+            },
+        ]
+        self.home = decode(spec)
+        self.room = self.home.rooms[0]
+        self.lights = { light.name: light for light in self.room.group.flatten_lights() }
+        self.client = RecordingClient()
+        transitions = Transitions(self.client, TimerWheel())
+        self.exec = Exec(self.home, self.client, transitions)  # type: ignore
+
+    def test_decoding(self):
+        "Checks that the states and targets of scenes are read as specified."
+        movie = self.room.scene_by_name("Movie")
+        assert movie is not None
+        (light, state) = movie.states[0]
+        self.assertIs(light, self.lights["Light 0"])
+        self.assertAlmostEqual(state.color.hsv_h, 0.6)
+        self.assertAlmostEqual(state.color.hsv_v, 0.3)
+        self.assertFalse(movie.states[1][1].toggled_on)
+        self.assertEqual(movie.target, self.room.group.topic)
+        night = self.room.scene_by_name("Night")
+        assert night is not None
+        self.assertTrue(night.stored)
+        self.assertEqual(night.target, self.room.group.groups[0].topic)
+
+    def test_apply_publishes_every_light(self):
+        "Checks that applying a scene publishes once per light and overrides their configuration."
+        self.exec.exec(self.room.topic, ApiCommand.ApplyScene, { "scene": "Movie" })
+        topics = [topic for (topic, _) in self.client.published]
+        expected = [self.lights["Light 0"].set_topic(), self.lights["Light 2"].set_topic()]
+        self.assertEqual(topics, expected)
+        self.assertEqual(json.loads(self.client.published[1][1])["state"], "OFF")
+        self.assertFalse(self.lights["Light 0"].config.dynamic.value)
+
+    def test_apply_stored_recalls_from_target(self):
+        "Checks that a stored scene is recalled with a single publish to its target."
+        self.exec.exec(self.room.topic, ApiCommand.ApplyScene, { "scene": "Night" })
+        target = self.room.group.groups[0].topic.as_set()
+        self.assertEqual(self.client.published, [(target, json.dumps({ "scene_recall": 2 }))])
+
+    def test_store_publishes_states_then_stores(self):
+        "Checks that storing a scene realizes its states before the target stores them."
+        self.exec.exec(self.room.topic, ApiCommand.StoreScene, { "scene": "Night" })
+        (realize, store) = self.client.published
+        self.assertEqual(realize[0], self.lights["Light 2"].set_topic())
+        self.assertEqual(store[0], self.room.group.groups[0].topic.as_set())
+        self.assertEqual(json.loads(store[1]), { "scene_store": { "ID": 2, "name": "Night" } })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,16 @@
 import os
 import sys
 import unittest
+from datetime import datetime, timedelta
 
 from colormath.color_objects import HSVColor
 
 sys.path.append(os.getcwd())
 
 import color_utils as cutils
-from enums import DeviceModel
-from lighting import Config, State, config, types, Abstract
+from enums import Capability, DeviceModel
+from lighting import Config, Group, State, config, types, Abstract
+from lighting.expiry import ExpiryIndex
 
 
 class TestColorOverride(unittest.TestCase):
@@ -59,5 +61,51 @@ class TestColorOverride(unittest.TestCase):
         res = self._override_and_resolve(light, desired=self.shade_of_blue)
         self.assertTrue(cutils.equal(res.color, self.shade_of_blue))
 
+
+class TestOverrideExpiry(unittest.TestCase):
+    "Testing the expiry of temporary overrides."
+
+    def setUp(self):
+        cfg = Config(toggled_on=config.Override.perm(True), ttl=timedelta(minutes=5))
+        self.light = types.regular("A", "B", "C", "D", DeviceModel.HueColor, cfg)
+        self.index = ExpiryIndex()
+
+    def test_expiry(self):
+        "Checks that color overrides expire after the ttl and only then."
+        self.light.update_color(desired=HSVColor(hsv_h=0.5, hsv_s=0.5, hsv_v=0.5))
+        self.index.track(self.light, self.light.config.ttl)
+        expires = self.index.next_deadline()
+        assert expires is not None
+        self.assertEqual(self.index.evict_due(expires - timedelta(seconds=1)), [])
+        self.assertEqual(self.light.config.hue.value, 0.5)
+        self.assertEqual(self.index.evict_due(expires + timedelta(seconds=1)), [self.light])
+        self.assertIsNone(self.light.config.hue.value)
+        self.assertIsNone(self.index.next_deadline())
+
+    def test_reset_override_is_stale(self):
+        "Checks that setting an override again supersedes its earlier expiry."
+        self.light.update_color(desired=HSVColor(hsv_h=0.5, hsv_s=0.5, hsv_v=0.5))
+        self.index.track(self.light, self.light.config.ttl)
+        self.light.config.hue.set_temp(0.7)
+        self.assertEqual(self.index.evict_due(datetime.now() + timedelta(minutes=6)), [self.light])
+        self.assertEqual(self.light.config.hue.value, 0.7)
+
+class TestCapabilities(unittest.TestCase):
+    "Testing the aggregated capabilities of groups."
+
+    def test_invalidated_on_membership_change(self):
+        cfg = Config(toggled_on=config.Override.perm(True))
+        outlet = types.simple("O", "R", "I", "1", DeviceModel.IkeaOutlet, cfg)
+        bulb = types.regular("B", "R", "I", "2", DeviceModel.HueColor, cfg)
+        inner = Group([outlet], "Inner", "R", [], ["Outer"], cfg)
+        outer = Group([], "Outer", "R", [inner], [], cfg)
+        self.assertEqual(outer.capabilities, Capability.Nothing)
+        self.assertFalse(outer.is_color)
+        inner.add_light(bulb)
+        self.assertTrue(outer.is_color and outer.is_dimmable and inner.is_white_spec)
+        inner.remove_light(bulb)
+        self.assertFalse(outer.is_dimmable)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.getcwd())
+
+from color_utils import HSVColor
+from enums import DeviceModel
+from lighting import Config, State, config, types
+from lighting.transition import Transitions
+from timer_wheel import TimerWheel
+
+
+class RecordingClient:
+    "Records publishes instead of sending them."
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, payload=None):
+        self.published.append((topic, payload))
+
+
+class TestTransitions(unittest.TestCase):
+    "Testing native and software fades."
+
+    def setUp(self):
+        self.client = RecordingClient()
+        self.wheel = TimerWheel(tick=0.1)
+        self.transitions = Transitions(self.client, self.wheel)  # type: ignore
+        cfg = Config(toggled_on=config.Override.perm(True))
+        self.hue = types.regular("Hue", "Room", "icon", "1", DeviceModel.HueColor, cfg)
+        self.outlet = types.simple("Outlet", "Room", "icon", "2", DeviceModel.IkeaOutlet, cfg)
+        self.dark = State(HSVColor(hsv_h=0.0, hsv_s=0.0, hsv_v=0.0))
+        self.bright = State(HSVColor(hsv_h=0.5, hsv_s=1.0, hsv_v=1.0))
+
+    def test_native_fade_is_single_publish(self):
+        "Checks that lights supporting transitions receive exactly one payload."
+        self.transitions.realize(self.hue, self.dark)
+        self.transitions.realize(self.hue, self.bright, duration=10)
+        self.wheel.advance(200)
+        self.assertEqual(len(self.client.published), 2)
+        self.assertIn(b'"transition": 10', self.client.published[-1][1])
+
+    def test_software_fade_skips_redundant_steps(self):
+        "Checks that a fade of an on/off light results in a single publish when it switches."
+        self.transitions.realize(self.outlet, self.dark)
+        self.transitions.realize(self.outlet, self.bright, duration=10)
+        self.assertEqual(len(self.client.published), 1)
+        self.wheel.advance(200)
+        self.assertEqual(len(self.client.published), 2)
+        self.assertIn(b'"ON"', self.client.published[-1][1])
+
+    def test_superseded_fade_is_dropped(self):
+        "Checks that pending steps of a fade do not fire after a new state was realized."
+        self.transitions.realize(self.outlet, self.bright)
+        self.transitions.realize(self.outlet, self.dark, duration=10)
+        self.transitions.realize(self.outlet, self.bright)
+        self.wheel.advance(200)
+        self.assertEqual(len(self.client.published), 2)
+
+    def test_unavailable_light_is_skipped(self):
+        "Checks that neither realizing nor pending steps publish to an unavailable light."
+        self.transitions.realize(self.outlet, self.dark)
+        self.transitions.realize(self.outlet, self.bright, duration=10)
+        self.outlet.available = False
+        self.transitions.realize(self.hue, self.bright)
+        self.transitions.realize(self.outlet, self.dark)
+        self.wheel.advance(200)
+        self.assertEqual([topic for (topic, _) in self.client.published], [
+            self.outlet.set_topic(), self.hue.set_topic(),
+        ])
+
+    def test_deviating_report_is_not_skipped(self):
+        "Checks that a light reporting a state other than the realized one is refreshed again."
+        self.transitions.realize(self.hue, self.bright)
+        self.transitions.observe(self.hue, self.bright.copy(), threshold=2.0)
+        self.transitions.realize(self.hue, self.bright, threshold=2.0)
+        self.assertEqual(len(self.client.published), 1)
+        self.transitions.observe(self.hue, self.dark, threshold=2.0)
+        self.transitions.realize(self.hue, self.bright, threshold=2.0)
+        self.assertEqual(len(self.client.published), 2)
+
+if __name__ == '__main__':
+    unittest.main()
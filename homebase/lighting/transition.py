@@ -0,0 +1,181 @@
+"""
+Fades lights from their last realized state into a new one.
+Lights supporting zigbee transitions receive a single publish and fade on their own.
+All other lights are interpolated in software: the steps of all lights are batched per tick of
+the timer wheel and steps that would not change the payload are never published.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from color_utils import HSVColor
+from comm.payload import Bright
+from common import Log
+from lighting import perception
+from lighting.source import Abstract, Concrete
+from lighting.state import State
+from paho.mqtt import client as mqtt
+from timer_wheel import TimerWheel
+
+# Duration of the fade when lights are refreshed to follow the dynamic curve.
+REFRESH_FADE = 30.0
+# Minimal time between two software steps of the same light, so the mesh does not get flooded.
+MIN_STEP_INTERVAL = 0.5
+
+
+def interpolate(start: State, target: State, frac: float) -> State:
+    "Returns the state frac ∈ [0,1] of the way from start to target, taking the short way round."
+    (src, dst) = (start.color, target.color)
+    hue_delta = ((dst.hsv_h - src.hsv_h + 0.5) % 1.0) - 0.5
+    return State(HSVColor(
+        hsv_h=(src.hsv_h + frac * hue_delta) % 1.0,
+        hsv_s=src.hsv_s + frac * (dst.hsv_s - src.hsv_s),
+        hsv_v=src.hsv_v + frac * (dst.hsv_v - src.hsv_v),
+    ))
+
+
+class _Fade:
+    "A fade of a single light."
+
+    def __init__(self, start: State, target: State, begin: float, duration: float):
+        self.start    = start
+        self.target   = target
+        self.begin    = begin
+        self.duration = duration
+
+    def at(self, now: float) -> State:
+        "Estimates the state of the light at the given time."
+        if self.duration <= 0 or now >= self.begin + self.duration:
+            return self.target
+        return interpolate(self.start, self.target, (now - self.begin) / self.duration)
+
+
+Step = Tuple[Concrete, bytes, _Fade]
+
+
+class Transitions:
+    """
+        Plans and executes fades for arbitrarily many lights on a single timer wheel.
+        Fades are planned on the api thread and stepped on the wheel thread; the lock keeps a step
+        from being published after its fade was superseded.
+    """
+
+    def __init__(self, client: mqtt.Client, wheel: TimerWheel):
+        self.__client = client
+        self.__wheel  = wheel
+        self.__fades: Dict[str, _Fade] = {}
+        self.__lock   = threading.Lock()
+
+    def realize(
+        self,
+        light: Abstract,
+        target: State,
+        duration: Optional[float] = None,
+        threshold: float = 0.0,
+    ):
+        """
+            Realizes the target state for all lights of light, fading within duration seconds.
+            Skips unavailable lights and lights whose last realized state differs from the target
+            by less than the perceptual threshold, in ΔE.
+        """
+        now = time.monotonic()
+        batches: Dict[int, List[Step]] = {}
+        with self.__lock:
+            for conc in light.flatten_lights():
+                if not conc.available:
+                    continue
+                running = self.__fades.get(conc.topic.string)
+                if threshold > 0 and running is not None:
+                    if perception.delta_e_for(conc, running.target, target) < threshold:
+                        continue
+                for (tick, step) in self.__plan(conc, target, duration, now):
+                    batches.setdefault(tick, []).append(step)
+        for tick, steps in batches.items():
+            self.__wheel.schedule_at_tick(tick, lambda steps=steps: self.__publish(steps))
+
+    def assume(self, light: Concrete, state: State):
+        "Records that the light was brought into the given state by other means."
+        fade = _Fade(state.copy(), state.copy(), time.monotonic(), 0)
+        with self.__lock:
+            self.__fades[light.topic.string] = fade
+
+    def observe(self, light: Concrete, reported: State, threshold: float):
+        """
+            Compares a state the light reported with the one last realized, once its fade is over.
+            Forgets the latter if they differ by at least the threshold, e.g. after the light was
+            changed by other means, so the next refresh is not skipped.
+        """
+        if threshold <= 0:
+            return
+        with self.__lock:
+            fade = self.__fades.get(light.topic.string)
+            if fade is None or time.monotonic() < fade.begin + fade.duration:
+                return
+            if perception.delta_e_for(light, fade.target, reported) >= threshold:
+                Log.utl.debug("%s deviates from its last realized state.", light.topic)
+                del self.__fades[light.topic.string]
+
+    def forget(self, light: Abstract):
+        "Aborts running fades and forgets the state of the lights, e.g. when they dim on their own."
+        with self.__lock:
+            for conc in light.flatten_lights():
+                self.__fades.pop(conc.topic.string, None)
+
+    def __plan(
+        self,
+        light: Concrete,
+        target: State,
+        duration: Optional[float],
+        now: float,
+    ) -> Iterable[Tuple[int, Step]]:
+        "Plans the fade of a single light; called with the lock held."
+        key = light.topic.string
+        target = target.copy()
+        running = self.__fades.get(key)
+        if duration and light.supports_transition:
+            # The device knows where it starts from, even if we do not.
+            start = running.at(now) if running is not None else target
+            self.__fades[key] = _Fade(start, target, now, duration)
+            light.realize_state(self.__client, target, transition=duration)
+            return []
+        if running is None or not duration:
+            self.__fades[key] = _Fade(target, target, now, 0)
+            light.realize_state(self.__client, target)
+            return []
+        fade = _Fade(running.at(now), target, now, duration)
+        self.__fades[key] = fade
+        return self.__software_steps(light, fade)
+
+    def __software_steps(self, light: Concrete, fade: _Fade) -> List[Tuple[int, Step]]:
+        count = self.__step_count(light, fade)
+        first = self.__wheel.now
+        res = []
+        previous = light.payload_for(fade.start)
+        for idx in range(1, count + 1):
+            payload = light.payload_for(interpolate(fade.start, fade.target, idx / count))
+            if payload is None or payload == previous:
+                continue
+            previous = payload
+            tick = first + self.__wheel.ticks_for(fade.duration * idx / count)
+            res.append((tick, (light, payload, fade)))
+        Log.utl.debug("Fading %s in %d of %d steps.", light.topic, len(res), count)
+        return res
+
+    def __step_count(self, light: Concrete, fade: _Fade) -> int:
+        "Returns the number of steps needed to change the payload by one unit per step."
+        (src, dst) = (fade.start.color, fade.target.color)
+        units = 1
+        if light.is_dimmable:
+            units = max(units, int(abs(dst.hsv_v - src.hsv_v) * Bright.max))
+        if light.is_color:
+            hue_delta = abs(((dst.hsv_h - src.hsv_h + 0.5) % 1.0) - 0.5)
+            units = max(units, int(hue_delta * 360), int(abs(dst.hsv_s - src.hsv_s) * 100))
+        return max(1, min(units, int(fade.duration / MIN_STEP_INTERVAL)))
+
+    def __publish(self, steps: List[Step]):
+        with self.__lock:
+            for (light, payload, fade) in steps:
+                # Skip steps of fades that were superseded in the meantime.
+                if self.__fades.get(light.topic.string) is fade and light.available:
+                    self.__client.publish(light.set_topic(), payload)
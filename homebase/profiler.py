@@ -0,0 +1,161 @@
+"Time-bounded profiling sessions across all threads of the running home base."
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import List
+
+from common import Log
+from homebaseerror import HomeBaseError
+
+MAX_SECONDS = 60.0
+DEFAULT_INTERVAL = 0.005
+TOP = 25
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Samples:
+    "Stacks of all threads sampled at a fixed interval."
+
+    def __init__(self):
+        self.stacks: Counter = Counter()
+        self.rounds = 0
+
+    def take(self, skip: int):
+        "Records the current stack of every thread but the one with the given ident."
+        names = { thread.ident: thread.name for thread in threading.enumerate() }
+        for (ident, frame) in sys._current_frames().items():  # pylint: disable=protected-access
+            if ident == skip:
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+        self.rounds += 1
+
+    def collapsed(self) -> str:
+        "Returns the stacks in collapsed format, one `frame;frame;frame count` line per stack."
+        stacks = self.stacks.most_common()
+        return "\n".join(f"{';'.join(stack)} {count}" for (stack, count) in stacks)
+
+    def text(self, top: int = TOP) -> str:
+        "Returns the hottest stacks and functions in readable form."
+        total = sum(self.stacks.values()) or 1
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for (stack, count) in self.stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack[1:]):
+                inclusive[frame] += count
+        lines = [f"{self.rounds} rounds, {total} samples", "", "Hot functions (self):"]
+        lines += [f"{count / total:7.1%}  {frame}" for (frame, count) in own.most_common(top)]
+        lines += ["", "Hot functions (inclusive):"]
+        lines += [f"{count / total:7.1%}  {frame}" for (frame, count) in inclusive.most_common(top)]
+        lines += ["", "Hot stacks:"]
+        for (stack, count) in self.stacks.most_common(top):
+            lines.append(f"{count / total:7.1%}  {stack[0]}")
+            lines += [f"           {frame}" for frame in stack[1:]]
+        return "\n".join(lines)
+
+
+class Profiler:
+    """
+        Runs one profiling session at a time on the calling thread, which is excluded from the
+        results.  Sampling sees every thread; cProfile sees every thread only from Python 3.12 on,
+        where it is built on sys.monitoring.
+    """
+
+    MODES = ["sample", "cprofile"]
+    FORMATS = ["text", "collapsed"]
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+
+    def session(
+        self,
+        mode: str = "sample",
+        seconds: float = 10.0,
+        interval: float = DEFAULT_INTERVAL,
+        fmt: str = "text",
+        memory: bool = True,
+    ) -> str:
+        """
+            Profiles for the given number of seconds and returns the report.
+            In collapsed format, allocations are appended as stacks rooted at `tracemalloc` counting
+            bytes.
+        """
+        if mode not in Profiler.MODES or fmt not in Profiler.FORMATS:
+            raise HomeBaseError.WebRequestParseError
+        if mode == "cprofile" and (fmt == "collapsed" or sys.version_info < (3, 12)):
+            raise HomeBaseError.ProfilerUnavailable
+        seconds = min(max(seconds, 0.0), MAX_SECONDS)
+        if not self.__lock.acquire(blocking=False):
+            raise HomeBaseError.ProfilerBusy
+        try:
+            Log.utl.info("Profiling with %s for %.1f seconds.", mode, seconds)
+            started_tracing = memory and not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            try:
+                if mode == "sample":
+                    report = self.__sample(seconds, max(interval, 0.001), fmt)
+                else:
+                    report = self.__cprofile(seconds)
+                if memory:
+                    report += "\n\n" + Profiler.__allocations(tracemalloc.take_snapshot(), fmt)
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+            return report
+        finally:
+            self.__lock.release()
+
+    @staticmethod
+    def __sample(seconds: float, interval: float, fmt: str) -> str:
+        samples = Samples()
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while True:
+            samples.take(skip=me)
+            if time.monotonic() + interval > deadline:
+                break
+            time.sleep(interval)
+        return samples.collapsed() if fmt == "collapsed" else samples.text()
+
+    @staticmethod
+    def __cprofile(seconds: float) -> str:
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            time.sleep(seconds)
+        finally:
+            prof.disable()
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP)
+        return out.getvalue()
+
+    @staticmethod
+    def __allocations(snapshot: tracemalloc.Snapshot, fmt: str, top: int = TOP) -> str:
+        stats = snapshot.statistics("lineno")[:top]
+        if fmt == "collapsed":
+            frames = [stat.traceback[0] for stat in stats]
+            return "\n".join(
+                f"tracemalloc;{os.path.basename(frame.filename)}:{frame.lineno} {stat.size}"
+                for (frame, stat) in zip(frames, stats)
+            )
+        return "\n".join(["Top allocations:"] + [f"  {stat}" for stat in stats])
+
+
+# The profiler shared by the process.
+PROFILER = Profiler()
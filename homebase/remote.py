@@ -7,7 +7,6 @@ from typing import Callable, Dict, List, Optional
 from comm import ApiCommand, Topic
 from device import Device
 from enums import DeviceModel
-from homebaseerror import HomeBaseError
 
 
 class RemoteButton(Enum):
@@ -98,10 +97,11 @@ class Remote(Device):
 
     def cmd_for_action(self, action: str) -> Optional[ApiCommand]:
         "Returns the api command corresponding to the button press if defined."
-        button = self._button_from_str(action)
-        if button is None:
-            raise HomeBaseError.InvalidRemoteAction
-        return self._actions[button]
+        return self.dispatch().get(action)
+
+    def dispatch(self) -> Dict[str, ApiCommand]:
+        "Returns the api command of every defined action by the action's string."
+        return { button.string: cmd for (button, cmd) in self._actions.items() }
 
     @staticmethod
     def default_dimmer(room: str, icon: str, ident: str, controls: Topic, name: str = "Dimmer"):
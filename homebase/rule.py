@@ -0,0 +1,97 @@
+"User-defined automation rules reacting to sensors, e.g. turning on a fan when it gets humid."
+
+from typing import Dict, List, Optional, Tuple
+
+from comm import Topic
+from common import Log
+from enums import ApiCommand, SensorQuantity
+
+
+class Rule:
+    """
+        Issues an API command to a target when a quantity of a sensor crosses a threshold, and
+        optionally another one when it crosses back.  Crossing back requires passing the threshold
+        by the hysteresis, so values jittering around the threshold do not toggle the target.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sensor: Topic,
+        quantity: SensorQuantity,
+        threshold: float,
+        above: bool,
+        command: ApiCommand,
+        target: Topic,
+        otherwise: Optional[ApiCommand] = None,
+        hysteresis: float = 0.0,
+    ):
+        self.name       = name
+        self.sensor     = sensor
+        self.quantity   = quantity
+        self.threshold  = threshold
+        self.above      = above
+        self.command    = command
+        self.target     = target
+        self.otherwise  = otherwise
+        self.hysteresis = hysteresis
+        self.active: Optional[bool] = None  # Unknown until the first value arrives.
+
+    def evaluate(self, value: float) -> Optional[ApiCommand]:
+        "Feeds a new value of the quantity.  Returns the command to issue if the rule flipped."
+        sign = 1 if self.above else -1
+        if sign * (value - self.threshold) > 0:
+            active = True
+        elif sign * (value - self.threshold) < -self.hysteresis:
+            active = False
+        else:
+            return None
+        (was, self.active) = (self.active, active)
+        if was == active:
+            return None
+        if active:
+            return self.command
+        # Switching off is reserved for rules that were on, so starting up changes nothing.
+        return self.otherwise if was else None
+
+    def __str__(self) -> str:
+        rel = ">" if self.above else "<"
+        return (f"{self.name}: {self.quantity.name} {rel} {self.threshold} at {self.sensor} "
+                f"→ {self.command.name} {self.target}")
+
+
+class RuleEngine:
+    """
+        Indexes rules by sensor topic and quantity, so a sensor update only evaluates the rules
+        depending on it, and only if the value changed.
+    """
+
+    def __init__(self, rules: List[Rule]):
+        self.__index: Dict[Tuple[str, SensorQuantity], List[Rule]] = { }
+        self.__last: Dict[Tuple[str, SensorQuantity], float] = { }
+        for rule in rules:
+            Log.utl.info("Installing rule %s.", rule)
+            self.__index.setdefault((rule.sensor.string, rule.quantity), []).append(rule)
+
+    def __len__(self) -> int:
+        return sum(map(len, self.__index.values()))
+
+    def feed(
+        self,
+        sensor: Topic,
+        quantity: SensorQuantity,
+        value: float,
+    ) -> List[Tuple[ApiCommand, Topic]]:
+        "Feeds a sensor value.  Returns the commands to issue with their targets."
+        key = (sensor.string, quantity)
+        rules = self.__index.get(key)
+        if rules is None or self.__last.get(key) == value:
+            return []
+        self.__last[key] = value
+        res = []
+        for rule in rules:
+            cmd = rule.evaluate(value)
+            if cmd is not None:
+                Log.utl.info("Rule %s fired at %s, issuing %s.", rule.name, value, cmd.name)
+                res.append((cmd, rule.target))
+        return res
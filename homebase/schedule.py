@@ -0,0 +1,36 @@
+"User-defined schedules, e.g. turning off the lights of a room at night."
+
+from datetime import time
+from queue import Queue
+from typing import List
+
+from comm import QData, Topic
+from common import Log
+from enums import ApiCommand
+from scheduler import Scheduler
+
+
+class Schedule:
+    "Issues an API command to a target every day at a fixed time."
+
+    def __init__(self, name: str, at: time, command: ApiCommand, target: Topic):
+        self.name    = name
+        self.at      = at
+        self.command = command
+        self.target  = target
+
+    def qdata(self) -> QData:
+        "Returns the queue data issuing the command."
+        return QData.api_command(self.target, self.command, payload={ })
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.command.name} {self.target} at {self.at:%H:%M}"
+
+
+def install(schedules: List[Schedule], queue: Queue, scheduler: Scheduler) -> List[int]:
+    "Registers the schedules, which issue their commands over the queue.  Returns the job ids."
+    jobs = []
+    for schedule in schedules:
+        Log.utl.info("Installing schedule %s.", schedule)
+        jobs.append(scheduler.daily(schedule.at, lambda s=schedule: queue.put(s.qdata())))
+    return jobs
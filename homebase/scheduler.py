@@ -0,0 +1,94 @@
+"Runs one-off, periodic, and daily jobs on the timer wheel."
+
+import itertools
+import threading
+from datetime import datetime, time, timedelta
+from typing import Dict, Optional
+
+from common import Log
+from timer_wheel import Callback, TimerWheel
+
+
+class Scheduler:
+    """
+        Schedules jobs on a timer wheel, so no job requires a thread of its own.
+        Recurring jobs keep their identity across runs, so they can be cancelled at any time.
+        Jobs may be scheduled and cancelled from any thread.  Runs are armed under the lock, so
+        they cannot fire before their handle is stored; callbacks run without it.
+    """
+
+    def __init__(self, wheel: TimerWheel):
+        self.__wheel = wheel
+        self.__ids = itertools.count()
+        self.__handles: Dict[int, int] = {}  # Job id to the wheel handle of its next run.
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__handles)
+
+    def after(self, delay: float, callback: Callback) -> int:
+        "Runs the callback once after delay seconds.  Returns the job id."
+        job = next(self.__ids)
+        with self.__lock:
+            self.__handles[job] = self.__wheel.schedule(delay, self.__once(job, callback))
+        return job
+
+    def at(self, when: datetime, callback: Callback) -> int:
+        "Runs the callback once at the given point in time.  Returns the job id."
+        return self.after((when - datetime.now()).total_seconds(), callback)
+
+    def every(self, period: float, callback: Callback, immediately: bool = True) -> int:
+        "Runs the callback every period seconds.  Returns the job id."
+        job = next(self.__ids)
+        def run():
+            if self.__rearm(job, period, run):
+                callback()
+        with self.__lock:
+            self.__handles[job] = self.__wheel.schedule(0 if immediately else period, run)
+        return job
+
+    def daily(self, at: time, callback: Callback) -> int:
+        "Runs the callback every day at the given time of day.  Returns the job id."
+        job = next(self.__ids)
+        def run():
+            if self.__rearm(job, Scheduler.seconds_until(at), run):
+                callback()
+        with self.__lock:
+            self.__handles[job] = self.__wheel.schedule(Scheduler.seconds_until(at), run)
+        return job
+
+    def cancel(self, job: int) -> bool:
+        "Cancels the job.  Returns whether it was still scheduled."
+        with self.__lock:
+            handle = self.__handles.pop(job, None)
+            if handle is None:
+                return False
+            return self.__wheel.cancel(handle)
+
+    def __rearm(self, job: int, delay: float, run: Callback) -> bool:
+        "Schedules the next run of a recurring job.  Returns False if it was cancelled while due."
+        with self.__lock:
+            if job not in self.__handles:
+                return False
+            self.__handles[job] = self.__wheel.schedule(delay, run)
+            return True
+
+    def __once(self, job: int, callback: Callback) -> Callback:
+        def run():
+            with self.__lock:
+                armed = self.__handles.pop(job, None) is not None
+            if armed:
+                callback()
+        return run
+
+    @staticmethod
+    def seconds_until(at: time, now: Optional[datetime] = None) -> float:
+        "Returns the number of seconds until the time of day next occurs."
+        now = now or datetime.now()
+        target = datetime.combine(now.date(), at)
+        if target <= now:
+            target += timedelta(days=1)
+        Log.utl.debug("Next occurrence of %s is %s.", at, target)
+        return (target - now).total_seconds()
+
@@ -0,0 +1 @@
+"Offline simulation of a home: an in-process broker, fake zigbee devices, and generated traffic."
@@ -0,0 +1,29 @@
+"""
+Runs an offline load simulation.
+Usage from within the homebase directory: python -m simulation [--lights N] [--operations N]
+"""
+
+import argparse
+import json
+
+import common
+from simulation.load import Simulation
+
+
+def main():
+    "Parses arguments, runs the simulation, and prints the report."
+    parser = argparse.ArgumentParser(description="Offline load simulation of the home base.")
+    parser.add_argument("--lights", type=int, default=100)
+    parser.add_argument("--lights-per-room", type=int, default=10)
+    parser.add_argument("--operations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as json.")
+    args = parser.parse_args()
+    common.load_config()
+    sim = Simulation(args.lights, args.lights_per_room, seed=args.seed)
+    report = sim.run(args.operations)
+    print(json.dumps(report.as_dict(), indent=2) if args.json else report)
+
+
+if __name__ == "__main__":
+    main()
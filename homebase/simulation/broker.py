@@ -0,0 +1,134 @@
+"""
+An in-process stand-in for the mosquitto broker.
+Messages are delivered on a single dispatcher thread, like they would arrive over the network.
+"""
+
+import threading
+import time
+from collections import Counter
+from queue import Queue
+from typing import Callable, Dict, List, Optional, Tuple
+
+from paho.mqtt import client as mqtt
+
+Observer = Callable[[str, bytes, float], None]
+
+
+def matches(pattern: str, topic: str) -> bool:
+    "Checks whether the topic matches the subscription pattern, including mqtt wildcards."
+    pat = pattern.split("/")
+    top = topic.split("/")
+    for (idx, part) in enumerate(pat):
+        if part == "#":
+            return True
+        if idx >= len(top) or (part != "+" and part != top[idx]):
+            return False
+    return len(pat) == len(top)
+
+
+class Broker:
+    "Routes messages between local clients and counts all publishes."
+
+    def __init__(self):
+        self.__exact: Dict[str, List['LocalClient']] = {}
+        self.__wildcards: List[Tuple[str, 'LocalClient']] = []
+        self.__observers: List[Observer] = []
+        self.__inbox: Queue = Queue()
+        self.__lock = threading.Lock()
+        self.publishes: Counter = Counter()
+        self.callback_errors = 0
+        threading.Thread(target=self.__dispatch, daemon=True).start()
+
+    def subscribe(self, client: 'LocalClient', pattern: str):
+        "Subscribes the client to the pattern."
+        with self.__lock:
+            if "+" in pattern or "#" in pattern:
+                if (pattern, client) not in self.__wildcards:
+                    self.__wildcards.append((pattern, client))
+            elif client not in self.__exact.get(pattern, []):
+                self.__exact.setdefault(pattern, []).append(client)
+
+    def unsubscribe(self, client: 'LocalClient', pattern: str):
+        "Unsubscribes the client from the pattern."
+        with self.__lock:
+            if (pattern, client) in self.__wildcards:
+                self.__wildcards.remove((pattern, client))
+            elif client in self.__exact.get(pattern, []):
+                self.__exact[pattern].remove(client)
+
+    def observe(self, observer: Observer):
+        "Registers an observer seeing every publish when it is sent."
+        self.__observers.append(observer)
+
+    def publish(self, topic: str, payload: bytes):
+        "Queues the message for delivery."
+        now = time.perf_counter()
+        self.publishes[Broker.kind(topic)] += 1
+        for observer in self.__observers:
+            observer(topic, payload, now)
+        self.__inbox.put((topic, payload))
+
+    def drain(self, timeout: float = 10.0):
+        "Waits until all queued messages were delivered."
+        deadline = time.monotonic() + timeout
+        while self.__inbox.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    @staticmethod
+    def kind(topic: str) -> str:
+        "Classifies a topic for the publish statistics."
+        last = topic.rsplit("/", 1)[-1]
+        return last if last in ["set", "get"] else "report"
+
+    def __dispatch(self):
+        while True:
+            (topic, payload) = self.__inbox.get()
+            with self.__lock:
+                receivers = list(self.__exact.get(topic, []))
+                receivers += [c for (p, c) in self.__wildcards if matches(p, topic)]
+            for client in receivers:
+                client.deliver(topic, payload)
+            self.__inbox.task_done()
+
+
+class LocalClient:
+    "Offers the part of the paho client interface the home base uses, backed by a Broker."
+
+    def __init__(self, broker: Broker, name: str = "local"):
+        self.broker = broker
+        self.name = name
+        self.on_message: Optional[Callable] = None
+        self.on_disconnect: Optional[Callable] = None
+
+    def connect(self, *_args, **_kwargs):
+        "Nothing to connect to."
+
+    def loop_forever(self):
+        "Messages are delivered by the broker's dispatcher; blocks like a network loop."
+        threading.Event().wait()
+
+    def subscribe(self, topic: str, _qos: int = 0):
+        "Subscribes to the topic."
+        self.broker.subscribe(self, topic)
+
+    def unsubscribe(self, topic: str):
+        "Unsubscribes from the topic."
+        self.broker.unsubscribe(self, topic)
+
+    def publish(self, topic: str, payload=None, _qos: int = 0, _retain: bool = False, _props=None):
+        "Publishes the payload."
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        self.broker.publish(topic, payload or b"")
+
+    def deliver(self, topic: str, payload: bytes):
+        "Hands a message to the message callback."
+        if self.on_message is None:
+            return
+        message = mqtt.MQTTMessage(topic=topic.encode("utf-8"))
+        message.payload = payload
+        try:
+            self.on_message(self, None, message)
+        except Exception:  # pylint: disable=broad-except
+            # Like paho, a failing callback must not stop the delivery of further messages.
+            self.broker.callback_errors += 1
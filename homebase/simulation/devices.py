@@ -0,0 +1,83 @@
+"Fake zigbee2mqtt devices answering set and get requests like the real bridge does."
+
+import json
+import random
+from typing import Dict, List
+
+from home import Home
+from lighting import Concrete
+from remote import Remote
+from sensor import Sensor
+from simulation.broker import Broker, LocalClient
+
+
+class FakeLight:
+    "A light keeping its state and reporting it after every change or query."
+
+    def __init__(self, light: Concrete, client: LocalClient):
+        self.light = light
+        self.client = client
+        self.state: Dict = { "state": "OFF", "brightness": 254 }
+        if light.is_color:
+            self.state["color_mode"] = "hs"
+            self.state["color"] = { "hue": 0, "saturation": 0 }
+        topic = light.topic.string
+        self.__handlers = { topic + "/set": self.__set, topic + "/get": self.__get }
+        for sub in self.__handlers:
+            client.subscribe(sub)
+
+    def handle(self, topic: str, payload: bytes) -> bool:
+        "Handles the message if addressed to this light.  Returns whether it was."
+        handler = self.__handlers.get(topic)
+        if handler is None:
+            return False
+        handler(json.loads(payload.decode("utf-8")) if payload else { })
+        return True
+
+    def __set(self, data: dict):
+        for key in ["state", "brightness"]:
+            if key in data and data[key] != "":
+                self.state[key] = data[key]
+        if "color" in data and "color" in self.state:
+            self.state["color"].update(data["color"])
+        self.report()
+
+    def __get(self, _data: dict):
+        self.report()
+
+    def report(self):
+        "Publishes the current state on the device topic."
+        self.client.publish(self.light.topic.string, json.dumps(self.state))
+
+
+class FakeZigbee:
+    "All fake devices of a home, sharing one client."
+
+    def __init__(self, home: Home, broker: Broker, seed: int = 0):
+        self.client = LocalClient(broker, "zigbee")
+        self.client.on_message = self.__on_message
+        self.lights: Dict[str, FakeLight] = {}
+        for light in home.flatten_lights():
+            fake = FakeLight(light, self.client)
+            self.lights[light.topic.string + "/set"] = fake
+            self.lights[light.topic.string + "/get"] = fake
+        self.remotes: List[Remote] = home.remotes()
+        self.sensors: List[Sensor] = home.sensors()
+        self.random = random.Random(seed)
+
+    def __on_message(self, _client, _userdata, message):
+        fake = self.lights.get(message.topic)
+        if fake is not None:
+            fake.handle(message.topic, message.payload)
+
+    def press(self, remote: Remote, action: str):
+        "Lets the remote publish the action."
+        self.client.publish(remote.topic.string, json.dumps({ "action": action }))
+
+    def report_sensor(self, sensor: Sensor):
+        "Lets the sensor publish a random reading."
+        reading = {
+            "temperature": round(self.random.uniform(18, 25), 1),
+            "humidity":    round(self.random.uniform(30, 80), 1),
+        }
+        self.client.publish(sensor.topic.string, json.dumps(reading))
@@ -0,0 +1,244 @@
+"""
+Runs the controller, the api, and the web api against fake devices and measures how they cope.
+Traffic is generated in a closed loop: every remote press, app command, or app query waits for
+its effect before the next one is issued, while state reports are sprinkled in between.
+"""
+
+import http.client
+import random
+import socket
+import threading
+import time
+import urllib.parse as url
+from collections import Counter
+from queue import Queue
+from typing import Dict, List, Optional, Set
+
+from api.api import Api
+from controller import Controller
+from home import Home
+from lighting import Abstract
+from scheduler import Scheduler
+from simulation import synthetic
+from simulation.broker import Broker, LocalClient
+from simulation.devices import FakeZigbee
+from timer_wheel import TimerWheel
+from web_api import WebAPI
+from worker import Worker
+
+DEFAULT_MIX = { "remote": 0.3, "command": 0.2, "query": 0.2, "report": 0.3 }
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    "Returns the given percentile of the samples, or 0 if there are none."
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def free_port() -> int:
+    "Returns a port nothing listens on."
+    with socket.socket() as sock:
+        sock.bind(("", 0))
+        return sock.getsockname()[1]
+
+
+def await_port(port: int, timeout: float = 5.0):
+    "Waits until something accepts connections on the local port."
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("localhost", port), timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.01)
+    raise TimeoutError("Web API did not come up.")
+
+
+class Report:
+    "Results of a simulation run."
+
+    def __init__(self, lights: int):
+        self.lights = lights
+        self.duration = 0.0
+        self.operations: Counter = Counter()
+        self.latencies: Dict[str, List[float]] = {}
+        self.publishes: Counter = Counter()
+        self.timeouts = 0
+        self.callback_errors = 0
+
+    @property
+    def throughput(self) -> float:
+        "Operations per second."
+        return sum(self.operations.values()) / self.duration if self.duration else 0.0
+
+    def as_dict(self) -> dict:
+        "Returns the report in a json-compatible format."
+        return {
+            "lights":          self.lights,
+            "duration_s":      self.duration,
+            "throughput_ops":  self.throughput,
+            "operations":      dict(self.operations),
+            "latency_ms":      {
+                kind: { "p50": percentile(lat, 50) * 1e3, "p99": percentile(lat, 99) * 1e3 }
+                for (kind, lat) in self.latencies.items()
+            },
+            "publishes":       dict(self.publishes),
+            "timeouts":        self.timeouts,
+            "callback_errors": self.callback_errors,
+        }
+
+    def __str__(self) -> str:
+        res = [f"{self.lights} lights, {sum(self.operations.values())} operations "
+               f"in {self.duration:.2f}s: {self.throughput:.1f} ops/s"]
+        for (kind, lat) in sorted(self.latencies.items()):
+            res.append(f"  {kind:<8} n={len(lat):<5} p50={percentile(lat, 50) * 1e3:7.2f}ms "
+                       f"p99={percentile(lat, 99) * 1e3:7.2f}ms")
+        res.append(f"  publishes: {dict(self.publishes)}")
+        res.append(f"  timeouts: {self.timeouts}, callback errors: {self.callback_errors}")
+        return "\n".join(res)
+
+
+class Simulation:
+    "A complete home base wired to an in-process broker and fake devices."
+
+    def __init__(self, lights: int, lights_per_room: int = 10, seed: int = 0):
+        self.home: Home = synthetic.home(lights, lights_per_room)
+        self.random = random.Random(seed)
+        self.broker = Broker()
+        self.zigbee = FakeZigbee(self.home, self.broker, seed=seed)
+        self.cmd_q: Queue = Queue()
+        self.resp_q: Queue = Queue()
+        wheel = TimerWheel()
+        client = LocalClient(self.broker, "homebase")
+        self.ctrl = Controller(self.cmd_q, self.home, client=client)  # type: ignore
+        self.api = Api(
+            request_q=self.cmd_q,
+            response_q=self.resp_q,
+            home=self.home,
+            client=self.ctrl.client,  # type: ignore
+            wheel=wheel,
+            scheduler=Scheduler(wheel),
+        )
+        self.port = free_port()
+        self.web = WebAPI(self.cmd_q, port=self.port, snapshots=self.api.snapshots)
+        self.__pending: Set[str] = set()
+        self.__done = threading.Event()
+        self.__lock = threading.Lock()
+        self.broker.observe(self.__observe)
+        for worker in [self.ctrl, self.api, self.web, wheel]:
+            threading.Thread(target=Simulation.__run_worker, args=(worker,), daemon=True).start()
+        await_port(self.port)
+        self.wait_idle()
+
+    @staticmethod
+    def __run_worker(worker: Worker):
+        worker.run()
+
+    def wait_idle(self, timeout: float = 30.0):
+        "Waits until the queue and the broker ran dry."
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.broker.drain(timeout)
+            # The api might still process the last item; give it a moment before checking again.
+            time.sleep(0.01)
+            if self.cmd_q.empty():
+                self.broker.drain(timeout)
+                return
+
+    def __observe(self, topic: str, _payload: bytes, _when: float):
+        with self.__lock:
+            if topic in self.__pending:
+                self.__pending.discard(topic)
+                if not self.__pending:
+                    self.__done.set()
+
+    def __expect(self, target: Abstract):
+        with self.__lock:
+            self.__pending = { light.set_topic() for light in target.flatten_lights() }
+            self.__done.clear()
+
+    def __await_expected(self, timeout: float) -> bool:
+        res = self.__done.wait(timeout)
+        with self.__lock:
+            self.__pending = set()
+        return res
+
+    def __http(self, path: str, params: Dict[str, str]) -> bytes:
+        conn = http.client.HTTPConnection("localhost", self.port, timeout=60)
+        try:
+            conn.request("GET", path + "?" + url.urlencode(params))
+            return conn.getresponse().read()
+        finally:
+            conn.close()
+
+    ################################################
+    # OPERATIONS
+    ################################################
+
+    def __remote(self, timeout: float) -> Optional[float]:
+        remote = self.random.choice(self.zigbee.remotes)
+        target = self.home.rooms[0].group
+        for room in self.home.rooms:
+            if room.group.topic == remote.controls_topic:
+                target = room.group
+        self.__expect(target)
+        start = time.perf_counter()
+        self.zigbee.press(remote, "toggle")
+        return time.perf_counter() - start if self.__await_expected(timeout) else None
+
+    def __command(self, timeout: float) -> Optional[float]:
+        room = self.random.choice(self.home.rooms)
+        command = self.random.choice(["DimUp", "DimDown", "TurnOn", "EnableColorful"])
+        self.__expect(room.group)
+        start = time.perf_counter()
+        self.__http(f"/command/{command}", { "topic": room.group.topic.string })
+        return time.perf_counter() - start if self.__await_expected(timeout) else None
+
+    def __query(self, _timeout: float) -> Optional[float]:
+        light = self.random.choice(self.home.flatten_lights())
+        start = time.perf_counter()
+        self.__http("/query/LightState", { "topic": light.topic.string })
+        return time.perf_counter() - start
+
+    def __report(self, _timeout: float) -> Optional[float]:
+        if self.random.random() < 0.5 and self.zigbee.sensors:
+            self.zigbee.report_sensor(self.random.choice(self.zigbee.sensors))
+        else:
+            self.random.choice(list(self.zigbee.lights.values())).report()
+        return None
+
+    def run(
+        self,
+        operations: int,
+        mix: Optional[Dict[str, float]] = None,
+        timeout: float = 5.0,
+    ) -> Report:
+        "Issues the given number of operations drawn from the mix and reports on them."
+        mix = mix or DEFAULT_MIX
+        ops = {
+            "remote":  self.__remote,
+            "command": self.__command,
+            "query":   self.__query,
+            "report":  self.__report,
+        }
+        kinds = list(mix.keys())
+        weights = [mix[kind] for kind in kinds]
+        report = Report(len(self.home.flatten_lights()))
+        before = self.broker.publishes.copy()
+        start = time.perf_counter()
+        for kind in self.random.choices(kinds, weights=weights, k=operations):
+            latency = ops[kind](timeout)
+            report.operations[kind] += 1
+            if kind == "report":
+                continue
+            if latency is None:
+                report.timeouts += 1
+            else:
+                report.latencies.setdefault(kind, []).append(latency)
+        self.wait_idle()
+        report.duration = time.perf_counter() - start
+        report.publishes = self.broker.publishes - before
+        report.callback_errors = self.broker.callback_errors
+        return report
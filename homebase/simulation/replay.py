@@ -0,0 +1,164 @@
+"""
+Replays a journal of inbound traffic against a fresh home base wired to an in-process broker.
+MQTT messages are injected into the broker as if the devices sent them, web requests are sent to
+the web api.  Replays in real time, scaled by a speed factor, or as fast as possible.
+Usage from within the homebase directory:
+    python -m simulation.replay JOURNAL [--home PATH] [--speed X]
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+from queue import Queue
+from typing import Dict, Iterable, List, Optional
+
+import common
+from api.api import Api
+from controller import Controller
+from home import Home, decoder
+from journal import Entry, Journal
+from scheduler import Scheduler
+from simulation.broker import Broker, LocalClient
+from simulation.load import await_port, free_port, percentile
+from timer_wheel import TimerWheel
+from web_api import WebAPI
+
+
+class ReplayReport:
+    "Results of a replay."
+
+    def __init__(self):
+        self.duration = 0.0
+        self.entries: Counter = Counter()
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.publishes: Counter = Counter()
+        self.lag = 0.0
+        self.callback_errors = 0
+
+    def as_dict(self) -> dict:
+        "Returns the report in a json-compatible format."
+        return {
+            "duration_s":      self.duration,
+            "entries":         dict(self.entries),
+            "web_latency_ms":  { "p50": percentile(self.latencies, 50) * 1e3,
+                                 "p99": percentile(self.latencies, 99) * 1e3 },
+            "web_statuses":    { str(code): num for (code, num) in self.statuses.items() },
+            "publishes":       dict(self.publishes),
+            "max_lag_s":       self.lag,
+            "callback_errors": self.callback_errors,
+        }
+
+    def __str__(self) -> str:
+        return "\n".join([
+            f"{sum(self.entries.values())} entries in {self.duration:.2f}s: {dict(self.entries)}",
+            f"  web      p50={percentile(self.latencies, 50) * 1e3:7.2f}ms "
+            f"p99={percentile(self.latencies, 99) * 1e3:7.2f}ms statuses: {dict(self.statuses)}",
+            f"  publishes: {dict(self.publishes)}",
+            f"  max lag behind schedule: {self.lag * 1e3:.1f}ms, "
+            f"callback errors: {self.callback_errors}",
+        ])
+
+
+class Replay:
+    "A fresh home base fed from a journal."
+
+    def __init__(self, home: Home):
+        self.home = home
+        self.broker = Broker()
+        self.cmd_q: Queue = Queue()
+        wheel = TimerWheel()
+        client = LocalClient(self.broker, "homebase")
+        ctrl = Controller(self.cmd_q, home, client=client)  # type: ignore
+        api = Api(
+            request_q=self.cmd_q,
+            response_q=Queue(),
+            home=home,
+            client=ctrl.client,  # type: ignore
+            wheel=wheel,
+            scheduler=Scheduler(wheel),
+        )
+        self.port = free_port()
+        web = WebAPI(self.cmd_q, port=self.port, snapshots=api.snapshots)
+        for worker in [ctrl, api, web, wheel]:
+            threading.Thread(target=worker.run, daemon=True).start()
+        await_port(self.port)
+        self.__conn = http.client.HTTPConnection("localhost", self.port, timeout=60)
+
+    def run(self, entries: Iterable[Entry], speed: float = 0.0) -> ReplayReport:
+        "Replays the entries at their recorded pace divided by the speed, or at once for speed 0."
+        report = ReplayReport()
+        injected: Counter = Counter()
+        before = self.broker.publishes.copy()
+        (first, start) = (None, time.perf_counter())
+        for entry in entries:
+            first = entry.time if first is None else first
+            if speed > 0:
+                due = start + (entry.time - first) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    report.lag = max(report.lag, -delay)
+            if entry.source == Entry.MQTT:
+                injected[Broker.kind(entry.target)] += 1
+                self.broker.publish(entry.target, entry.data)
+            elif entry.source == Entry.WEB:
+                self.__request(entry, report)
+            report.entries[entry.source] += 1
+        self.wait_idle()
+        report.duration = time.perf_counter() - start
+        report.publishes = self.broker.publishes - before - injected
+        report.callback_errors = self.broker.callback_errors
+        return report
+
+    def __request(self, entry: Entry, report: ReplayReport):
+        (method, path) = entry.target.split(" ", 1)
+        headers: Dict[str, str] = { "Content-Type": "application/json" } if entry.data else { }
+        begin = time.perf_counter()
+        try:
+            self.__conn.request(method, path, body=entry.data or None, headers=headers)
+            resp = self.__conn.getresponse()
+            resp.read()
+            report.statuses[resp.status] += 1
+        except (OSError, http.client.HTTPException):
+            self.__conn.close()
+            report.statuses["failed"] += 1
+        report.latencies.append(time.perf_counter() - begin)
+
+    def wait_idle(self, timeout: float = 30.0):
+        "Waits until the queue and the broker ran dry."
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.broker.drain(timeout)
+            time.sleep(0.01)
+            if self.cmd_q.empty():
+                self.broker.drain(timeout)
+                return
+
+
+def main(argv: Optional[List[str]] = None):
+    "Parses arguments, replays the journal, and prints the report."
+    parser = argparse.ArgumentParser(prog="python -m simulation.replay", description=__doc__)
+    parser.add_argument("journal", help="Path of the journal to replay.")
+    parser.add_argument(
+        "--home", default=None,
+        help="Home specification; defaults to the configured one."
+    )
+    parser.add_argument(
+        "--speed", type=float, default=0.0,
+        help="Pace relative to the recording, e.g. 1 for real time; 0 replays as fast as possible."
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as json.")
+    args = parser.parse_args(argv)
+    common.load_config()
+    home = decoder.read(args.home or common.config["home"]["dir"])
+    report = Replay(home).run(Journal.read(args.journal), speed=args.speed)
+    print(json.dumps(report.as_dict(), indent=2) if args.json else report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"Generates home specifications of arbitrary size."
+
+from typing import List
+
+from home import Home
+from home.decoder import decode
+
+_MODELS = [("HueColor", "Color"), ("IkeaDimmable", "Dimmable"), ("IkeaOutlet", "Simple")]
+
+
+def _light(room: int, idx: int) -> dict:
+    (model, kind) = _MODELS[idx % len(_MODELS)]
+    return {
+        "name":   f"Light {idx}",
+        "kind":   kind,
+        "icon":   "bulb",
+        "model":  model,
+        "id":     f"0x{room:04x}{idx:04x}",
+        "config": {},
+    }
+
+
+def home_spec(lights: int, lights_per_room: int = 10) -> dict:
+    """
+        Returns the specification of a home with the given number of lights.
+        Each room has a main group with a subgroup holding a third of its lights,
+        a multi-button remote controlling the main group, and a humidity sensor switching the
+        last light on while it is humid.
+    """
+    rooms: List[dict] = []
+    for room in range(max(1, -(-lights // lights_per_room))):
+        count = min(lights_per_room, lights - room * lights_per_room)
+        singles = [_light(room, idx) for idx in range(count)]
+        split = len(singles) - len(singles) // 3
+        name = f"Room {room}"
+        rooms.append({
+            "name": name,
+            "icon": "room",
+            "lights": {
+                "name": "Main",
+                "config": {},
+                "singles": singles[:split],
+                "subgroups": [{
+                    "name": "Corner",
+                    "config": {},
+                    "singles": singles[split:],
+                }],
+            },
+            "remotes": [{
+                "name": "Remote",
+                "kind": "IkeaMulti",
+                "icon": "remote",
+                "id": f"0x{room:04x}ffff",
+                "controls": "Main",
+            }],
+            "sensors": [{
+                "name": "Hygrometer",
+                "model": "TuyaHumidity",
+                "icon": "drop",
+                "id": f"0x{room:04x}fffe",
+            }],
+            "rules": [{
+                "name": "Humid",
+                "sensor": "Hygrometer",
+                "quantity": "Humidity",
+                "above": 70,
+                "hysteresis": 5,
+                "command": "TurnOn",
+                "otherwise": "TurnOff",
+                "controls": singles[-1]["name"],
+            }],
+        })
+    return { "rooms": rooms }
+
+
+def home(lights: int, lights_per_room: int = 10) -> Home:
+    "Returns a home with the given number of lights."
+    return decode(home_spec(lights, lights_per_room))
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+import unittest
+import urllib.parse as url
+
+sys.path.append(os.getcwd())
+
+from journal import Entry
+from simulation import synthetic
+from simulation.load import Simulation
+from simulation.replay import Replay
+
+
+class TestSimulation(unittest.TestCase):
+    "Testing a short load simulation end to end."
+
+    def test_operations_take_effect(self):
+        "Checks that the operations are answered, published, and handled without errors."
+        report = Simulation(10, seed=1).run(20)
+        self.assertEqual(sum(report.operations.values()), 20)
+        self.assertEqual(report.timeouts, 0)
+        self.assertGreater(sum(report.publishes.values()), 0)
+        self.assertEqual(report.callback_errors, 0)
+
+
+class TestReplay(unittest.TestCase):
+    "Testing replaying journaled traffic."
+
+    def test_web_commands_are_replayed(self):
+        "Checks that a journaled command reaches the lights of its room."
+        home = synthetic.home(10)
+        room = home.rooms[0]
+        query = url.urlencode({ "topic": room.group.topic.string })
+        entries = [Entry(time.time(), Entry.WEB, f"GET /command/TurnOn?{query}", b"")]
+        report = Replay(home).run(entries)
+        self.assertEqual(report.statuses[200], 1)
+        self.assertGreater(sum(report.publishes.values()), 0)
+        self.assertEqual(report.callback_errors, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"Runs the workers on threads of their own, restarting them as soon as they die."
+
+import queue
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from common import Log
+from worker import Worker
+
+BACKOFF_MIN = 0.05
+BACKOFF_MAX = 30.0
+STABLE_AFTER = 60.0  # A worker running this long without dying gets its backoff reset.
+CHECK_INTERVAL = 1.0
+
+
+class Supervised:
+    "A worker, the thread running it, and its restart history."
+
+    def __init__(self, worker: Worker):
+        self.worker = worker
+        self.name = type(worker).__name__
+        self.thread: Optional[threading.Thread] = None
+        self.started = 0.0
+        self.restarts = 0
+        self.backoff = BACKOFF_MIN
+        self.restart_at: Optional[float] = None
+        self.stuck = False
+        self.last_error: Optional[str] = None
+
+    @property
+    def alive(self) -> bool:
+        "Whether the thread of the worker is running."
+        return self.thread is not None and self.thread.is_alive()
+
+    def status(self) -> str:
+        "Returns ok, stuck, or restarting."
+        if not self.alive:
+            return "restarting"
+        return "stuck" if self.stuck else "ok"
+
+
+class Supervisor:
+    """
+        Every worker thread reports its death to the supervisor, which restarts the worker after
+        an exponential backoff.  Workers with a STUCK_AFTER timeout are also checked for overdue
+        heartbeats; a stuck thread cannot be stopped, so it is only reported.
+    """
+
+    def __init__(self):
+        self.__workers: List[Supervised] = []
+        self.__deaths: queue.Queue = queue.Queue()
+
+    def add(self, worker: Worker):
+        "Starts running the worker under supervision."
+        entry = Supervised(worker)
+        self.__workers.append(entry)
+        self.__start(entry)
+
+    def __start(self, entry: Supervised):
+        entry.restart_at = None
+        entry.stuck = False
+        entry.started = time.time()
+        entry.thread = threading.Thread(
+            target=self.__run,
+            args=(entry,),
+            name=entry.name,
+            daemon=True,
+        )
+        entry.thread.start()
+
+    def __run(self, entry: Supervised):
+        try:
+            entry.worker.run()
+            entry.last_error = "Worker returned."
+        except BaseException:  # pylint: disable=broad-except
+            entry.last_error = traceback.format_exc()
+        finally:
+            self.__deaths.put(entry)
+
+    def run(self):
+        "Supervises the workers; never returns."
+        while True:
+            self.step(CHECK_INTERVAL)
+
+    def step(self, timeout: float):
+        "Handles deaths and due restarts, waiting at most timeout seconds for a death."
+        now = time.monotonic()
+        due = [entry.restart_at for entry in self.__workers if entry.restart_at is not None]
+        wait = max(0.0, min([timeout] + [at - now for at in due]))
+        try:
+            self.__died(self.__deaths.get(timeout=wait))
+        except queue.Empty:
+            pass
+        now = time.monotonic()
+        for entry in self.__workers:
+            if entry.restart_at is not None and entry.restart_at <= now:
+                entry.restarts += 1
+                Log.utl.info("Restarting worker %s.", entry.name)
+                self.__start(entry)
+        self.__check_heartbeats()
+
+    def __died(self, entry: Supervised):
+        ran = time.time() - entry.started
+        if ran >= STABLE_AFTER:
+            entry.backoff = BACKOFF_MIN
+        Log.utl.error("Worker %s died after %.1fs: %s", entry.name, ran, entry.last_error)
+        entry.restart_at = time.monotonic() + entry.backoff
+        entry.backoff = min(BACKOFF_MAX, entry.backoff * 2)
+
+    def __check_heartbeats(self):
+        now = time.time()
+        for entry in self.__workers:
+            limit = entry.worker.STUCK_AFTER
+            beat = entry.worker.last_beat
+            stuck = entry.alive and limit is not None and beat is not None and now - beat > limit
+            if stuck and not entry.stuck:
+                Log.utl.error("Worker %s missed its heartbeat for %.1fs.", entry.name, now - beat)
+            entry.stuck = stuck
+
+    def health(self) -> Dict:
+        "Returns the state of all workers."
+        now = time.time()
+        workers = { }
+        for entry in self.__workers:
+            beat = entry.worker.last_beat
+            workers[entry.name] = {
+                "status":        entry.status(),
+                "uptime_s":      now - entry.started if entry.alive else 0.0,
+                "restarts":      entry.restarts,
+                "last_activity": beat,
+                "silent_s":      now - beat if beat is not None else None,
+            }
+        healthy = all(worker["status"] == "ok" for worker in workers.values())
+        return { "status": "ok" if healthy else "degraded", "workers": workers }
+
+
+# The supervisor shared by the process.
+SUPERVISOR = Supervisor()
@@ -0,0 +1,111 @@
+import os
+import sys
+import threading
+import unittest
+from queue import Queue
+from unittest import mock
+
+from paho.mqtt import client as mqtt
+
+sys.path.append(os.getcwd())
+
+from controller import Controller, PatchedClient
+from enums import ApiCommand
+from simulation import synthetic
+
+
+class FakeConnection:
+    "Stands in for the network side of the paho client, recording what is sent in order."
+
+    def __init__(self):
+        self.sent = []
+
+    def publish(self, topic, payload=None, qos=0, retain=False, _properties=None):
+        self.sent.append(("publish", topic, payload, qos, retain))
+        return mqtt.MQTTMessageInfo(0)
+
+    def subscribe(self, topic, _qos=0, *_args, **_kwargs):
+        self.sent.append(("subscribe", topic))
+        return (mqtt.MQTT_ERR_SUCCESS, 0)
+
+
+class TestPatchedClient(unittest.TestCase):
+    "Testing publishing while the connection to the broker is down."
+
+    def setUp(self):
+        self.conn = FakeConnection()
+        patches = [
+            mock.patch.object(mqtt.Client, "publish", self.conn.publish),
+            mock.patch.object(mqtt.Client, "subscribe", self.conn.subscribe),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.home = synthetic.home(2)
+        self.ctrl = Controller(Queue(), self.home)
+        self.light = self.home.flatten_lights()[0]
+        self.client: PatchedClient = self.ctrl.client.client_for(self.light.topic.string)
+        self.conn.sent.clear()
+
+    def test_buffers_while_offline(self):
+        "Checks that publishes wait for the connection, keeping their qos and retain flag."
+        self.ctrl.client.publish(self.light.topic.as_get(), '{"state": ""}', 1, True)
+        self.assertEqual(self.conn.sent, [])
+        self.client.on_connect(self.client, None, { "session present": True }, 0)
+        expected = ("publish", self.light.topic.as_get(), '{"state": ""}', 1, True)
+        self.assertEqual(self.conn.sent, [expected])
+        self.client.publish(self.light.set_topic(), "{}")
+        self.assertEqual(len(self.conn.sent), 2)
+
+    def test_subscribes_before_flushing(self):
+        "Checks that a fresh session subscribes to the devices before buffered queries are sent."
+        self.ctrl.client.publish(self.light.topic.as_get(), '{"state": ""}')
+        self.client.on_connect(self.client, None, { "session present": False }, 0)
+        kinds = [sent[0] for sent in self.conn.sent]
+        self.assertEqual(kinds[-1], "publish")
+        self.assertIn(("subscribe", self.light.topic.string), self.conn.sent[:-1])
+
+
+class TestMessages(unittest.TestCase):
+    "Testing the handling of received messages on the network loop."
+
+    def setUp(self):
+        self.conn = FakeConnection()
+        patches = [
+            mock.patch.object(mqtt.Client, "publish", self.conn.publish),
+            mock.patch.object(mqtt.Client, "subscribe", self.conn.subscribe),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.home = synthetic.home(2)
+        self.queue: Queue = Queue()
+        self.ctrl = Controller(self.queue, self.home)
+        self.light = self.home.flatten_lights()[0]
+        while not self.queue.empty():
+            self.queue.get()
+
+    def deliver(self, topic: str, payload: bytes):
+        "Hands a message to the callback the network loop calls."
+        message = mqtt.MQTTMessage(topic=topic.encode("utf-8"))
+        message.payload = payload
+        self.ctrl.client.on_message(None, None, message)
+
+    def test_malformed_payload_is_survived(self):
+        "Checks that a message following one that cannot be parsed is still handled."
+        self.deliver(self.light.topic.string, b"{not json")
+        self.deliver(self.light.topic.string, b'{"state": "ON"}')
+        data = self.queue.get_nowait()
+        self.assertEqual((data.topic, data.command), (self.light.topic, ApiCommand.UpdateState))
+
+    def test_run_returns_once_a_loop_ends(self):
+        "Checks that the worker ends when a network loop dies, so it is restarted."
+        with mock.patch.object(mqtt.Client, "loop_forever", side_effect=RuntimeError):
+            runner = threading.Thread(target=self.ctrl.run, daemon=True)
+            runner.start()
+            runner.join(5.0)
+        self.assertFalse(runner.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import json
+import os
+import sys
+import unittest
+from queue import Queue
+
+from paho.mqtt import client as mqtt
+
+sys.path.append(os.getcwd())
+
+from controller import Controller
+from discovery import DEVICES, EVENT, RENAMED, Registry
+from enums import ApiCommand, Capability
+from simulation import synthetic
+
+
+def _device(ieee: str, name: str, features=()):
+    exposes = [{ "type": "light", "features": [{ "name": feature } for feature in features] }]
+    return {
+        "ieee_address": ieee,
+        "friendly_name": name,
+        "type": "Router",
+        "supported": True,
+        "interview_completed": True,
+        "definition": { "model": "LCT015", "vendor": "Philips", "exposes": exposes },
+    }
+
+
+class RecordingClient:
+    "Records subscriptions and publishes, and delivers messages to the message callback."
+
+    def __init__(self):
+        self.subscribed = set()
+        self.published = []
+        self.on_message = None
+
+    def subscribe(self, topic, _qos=0):
+        self.subscribed.add(topic)
+
+    def unsubscribe(self, topic):
+        self.subscribed.discard(topic)
+
+    def publish(self, topic, payload=None, *_args, **_kwargs):
+        self.published.append((topic, payload))
+
+    def deliver(self, topic: str, data):
+        message = mqtt.MQTTMessage(topic=topic.encode("utf-8"))
+        message.payload = json.dumps(data).encode("utf-8")
+        self.on_message(self, None, message)
+
+
+class TestRegistry(unittest.TestCase):
+    "Testing how the registry learns the devices of a bridge."
+
+    def setUp(self):
+        self.registry = Registry("zigbee2mqtt")
+        self.listed = [
+            _device("0x1", "Device/Light/Room/A", ["brightness", "color_xy"]),
+            _device("0x2", "B"),
+        ]
+        self.changes = self.feed(DEVICES, self.listed)
+
+    def feed(self, suffix: str, data):
+        return self.registry.handle(f"zigbee2mqtt/{suffix}", json.dumps(data).encode())
+
+    def test_listing_learns_capabilities(self):
+        "Checks that the capabilities of a light are derived from the features it exposes."
+        self.assertEqual([device.ieee for device in self.changes.joined], ["0x1", "0x2"])
+        light = self.registry.find("Device/Light/Room/A")
+        assert light is not None
+        self.assertEqual(light.capabilities, Capability.Dimmable | Capability.Color)
+
+    def test_relisting_only_reports_changes(self):
+        "Checks that listing the same devices again yields no changes."
+        self.assertFalse(self.feed(DEVICES, self.listed))
+        changes = self.feed(DEVICES, [self.listed[0], _device("0x3", "C")])
+        self.assertEqual([device.ieee for device in changes.joined], ["0x3"])
+        self.assertEqual([device.ieee for device in changes.left], ["0x2"])
+
+    def test_rename(self):
+        "Checks that a renamed device is found under its new name only."
+        changes = self.feed(RENAMED, { "data": { "from": "B", "to": "D" }, "status": "ok" })
+        renamed = [(old, device.friendly_name) for (old, device) in changes.renamed]
+        self.assertEqual(renamed, [("B", "D")])
+        self.assertIsNone(self.registry.find("B"))
+        self.assertFalse(self.feed(DEVICES, [self.listed[0], _device("0x2", "D")]))
+
+    def test_join_interview_leave(self):
+        "Checks that a device joins, is interviewed, and leaves."
+        ident = { "ieee_address": "0x4", "friendly_name": "E" }
+        joined = self.feed(EVENT, { "type": "device_joined", "data": ident })
+        self.assertFalse(joined.joined[0].interviewed)
+        data = { **_device("0x4", "E", ["brightness"]), "status": "successful" }
+        interviewed = self.feed(EVENT, { "type": "device_interview", "data": data })
+        self.assertEqual(interviewed.joined[0].capabilities, Capability.Dimmable)
+        left = self.feed(EVENT, { "type": "device_leave", "data": ident })
+        self.assertEqual(left.left[0].friendly_name, "E")
+        self.assertEqual(len(self.registry), 2)
+
+
+class TestController(unittest.TestCase):
+    "Testing how the controller follows the devices of its bridge."
+
+    def setUp(self):
+        self.home = synthetic.home(2)
+        (self.light, self.missing) = self.home.flatten_lights()
+        self.client = RecordingClient()
+        self.queue: Queue = Queue()
+        self.ctrl = Controller(self.queue, self.home, client=self.client)  # type: ignore
+        exposes = ["brightness", "color_xy"]
+        listed = [_device(self.light.ident, self.light.topic.without_base, exposes)]
+        self.client.deliver(f"zigbee2mqtt/{DEVICES}", listed)
+
+    def commands(self):
+        "Returns and removes the commands the controller queued."
+        res = []
+        while not self.queue.empty():
+            data = self.queue.get()
+            res.append((data.topic.string, data.command, data.payload))
+        return res
+
+    def test_unlisted_device_is_unavailable(self):
+        "Checks that a configured device missing from the listing is unsubscribed and unavailable."
+        self.assertNotIn(self.missing.topic.string, self.client.subscribed)
+        offline = (self.missing.topic.string, ApiCommand.UpdateAvailability, { "state": "offline" })
+        self.assertIn(offline, self.commands())
+
+    def test_follows_renamed_device(self):
+        "Checks that subscriptions, publishes, and received messages follow a rename by address."
+        names = { "from": self.light.topic.without_base, "to": "Kitchen" }
+        rename = { "data": names, "status": "ok" }
+        self.client.deliver(f"zigbee2mqtt/{RENAMED}", rename)
+        self.assertIn("zigbee2mqtt/Kitchen", self.client.subscribed)
+        self.assertIn("zigbee2mqtt/Kitchen/availability", self.client.subscribed)
+        self.assertNotIn(self.light.topic.string, self.client.subscribed)
+        self.ctrl.client.publish(self.light.set_topic(), "{}")
+        self.assertEqual(self.client.published[-1][0], "zigbee2mqtt/Kitchen/set")
+        self.commands()
+        self.client.deliver("zigbee2mqtt/Kitchen", { "state": "ON" })
+        update = (self.light.topic.string, ApiCommand.UpdateState, { "state": "ON" })
+        self.assertEqual(self.commands(), [update])
+
+
+if __name__ == '__main__':
+    unittest.main()
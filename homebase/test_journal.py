@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.getcwd())
+
+import journal
+from journal import Entry, Journal
+
+# Journals three messages, waits for them to be flushed, and dies without closing the journal.
+CRASH = """
+import os, sys, time
+import journal
+journal.FLUSH_INTERVAL = 0.01
+log = journal.Journal(sys.argv[1])
+for idx in range(3):
+    log.mqtt(f"zigbee2mqtt/Device/Light/Room/Light {idx}", b'{"state": "ON"}')
+time.sleep(0.5)
+os._exit(1)
+"""
+
+
+class TestJournal(unittest.TestCase):
+    "Testing writing and reading the journal."
+
+    def setUp(self):
+        (handle, self.path) = tempfile.mkstemp(suffix=".gz")
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_round_trip_across_restarts(self):
+        "Checks that entries of several clean runs are read back in order."
+        log = Journal(self.path)
+        log.mqtt("zigbee2mqtt/Device/Remote/Room/Remote", b'{"action": "toggle"}')
+        log.close()
+        log = Journal(self.path)
+        log.web("POST", "/batch", b"[]")
+        log.close()
+        entries = list(Journal.read(self.path))
+        self.assertEqual([e.source for e in entries], [Entry.MQTT, Entry.WEB])
+        self.assertEqual(entries[0].data, b'{"action": "toggle"}')
+        self.assertEqual(entries[1].target, "POST /batch")
+        self.assertLessEqual(entries[0].time, entries[1].time)
+
+    def test_ignores_truncated_tail(self):
+        "Checks that the entries before a cut off end of the file are read."
+        log = Journal(self.path)
+        for idx in range(100):
+            log.mqtt(f"zigbee2mqtt/Device/Light/Room/Light {idx}", b'{"state": "ON"}')
+        log.close()
+        with open(self.path, "rb") as file:
+            data = file.read()
+        with open(self.path, "wb") as file:
+            file.write(data[:len(data) - 20])
+        entries = list(Journal.read(self.path))
+        self.assertLess(len(entries), 100)
+        self.assertEqual(entries[0].target, "zigbee2mqtt/Device/Light/Room/Light 0")
+
+    def test_reads_across_crash_and_restart(self):
+        "Checks that entries flushed before a crash and those written after the restart are read."
+        homebase = os.path.dirname(os.path.realpath(journal.__file__))
+        subprocess.run([sys.executable, "-c", CRASH, self.path], cwd=homebase, check=False)
+        log = Journal(self.path)
+        log.web("GET", "/health")
+        log.close()
+        targets = [entry.target for entry in Journal.read(self.path)]
+        expected = [f"zigbee2mqtt/Device/Light/Room/Light {idx}" for idx in range(3)]
+        self.assertEqual(targets, expected + ["GET /health"])
+
+
+if __name__ == '__main__':
+    unittest.main()
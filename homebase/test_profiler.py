@@ -0,0 +1,57 @@
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+sys.path.append(os.getcwd())
+
+from homebaseerror import HomeBaseError
+from profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    "Testing profiling sessions."
+
+    def test_samples_other_threads(self):
+        "Checks that the stacks of other threads are sampled, but not the sampling thread."
+        done = threading.Event()
+        worker = threading.Thread(target=done.wait, name="Waiter")
+        worker.start()
+        try:
+            report = Profiler().session(seconds=0.05, fmt="collapsed", memory=False)
+        finally:
+            done.set()
+            worker.join()
+        self.assertTrue(any(line.startswith("Waiter;") for line in report.splitlines()))
+        self.assertFalse(any("__sample" in line for line in report.splitlines()))
+
+    def test_reports_allocations(self):
+        "Checks that the report includes the top allocations."
+        report = Profiler().session(seconds=0.01)
+        self.assertIn("Top allocations:", report)
+
+    def test_rejects_concurrent_sessions(self):
+        "Checks that a session cannot start while another one is running."
+        prof = Profiler()
+        (started, release) = (threading.Event(), threading.Event())
+        def blocking_sample(*_args):
+            started.set()
+            release.wait()
+            return ""
+        with mock.patch.object(Profiler, "_Profiler__sample", blocking_sample):
+            runner = threading.Thread(target=lambda: prof.session(seconds=0.0, memory=False))
+            runner.start()
+            try:
+                self.assertTrue(started.wait(5.0))
+                with self.assertRaises(HomeBaseError) as ctx:
+                    prof.session(seconds=0.0, memory=False)
+                self.assertEqual(ctx.exception, HomeBaseError.ProfilerBusy)
+            finally:
+                release.set()
+                runner.join()
+        self.assertIn("rounds", prof.session(seconds=0.0, memory=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
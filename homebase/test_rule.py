@@ -0,0 +1,115 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.getcwd())
+
+from api.command import Exec
+from comm import Topic
+from enums import ApiCommand, DeviceKind, SensorQuantity
+from home import decoder, encoder
+from lighting.transition import Transitions
+from rule import Rule, RuleEngine
+from simulation import synthetic
+from timer_wheel import TimerWheel
+
+
+def _rule(sensor: Topic, quantity: SensorQuantity = SensorQuantity.Humidity) -> Rule:
+    return Rule(
+        name="Humid",
+        sensor=sensor,
+        quantity=quantity,
+        threshold=70,
+        above=True,
+        command=ApiCommand.TurnOn,
+        target=Topic.for_room("Bathroom"),
+        otherwise=ApiCommand.TurnOff,
+        hysteresis=5,
+    )
+
+
+class RecordingClient:
+    "Records publishes instead of sending them."
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, payload=None, *_args, **_kwargs):
+        self.published.append((topic, payload))
+
+
+class TestRule(unittest.TestCase):
+    "Testing the evaluation of sensor rules."
+
+    def setUp(self):
+        self.sensor = Topic.for_device("Hygrometer", DeviceKind.Sensor, "Bathroom", [])
+
+    def test_hysteresis(self):
+        "Checks that a rule fires once per crossing and only falls back beyond the hysteresis."
+        rule = _rule(self.sensor)
+        self.assertIsNone(rule.evaluate(50))
+        self.assertEqual(rule.evaluate(71), ApiCommand.TurnOn)
+        self.assertIsNone(rule.evaluate(68))
+        self.assertIsNone(rule.evaluate(72))
+        self.assertEqual(rule.evaluate(64), ApiCommand.TurnOff)
+
+    def test_engine_only_evaluates_affected_rules(self):
+        "Checks that a reading only triggers the rules of its sensor and quantity."
+        other = Topic.for_device("Thermometer", DeviceKind.Sensor, "Bathroom", [])
+        engine = RuleEngine([
+            _rule(self.sensor), _rule(other), _rule(self.sensor, SensorQuantity.Temperature),
+        ])
+        self.assertEqual(engine.feed(self.sensor, SensorQuantity.Humidity, 80),
+                         [(ApiCommand.TurnOn, Topic.for_room("Bathroom"))])
+        self.assertEqual(engine.feed(self.sensor, SensorQuantity.Humidity, 80), [])
+        self.assertEqual(engine.feed(self.sensor, SensorQuantity.Humidity, 90), [])
+
+
+class TestRuleDecoding(unittest.TestCase):
+    "Testing rules as part of a home."
+
+    def setUp(self):
+        self.home = synthetic.home(10)
+
+    def test_decodes_rules(self):
+        "Checks that the sensor, target, and hysteresis of a rule are read."
+        (rule,) = self.home.rules()
+        self.assertEqual(rule.sensor, self.home.sensors()[0].topic)
+        self.assertEqual(rule.target, self.home.flatten_lights()[-1].topic)
+        self.assertEqual(rule.hysteresis, 5)
+
+    def test_round_trip(self):
+        "Checks that rules survive encoding and decoding the home."
+        (handle, path) = tempfile.mkstemp(suffix=".yml")
+        os.close(handle)
+        try:
+            encoder.write(self.home, path)
+            (rule,) = decoder.read(path).rules()
+        finally:
+            os.remove(path)
+        (orig,) = self.home.rules()
+        attrs = ["name", "sensor", "quantity", "threshold", "above", "hysteresis"]
+        for attr in attrs + ["command", "target", "otherwise"]:
+            self.assertEqual(getattr(rule, attr), getattr(orig, attr), attr)
+
+    def test_rejects_commands_with_payload(self):
+        "Checks that rules cannot issue commands that need a payload."
+        spec = synthetic.home_spec(10)
+        spec["rooms"][0]["rules"][0]["command"] = "SetBrightness"
+        with self.assertRaises(AssertionError):
+            decoder.decode(spec)
+
+    def test_sensor_update_triggers_command(self):
+        "Checks that a sensor reading executed by the api switches the target of the rule."
+        client = RecordingClient()
+        execute = Exec(self.home, client, Transitions(client, TimerWheel()))  # type: ignore
+        sensor = self.home.sensors()[0]
+        light = self.home.flatten_lights()[-1]
+        execute.exec(sensor.topic, ApiCommand.UpdateState, { "humidity": "80" })
+        self.assertEqual([topic for (topic, _) in client.published], [light.set_topic()])
+        self.assertIn(b'"ON"', client.published[0][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
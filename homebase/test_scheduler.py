@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+import unittest
+from datetime import datetime, time
+from typing import Callable, List, Optional
+
+sys.path.append(os.getcwd())
+
+from scheduler import Scheduler
+from timer_wheel import Callback, TimerWheel
+
+
+class InterleavingWheel(TimerWheel):
+    "Runs a given function on another thread while scheduling, as if the wheel thread ran then."
+
+    def __init__(self):
+        super().__init__(tick=1, slots=8)
+        self.meanwhile: Optional[Callable[[], None]] = None
+        self.threads: List[threading.Thread] = []
+
+    def schedule(self, delay: float, callback: Callback) -> int:
+        handle = super().schedule(delay, callback)
+        if self.meanwhile is not None:
+            thread = threading.Thread(target=self.meanwhile, daemon=True)
+            self.meanwhile = None
+            self.threads.append(thread)
+            thread.start()
+            thread.join(0.1)  # Blocked threads go on once the scheduler returns.
+        return handle
+
+    def join(self):
+        "Waits for the functions run meanwhile."
+        for thread in self.threads:
+            thread.join(1.0)
+
+
+class TestScheduler(unittest.TestCase):
+    "Testing the timer wheel and the scheduler on top of it."
+
+    def setUp(self):
+        self.wheel = TimerWheel(tick=1, slots=8)
+        self.scheduler = Scheduler(self.wheel)
+        self.fired = []
+
+    def test_far_timers_fire_on_time(self):
+        "Checks that timers beyond one revolution fire exactly at their tick."
+        for delay in [3, 8, 20, 100]:
+            self.wheel.schedule(delay, lambda d=delay: self.fired.append((d, self.wheel.now)))
+        self.wheel.advance(100)
+        self.assertEqual(self.fired, [(3, 3), (8, 8), (20, 20), (100, 100)])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_cancel(self):
+        "Checks that cancelled timers never fire, neither in the wheel nor the overflow."
+        near = self.wheel.schedule(2, lambda: self.fired.append("near"))
+        far = self.wheel.schedule(50, lambda: self.fired.append("far"))
+        self.assertTrue(self.wheel.cancel(near))
+        self.assertTrue(self.wheel.cancel(far))
+        self.assertFalse(self.wheel.cancel(far))
+        self.wheel.advance(60)
+        self.assertEqual(self.fired, [])
+
+    def test_every(self):
+        "Checks that periodic jobs recur until cancelled."
+        job = self.scheduler.every(10, lambda: self.fired.append(self.wheel.now))
+        self.wheel.advance(35)
+        self.assertEqual(self.fired, [1, 11, 21, 31])
+        self.scheduler.cancel(job)
+        self.wheel.advance(35)
+        self.assertEqual(len(self.fired), 4)
+
+    def test_immediate_job_fires(self):
+        "Checks that a job due before scheduling it returned still runs and is not kept."
+        wheel = InterleavingWheel()
+        scheduler = Scheduler(wheel)
+        wheel.meanwhile = lambda: wheel.advance(1)
+        scheduler.after(0, lambda: self.fired.append("once"))
+        wheel.join()
+        self.assertEqual(self.fired, ["once"])
+        self.assertEqual(len(scheduler), 0)
+
+    def test_cancel_while_due(self):
+        "Checks that a periodic job cancelled while it is rescheduled stays cancelled."
+        wheel = InterleavingWheel()
+        scheduler = Scheduler(wheel)
+        job = scheduler.every(10, lambda: self.fired.append(wheel.now), immediately=False)
+        cancelled = []
+        wheel.meanwhile = lambda: cancelled.append(scheduler.cancel(job))
+        wheel.advance(10)
+        wheel.join()
+        self.assertEqual(cancelled, [True])
+        wheel.advance(30)
+        self.assertEqual(self.fired, [10])
+        self.assertEqual((len(scheduler), len(wheel)), (0, 0))
+
+    def test_seconds_until(self):
+        "Checks that daily times roll over to the next day once passed."
+        now = datetime(2023, 1, 1, 22, 0)
+        self.assertEqual(Scheduler.seconds_until(time(23, 0), now), 3600)
+        self.assertEqual(Scheduler.seconds_until(time(21, 0), now), 23 * 3600)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(os.getcwd())
+
+from supervisor import Supervisor
+from timer_wheel import TimerWheel
+from worker import Worker
+
+
+class Flaky(Worker):
+    "Dies on its first run, then blocks."
+
+    def __init__(self):
+        self.runs = 0
+        self.release = threading.Event()
+
+    def _run(self):
+        self.runs += 1
+        if self.runs == 1:
+            raise ValueError("Crash")
+        self.release.wait()
+
+
+class Silent(Worker):
+    "Never beats after starting."
+
+    STUCK_AFTER = 0.05
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def _run(self):
+        self.release.wait()
+
+
+class TestSupervisor(unittest.TestCase):
+    "Testing restarts and heartbeats of supervised workers."
+
+    def test_restarts_dead_worker_at_once(self):
+        "Checks that a dead worker is restarted within the minimal backoff."
+        supervisor = Supervisor()
+        worker = Flaky()
+        start = time.monotonic()
+        supervisor.add(worker)
+        while worker.runs < 2 and time.monotonic() - start < 2:
+            supervisor.step(0.01)
+        try:
+            self.assertEqual(worker.runs, 2)
+            self.assertLess(time.monotonic() - start, 1.0)
+            health = supervisor.health()
+            self.assertEqual(health["status"], "ok")
+            self.assertEqual(health["workers"]["Flaky"]["restarts"], 1)
+        finally:
+            worker.release.set()
+
+    def test_reports_stuck_worker(self):
+        "Checks that a worker missing its heartbeat is reported as stuck."
+        supervisor = Supervisor()
+        worker = Silent()
+        supervisor.add(worker)
+        try:
+            time.sleep(0.1)
+            supervisor.step(0)
+            health = supervisor.health()
+            self.assertEqual(health["status"], "degraded")
+            self.assertEqual(health["workers"]["Silent"]["status"], "stuck")
+        finally:
+            worker.release.set()
+
+    def test_restarted_wheel_keeps_time(self):
+        "Checks that timers fire on time after the wheel is restarted late in its life."
+        wheel = TimerWheel(tick=0.01)
+        wheel.advance(1000)  # Ten seconds of a previous run.
+        fired = threading.Event()
+        wheel.schedule(0.02, fired.set)
+        threading.Thread(target=wheel.run, daemon=True).start()
+        self.assertTrue(fired.wait(1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
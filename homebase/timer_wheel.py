@@ -0,0 +1,121 @@
+"A hashed timer wheel running all timed callbacks of the home base on a single thread."
+
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Tuple
+
+from common import Log
+from worker import Worker
+
+Callback = Callable[[], None]
+
+
+class TimerWheel(Worker):
+    """
+        Buckets timers into a ring of slots, one slot per tick.
+        Scheduling and cancelling are O(1); every tick only inspects the timers of one slot.
+        Timers further away than one revolution wait in an overflow heap at O(log n) and move
+        into the wheel once their deadline is less than a revolution away.
+    """
+
+    STUCK_AFTER = 10.0
+
+    def __init__(self, tick: float = 0.1, slots: int = 512):
+        self.tick = tick
+        self.__slots: List[Dict[int, Tuple[int, Callback]]] = [{} for _ in range(slots)]
+        self.__where: Dict[int, int] = {}
+        self.__overflow: List[Tuple[int, int]] = []  # Heap of deadlines and handles.
+        self.__pending: Dict[int, Callback] = {}  # Callbacks of the timers in the overflow heap.
+        self.__lock = threading.Lock()
+        self.__ids = itertools.count()
+        self.__now = 0  # Number of ticks elapsed since the wheel was created.
+
+    def __len__(self) -> int:
+        return len(self.__where) + len(self.__pending)
+
+    @property
+    def now(self) -> int:
+        "Returns the current tick."
+        return self.__now
+
+    def ticks_for(self, delay: float) -> int:
+        "Returns the number of ticks needed to wait for at least the given delay."
+        return max(1, int(-(-delay // self.tick)))
+
+    def schedule(self, delay: float, callback: Callback) -> int:
+        "Schedules the callback to run after delay seconds.  Returns a handle for cancelling."
+        with self.__lock:
+            return self.__insert(self.__now + self.ticks_for(delay), callback)
+
+    def schedule_at_tick(self, deadline: int, callback: Callback) -> int:
+        "Schedules the callback to run at the given absolute tick, or the next one if it passed."
+        with self.__lock:
+            return self.__insert(max(deadline, self.__now + 1), callback)
+
+    def __insert(self, deadline: int, callback: Callback) -> int:
+        handle = next(self.__ids)
+        if deadline - self.__now >= len(self.__slots):
+            heapq.heappush(self.__overflow, (deadline, handle))
+            self.__pending[handle] = callback
+        else:
+            self.__place(handle, deadline, callback)
+        return handle
+
+    def __place(self, handle: int, deadline: int, callback: Callback):
+        slot = deadline % len(self.__slots)
+        self.__slots[slot][handle] = (deadline, callback)
+        self.__where[handle] = slot
+
+    def __migrate(self):
+        "Moves timers from the overflow heap into the wheel once they are within one revolution."
+        horizon = self.__now + len(self.__slots)
+        while self.__overflow and self.__overflow[0][0] < horizon:
+            (deadline, handle) = heapq.heappop(self.__overflow)
+            callback = self.__pending.pop(handle, None)
+            if callback is not None:  # Otherwise, the timer was cancelled.
+                self.__place(handle, deadline, callback)
+
+    def cancel(self, handle: int) -> bool:
+        "Cancels the timer with the given handle.  Returns whether it was still pending."
+        with self.__lock:
+            if self.__pending.pop(handle, None) is not None:
+                return True
+            slot = self.__where.pop(handle, None)
+            if slot is None:
+                return False
+            del self.__slots[slot][handle]
+            return True
+
+    def advance(self, ticks: int = 1):
+        "Advances the wheel by the given number of ticks, running all callbacks that became due."
+        for _ in range(ticks):
+            with self.__lock:
+                self.__now += 1
+                self.__migrate()
+                bucket = self.__slots[self.__now % len(self.__slots)]
+                due = [(h, cb) for (h, (deadline, cb)) in bucket.items() if deadline <= self.__now]
+                for (handle, _) in due:
+                    del bucket[handle]
+                    del self.__where[handle]
+            for (_, callback) in due:
+                self.__fire(callback)
+
+    @staticmethod
+    def __fire(callback: Callback):
+        try:
+            callback()
+        except Exception:  # pylint: disable=broad-except
+            Log.utl.error("Timer callback failed: %s", traceback.format_exc())
+
+    def _run(self):
+        "Advances the wheel in real time, continuing from the current tick when restarted."
+        start = time.monotonic() - self.__now * self.tick
+        while True:
+            self.beat()
+            behind = int((time.monotonic() - start) / self.tick) - self.__now
+            if behind > 0:
+                self.advance(behind)
+            time.sleep(self.tick)
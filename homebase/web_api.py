@@ -1,23 +1,46 @@
 "Contains the WebAPI, handling get requests and passing it on over a queue."
+import hmac
+import json
 import traceback
 import urllib.parse as url
 from http.server import BaseHTTPRequestHandler
 from queue import Empty, Queue
-from socketserver import TCPServer
-from typing import Dict, Optional, Tuple
+from socketserver import ThreadingTCPServer
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import common
+from api.snapshot import Snapshots
 from comm import QData, Topic
+from comm.encoding import Encoding
 from enums import ApiCommand, ApiQuery, QDataKind
 from homebaseerror import HomeBaseError
+from journal import Journal
+from profiler import PROFILER
+from supervisor import SUPERVISOR
 from worker import Worker
 
 
+RESPONSE_TIMEOUT = 60
+MAX_BATCH = 256
+
+
 class Handler(BaseHTTPRequestHandler):
-    "Handles web requests and issues the required requests over the queue."
+    """
+        Handles web requests and issues the required requests over the queue.
+        Speaks HTTP/1.1, so clients can keep their connection open for several requests.
+    """
+
+    protocol_version = "HTTP/1.1"
+    timeout = 30  # Closes idle persistent connections.
+    disable_nagle_algorithm = True  # Headers and body go out separately; avoids delayed-ack stalls.
 
-    request:  Optional[Queue] = None
-    response: Optional[Queue] = None
+    request:    Optional[Queue] = None
+    journal:    Optional[Journal] = None
+    snapshots:  Optional[Snapshots] = None
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        "Logs requests into the web log rather than stderr."
+        common.Log.web.debug(format, *args)
 
     # pylint: disable=invalid-name
     def do_GET(self):
@@ -25,11 +48,40 @@ class Handler(BaseHTTPRequestHandler):
         try:
             common.Log.web.info("Received GET request.")
             common.Log.web.debug("On path %s.", self.path)
-            self.__handle_request()
+            if self.path.startswith("/admin/"):
+                self.__handle_admin()
+            elif url.urlparse(self.path).path == "/health":
+                self.__handle_health()
+            else:
+                if Handler.journal is not None:
+                    Handler.journal.web("GET", self.path)
+                self.__handle_request()
+        except Exception:
+            common.Log.web.error(traceback.format_exc())
+            self.__reply(401)
+
+    def do_POST(self):
+        "Handles POST requests, i.e. batches of commands."
+        try:
+            common.Log.web.info("Received POST request.")
+            if url.urlparse(self.path).path != "/batch":
+                raise HomeBaseError.WebRequestParseError
+            self.__handle_batch()
         except Exception:
             common.Log.web.error(traceback.format_exc())
-            self.send_response(401)
-            self.end_headers()
+            self.close_connection = True  # The body might not have been read.
+            self.__reply(401)
+
+    def __reply(self, code: int, body: Union[str, bytes] = b"", content_type: Optional[str] = None):
+        "Sends a complete response; the content length is required for persistent connections."
+        data = str.encode(body) if isinstance(body, str) else body
+        self.send_response(code)
+        if content_type is not None:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Vary", "Accept")
+        self.end_headers()
+        self.wfile.write(data)
 
     def __handle_request(self):
         parsed = self.__parse_path()
@@ -51,6 +103,35 @@ class Handler(BaseHTTPRequestHandler):
         common.Log.web.error("Unknown request kind: %s", kind)
         raise HomeBaseError.WebRequestParseError
 
+    def __handle_admin(self):
+        "Handles authenticated admin requests, currently only profiling sessions."
+        token = common.config.get("admin", {}).get("token")
+        given = self.headers.get("Authorization", "")
+        if not token or not hmac.compare_digest(given.encode(), f"Bearer {token}".encode()):
+            common.Log.web.error("Rejected unauthorized admin request.")
+            raise HomeBaseError.Unauthorized
+        parsed = url.urlparse(self.path)
+        if parsed.path != "/admin/profile":
+            raise HomeBaseError.WebRequestParseError
+        query = { key: values[0] for (key, values) in url.parse_qs(parsed.query).items() }
+        fmt = query.get("format", "text")
+        try:
+            report = PROFILER.session(
+                mode=query.get("mode", "sample"),
+                seconds=float(query.get("seconds", 10)),
+                interval=float(query.get("interval", 0.005)),
+                fmt=fmt,
+                memory=query.get("memory", "1" if fmt == "text" else "0") == "1",
+            )
+        except ValueError as exc:
+            raise HomeBaseError.WebRequestParseError from exc
+        self.__reply(200, report, "text/plain; charset=utf-8")
+
+    def __handle_health(self):
+        "Reports the state of all workers; responds with 503 unless all of them are fine."
+        health = SUPERVISOR.health()
+        self.__reply_data(health, 200 if health["status"] == "ok" else 503)
+
     def __parse_path(self) -> Optional[Tuple[str, str, Dict[str, str]]]:
         parsed = url.urlparse(self.path)
         split = parsed.path.split('/')
@@ -69,32 +150,89 @@ class Handler(BaseHTTPRequestHandler):
         return (kind, command, payload)
 
     def __handle_query(self, query_str: str, topic: Topic):
-        if Handler.request is None or Handler.response is None:
+        if Handler.request is None:
             raise HomeBaseError.Unreachable
         query = ApiQuery.from_str(query_str)
         if query is None:
             common.Log.web.error("Query does not contain a valid command: %s", query)
             raise HomeBaseError.WebRequestParseError
-        Handler.request.put(QData.api_query(
-            topic=topic,
-            query=query
-        ))
-        self.send_response(200)
-        self.end_headers()
+        if Handler.snapshots is not None and query in (ApiQuery.LightState, ApiQuery.SensorState):
+            # State queries are pure reads; answer them without queueing behind commands.
+            resp = Handler.snapshots.respond(topic, query)
+        else:
+            reply: Queue = Queue()
+            Handler.request.put(QData.api_query(
+                topic=topic,
+                query=query,
+                reply=reply,
+            ))
+            resp = Handler.__await(reply)
+        common.Log.web.info("Responding to query with: %s", resp)
+        self.__reply_data(resp)
+        return
+
+    def __reply_data(self, data, code: int = 200):
+        "Responds with the data encoded as the client prefers."
+        encoding = Encoding.negotiate(self.headers.get("Accept"))
+        self.__reply(code, encoding.encode(data), encoding.value)
+
+    @staticmethod
+    def __await(reply: Queue):
         try:
-            resp = Handler.response.get(block=True, timeout=60)
+            return reply.get(block=True, timeout=RESPONSE_TIMEOUT)
         except Empty as ecx:
-            common.Log.web.error("Did not get a response within 60 seconds.")
+            common.Log.web.error("Did not get a response within %d seconds.", RESPONSE_TIMEOUT)
             raise HomeBaseError.QueryNoResponse from ecx
-        common.Log.web.info("Responding to query with: %s", resp)
-        self.wfile.write(str.encode(resp))
-        return
+
+    def __handle_batch(self):
+        """
+            Expects a json array of objects with a command, a topic, and optionally a payload.
+            Executes all valid commands at once and responds with an array holding the status
+            of every item in order.
+        """
+        if Handler.request is None:
+            raise HomeBaseError.Unreachable
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if Handler.journal is not None:
+            Handler.journal.web("POST", self.path, body)
+        items = json.loads(body)
+        if not isinstance(items, list) or len(items) > MAX_BATCH:
+            raise HomeBaseError.WebRequestParseError
+        statuses: List[Optional[Dict[str, str]]] = []
+        commands: List[QData] = []
+        for item in items:
+            parsed = Handler.__parse_batch_item(item)
+            if isinstance(parsed, QData):
+                commands.append(parsed)
+                statuses.append(None)
+            else:
+                statuses.append(parsed)
+        if commands:
+            reply: Queue = Queue()
+            Handler.request.put(QData.api_batch(commands, reply))
+            executed = iter(Handler.__await(reply))
+            statuses = [status or next(executed) for status in statuses]
+        self.__reply_data(statuses)
+
+    @staticmethod
+    def __parse_batch_item(item) -> Union[QData, Dict[str, str]]:
+        "Returns the command of the item, or its error status if it is malformed."
+        try:
+            cmd = ApiCommand.from_str(item["command"])
+            topic = Topic.from_str(item["topic"])
+            payload = { key: str(val) for (key, val) in (item.get("payload") or { }).items() }
+        except (HomeBaseError, KeyError, TypeError, AttributeError):
+            cmd = None
+        if cmd is None or cmd.internal:
+            return { "status": "error", "error": HomeBaseError.WebRequestParseError.name }
+        return QData.api_command(topic, cmd, payload)
 
     def __handle_command(self, command: str, topic: Topic, payload: Dict[str, str]):
         if Handler.request is None:
             raise HomeBaseError.Unreachable
         cmd = ApiCommand.from_str(command)
-        if cmd is None:
+        if cmd is None or cmd.internal:
             common.Log.web.error("Command does not contain a valid command: %s", command)
             raise HomeBaseError.WebRequestParseError
         Handler.request.put(QData(
@@ -103,26 +241,55 @@ class Handler(BaseHTTPRequestHandler):
             command=cmd,
             payload=payload
         ))
-        self.send_response(200)
-        self.end_headers()
+        self.__reply(200)
         return
 
 
-def _update_handler_queue(request: Queue, response: Queue):
-    "Sets the static queue of the handler class."
-    Handler.request  = request
-    Handler.response = response
+def _update_handler_queue(
+    request: Queue,
+    journal: Optional[Journal],
+    snapshots: Optional[Snapshots],
+):
+    "Sets the static queue, journal, and snapshots of the handler class."
+    Handler.request    = request
+    Handler.journal    = journal
+    Handler.snapshots  = snapshots
+
+
+class Server(ThreadingTCPServer):
+    "Serves every connection on a thread of its own, so persistent connections do not block others."
+    daemon_threads = True
+    allow_reuse_address = True
+
+    heartbeat: Optional[Callable[[], None]] = None
+
+    def service_actions(self):
+        "Called by the serving loop at least every poll interval."
+        if self.heartbeat is not None:
+            self.heartbeat()
 
 
 class WebAPI(Worker):
     "Represents the web api of the smart home"
-    def __init__(self, request: Queue, response: Queue):
-        _update_handler_queue(request=request, response=response)
+
+    PORT = 8088
+    STUCK_AFTER = 10.0
+
+    def __init__(
+        self,
+        request: Queue,
+        port: int = PORT,
+        journal: Optional[Journal] = None,
+        snapshots: Optional[Snapshots] = None,
+    ):
+        _update_handler_queue(request=request, journal=journal, snapshots=snapshots)
+        self.port = port
 
     def _run(self):
         "Starts serving TCP requests."
         try:
-            httpd = TCPServer(("", 8088), Handler)
+            httpd = Server(("", self.port), Handler)
+            httpd.heartbeat = self.beat
             httpd.serve_forever()
         except OSError as ose:
             print("Failed attempt to bind socket.")
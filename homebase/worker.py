@@ -1,15 +1,27 @@
 "Module contains naught but an abstract base class for general workers."
 
+import time
 from abc import ABC, abstractmethod
+from typing import Optional
 
 
 class Worker(ABC):
     "Abstract base class for a worker in the smart home app."
 
+    # Seconds without a heartbeat after which the worker counts as stuck; None if silence is normal.
+    STUCK_AFTER: Optional[float] = None
+
+    last_beat: Optional[float] = None
+
     def run(self):
         "Starts running the worker; will never return."
+        self.beat()
         self._run()
 
+    def beat(self):
+        "Signals that the worker is alive and active."
+        self.last_beat = time.time()
+
     @abstractmethod
     def _run(self):
         "Starts running the worker; will never return."